@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.django.local')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Live ticker and candle push (SSE and WebSockets), everything else goes to Django
+from cryptorealtimecrawler.exchange_webservice.streaming import LiveUpdatesApplication  # noqa: E402
+
+application = LiveUpdatesApplication(django_application, path_prefix='/api/exchange-webservice/live/')
@@ -17,4 +17,11 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': 500,
         'args': ['Hello World'],
     }
-}
\ No newline at end of file
+}
+# Lease of periodic crawler runs, a run still going after it is taken to have died
+CRAWLER_RUN_LOCK_TTL = env.int('CRAWLER_RUN_LOCK_TTL', default=120)  # seconds
+
+# OHLCV sweeps start this long after their candles close, giving exchanges time to roll them over
+CANDLE_CLOSE_CRAWL_DELAY = env.int('CANDLE_CLOSE_CRAWL_DELAY', default=10)  # seconds
+# Sweeps of the coins whose closed candle hadn't appeared yet, per candle
+CANDLE_CLOSE_MAX_RETRIES = env.int('CANDLE_CLOSE_MAX_RETRIES', default=5)
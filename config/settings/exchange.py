@@ -17,4 +17,22 @@ coinex_api_secrets = env("COINEX_API_SECRET")
 cmc_api_key = env("CMC_API_KEY")
 
 API_KEYS = {"bingx":bingx_api_key, "xt":xt_api_key, "lbank":lbank_api_key, "coinex":coinex_api_key, "cmc":cmc_api_key}
-API_SECRETS = {"bingx":bingx_api_secrets, "xt":xt_api_secret, "lbank":lbank_api_secret, "coinex":coinex_api_secrets}
\ No newline at end of file
+API_SECRETS = {"bingx":bingx_api_secrets, "xt":xt_api_secret, "lbank":lbank_api_secret, "coinex":coinex_api_secrets}
+# Levels per side kept of each stored order book
+ORDER_BOOK_STORE_DEPTH = env.int("ORDER_BOOK_STORE_DEPTH", default=100)
+# Order books are streamed by run_order_book_daemon instead of polled by the get_orderbook_data task,
+# as deployed by the Procfile and docker-compose. Set it to False where the daemon does not run.
+ORDER_BOOK_STREAMING = env.bool("ORDER_BOOK_STREAMING", default=True)
+
+# Exchange sweeps
+EXCHANGE_REQUEST_TIMEOUT = env.int("EXCHANGE_REQUEST_TIMEOUT", default=5)  # seconds
+EXCHANGE_MAX_CONCURRENT_REQUESTS = env.int("EXCHANGE_MAX_CONCURRENT_REQUESTS", default=4)  # per exchange
+# Sweeps stop starting requests after this long, to finish within the Celery soft time limit
+EXCHANGE_SWEEP_TIME_BUDGET = env.int("EXCHANGE_SWEEP_TIME_BUDGET", default=15)  # seconds
+# OHLCV sweeps save their candles to the database after fetching them, both have to fit in the
+# soft time limit: fetching stops after OHLCV_FETCH_TIME_BUDGET and saving after OHLCV_SWEEP_TIME_BUDGET
+OHLCV_FETCH_TIME_BUDGET = env.int("OHLCV_FETCH_TIME_BUDGET", default=10)  # seconds
+OHLCV_SWEEP_TIME_BUDGET = env.int("OHLCV_SWEEP_TIME_BUDGET", default=17)  # seconds
+# Coins per Celery subtask of the OHLCV sweeps, shards run in parallel on the workers.
+# Sized so a shard's database saves fit in what OHLCV_SWEEP_TIME_BUDGET leaves after fetching
+EXCHANGE_SWEEP_SHARD_SIZE = env.int("EXCHANGE_SWEEP_SHARD_SIZE", default=50)
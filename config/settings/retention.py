@@ -0,0 +1,21 @@
+from config.env import env
+
+# Candles of a timeframe older than `keep_days` are rolled up into the
+# `rollup_to` timeframe and then deleted from the fine grained table.
+HISTORICAL_PRICE_RETENTION_POLICIES = {
+    '5m': {
+        'keep_days': env.int('RETENTION_5M_KEEP_DAYS', default=30),
+        'rollup_to': '1h',
+    },
+    '15m': {
+        'keep_days': env.int('RETENTION_15M_KEEP_DAYS', default=90),
+        'rollup_to': '1h',
+    },
+}
+
+# Rows read per crypto per batch while applying the policies.
+HISTORICAL_PRICE_RETENTION_BATCH_SIZE = env.int('RETENTION_BATCH_SIZE', default=20000)
+
+# Keep a single run safely below CELERY_TASK_SOFT_TIME_LIMIT, the next run
+# picks up where this one stopped.
+HISTORICAL_PRICE_RETENTION_TIME_BUDGET = env.int('RETENTION_TIME_BUDGET', default=15)  # seconds
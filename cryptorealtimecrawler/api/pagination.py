@@ -1,6 +1,12 @@
+import json
 from collections import OrderedDict
+from typing import Optional
 
-from rest_framework.pagination import LimitOffsetPagination as _LimitOffsetPagination
+from django.db import connections
+from rest_framework.pagination import (
+    LimitOffsetPagination as _LimitOffsetPagination,
+    CursorPagination as _CursorPagination
+)
 from rest_framework.response import Response
 
 
@@ -58,3 +64,61 @@ class LimitOffsetPagination(_LimitOffsetPagination):
             ('previous', self.get_previous_link()),
             ('results', data)
         ]))
+
+
+def get_estimated_count(queryset) -> Optional[int]:
+    """
+    Return the planner's row estimate for `queryset` instead of running a
+    COUNT(*). Only PostgreSQL exposes it, None is returned elsewhere.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return plan[0]['Plan']['Plan Rows']
+
+
+class CursorPagination(_CursorPagination):
+    """
+    Keyset pagination, every page costs the same as the first one.
+
+    Pass `count=estimate` to get the planner's estimated total alongside the
+    results, an exact count is never computed.
+    """
+    ordering = 'pk'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.count = get_estimated_count(queryset)
+
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        response_data = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.count is not None:
+            response_data['count'] = self.count
+        response_data['results'] = data
+
+        return Response(response_data)
+
+
+class TimestampCursorPagination(CursorPagination):
+    """Keyset pagination over a single crypto's candles, newest first"""
+    ordering = '-timestamp'
+    page_size = 100
@@ -0,0 +1,99 @@
+import json
+import logging
+from typing import List
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError as e:  # MessagePack responses are optional
+    logger.warning("MessagePack responses are disabled, msgpack could not be imported: %s", e)
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError as e:  # Arrow responses are optional
+    logger.warning("Arrow responses are disabled, pyarrow could not be imported: %s", e)
+    pa = None
+
+
+class ColumnarRendererMixin:
+    """
+    Marks a renderer of columnar payloads, where `results` holds one array
+    per field instead of one object per row. Views check `wants_columns`
+    to build their data that way.
+    """
+    columnar = True
+
+
+def wants_columns(request) -> bool:
+    return getattr(getattr(request, 'accepted_renderer', None), 'columnar', False)
+
+
+class ColumnarJSONRenderer(ColumnarRendererMixin, JSONRenderer):
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+
+
+class MessagePackRenderer(ColumnarRendererMixin, BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True, default=str)
+
+
+class ArrowRenderer(ColumnarRendererMixin, BaseRenderer):
+    """
+    Render the `results` columns as an Arrow IPC stream. Every other key
+    (pagination links, errors, ...) goes JSON encoded in the schema metadata.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        columns = {}
+        metadata = {}
+        if isinstance(data, dict):
+            if isinstance(data.get('results'), dict):
+                columns = data['results']
+            metadata = {
+                key: json.dumps(value, default=str)
+                for key, value in data.items()
+                if key != 'results' or not isinstance(value, dict)
+            }
+        else:
+            metadata = {'data': json.dumps(data, default=str)}
+
+        table = pa.table(columns).replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+def get_columnar_renderer_classes() -> List[type]:
+    """Columnar renderers whose optional dependencies are installed"""
+    renderer_classes = [ColumnarJSONRenderer]
+    if msgpack is not None:
+        renderer_classes.append(MessagePackRenderer)
+    if pa is not None:
+        renderer_classes.append(ArrowRenderer)
+    return renderer_classes
+
+
+def get_price_series_renderer_classes() -> List[type]:
+    """The default renderers, negotiable with the columnar ones via Accept or `?format=`"""
+    return list(api_settings.DEFAULT_RENDERER_CLASSES) + get_columnar_renderer_classes()
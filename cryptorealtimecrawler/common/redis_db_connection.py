@@ -1,5 +1,10 @@
+import asyncio
+import weakref
+from functools import lru_cache
+
 import jsons
 import redis
+import redis.asyncio as aioredis
 
 
 class RedisConnection:
@@ -23,6 +28,10 @@ class RedisConnection:
     def set_with_expiry(self, key, value, expiry):
         self.__redis.setex(key, expiry, value)
 
+    def set_if_not_exists(self, key, value, ex=None) -> bool:
+        """Set the key only if it is absent, atomically. Returns whether it was set"""
+        return bool(self.__redis.set(key, jsons.dumps(value, {'ensure_ascii': False}), ex=ex, nx=True))
+
     def update_redis_field(self, key, field_names, new_values):
         """
         Update a specific field in a dictionary stored in Redis.
@@ -61,11 +70,95 @@ class RedisConnection:
         json_data = jsons.dumps(data, {'ensure_ascii': False})
         self.__redis.publish(channel, json_data)
 
+    def bulk_publish(self, messages: dict):
+        """Publish one message per channel in a single round trip"""
+        if not messages:
+            return
+
+        pipe = self.__redis.pipeline(transaction=False)
+        for channel, data in messages.items():
+            pipe.publish(channel, jsons.dumps(data, {'ensure_ascii': False}))
+        pipe.execute()
+
     def subscribe(self, channel, callback_function):
         pubsub = self.__redis.pubsub()
         pubsub.subscribe(**{channel: callback_function})
         pubsub.run_in_thread(sleep_time=0.01)
 
+    def zadd(self, key, mapping: dict, replace: bool = False):
+        """
+        Add members with scores to a sorted set.
+
+        With `replace` the previous members are dropped in the same
+        transaction, so readers never see a half built set.
+        """
+        pipe = self.__redis.pipeline()
+        if replace:
+            pipe.delete(key)
+        if mapping:
+            pipe.zadd(key, mapping)
+        pipe.execute()
+
+    def zrevrange(self, key, start: int, end: int, withscores: bool = True):
+        return self.__redis.zrevrange(key, start, end, withscores=withscores)
+
+    def zrange(self, key, start: int, end: int, withscores: bool = True):
+        return self.__redis.zrange(key, start, end, withscores=withscores)
+
+    def zrem(self, key, *members):
+        return self.__redis.zrem(key, *members)
+
+    def zremrangebyscore(self, key, min_score, max_score):
+        return self.__redis.zremrangebyscore(key, min_score, max_score)
+
+    def hincrby(self, key, field, amount: int = 1) -> int:
+        return self.__redis.hincrby(key, field, amount)
+
+    def transaction(self, func, *watches):
+        """
+        Run `func(pipe)` with `watches` keys watched and retry it until its
+        MULTI block commits untouched by other clients, returns what `func`
+        returns. `func` reads in immediate mode then calls pipe.multi().
+        """
+        return self.__redis.transaction(func, *watches, value_from_callable=True)
+
+    def server_time(self) -> float:
+        """Redis server clock in seconds, shared by every process using the server"""
+        seconds, microseconds = self.__redis.time()
+        return seconds + microseconds / 1_000_000
+
+    def hset(self, key, mapping: dict, replace: bool = False):
+        """
+        Set JSON encoded fields of a hash.
+
+        With `replace` the previous fields are dropped in the same
+        transaction, so readers never see a half built hash.
+        """
+        pipe = self.__redis.pipeline()
+        if replace:
+            pipe.delete(key)
+        if mapping:
+            pipe.hset(key, mapping={
+                field: jsons.dumps(value, {'ensure_ascii': False})
+                for field, value in mapping.items()
+            })
+        pipe.execute()
+
+    def hgetall(self, key) -> dict:
+        return {field: jsons.loads(value) for field, value in self.__redis.hgetall(key).items()}
+
+    def hmget(self, key, fields: list) -> dict:
+        """Get some fields of a hash, missing fields are left out"""
+        if not fields:
+            return {}
+
+        values = self.__redis.hmget(key, fields)
+        return {
+            field: jsons.loads(value)
+            for field, value in zip(fields, values)
+            if value is not None
+        }
+
     def check_redis_key_existence(self, key):
         return self.__redis.exists(key)
 
@@ -100,3 +193,89 @@ class RedisConnection:
                     data[key] = value
                     
         return data
+
+
+@lru_cache(maxsize=None)
+def get_coins_redis_connection() -> RedisConnection:
+    """Shared connection to the coins Redis database, created on first use"""
+    # Imported lazily so modules using it load without the Redis env vars
+    from config.settings.redis import REDIS_COINS_HOST, REDIS_COINS_PORT
+
+    return RedisConnection(host=REDIS_COINS_HOST, port=REDIS_COINS_PORT)
+
+
+class AsyncRedisConnection:
+    """asyncio counterpart of RedisConnection's read methods, for async views"""
+    def __init__(self, host, port):
+        self.__redis = aioredis.Redis(host=host, port=port, decode_responses=True)
+
+    @staticmethod
+    def _loads(data):
+        try:
+            return jsons.loads(data)
+        except:
+            return data
+
+    async def get(self, key):
+        data = await self.__redis.get(key)
+        if data:
+            return self._loads(data)
+        else:
+            return False
+
+    async def bulk_get(self, keys: list) -> dict:
+        """Get multiple key values in one round trip, missing keys are left out"""
+        if not keys:
+            return {}
+
+        results = await self.__redis.mget(keys)
+        return {
+            key: self._loads(value)
+            for key, value in zip(keys, results)
+            if value is not None
+        }
+
+    async def zrevrange(self, key, start: int, end: int, withscores: bool = True):
+        return await self.__redis.zrevrange(key, start, end, withscores=withscores)
+
+    async def zrange(self, key, start: int, end: int, withscores: bool = True):
+        return await self.__redis.zrange(key, start, end, withscores=withscores)
+
+    async def hgetall(self, key) -> dict:
+        return {field: self._loads(value) for field, value in (await self.__redis.hgetall(key)).items()}
+
+    async def hmget(self, key, fields: list) -> dict:
+        """Get some fields of a hash, missing fields are left out"""
+        if not fields:
+            return {}
+
+        values = await self.__redis.hmget(key, fields)
+        return {
+            field: self._loads(value)
+            for field, value in zip(fields, values)
+            if value is not None
+        }
+
+    async def close(self):
+        await self.__redis.close()
+
+
+# asyncio connections belong to the event loop they were opened in
+_async_coins_redis_connections = weakref.WeakKeyDictionary()
+
+
+def get_async_coins_redis_connection() -> AsyncRedisConnection:
+    """Connection to the coins Redis database shared by the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_coins_redis_connections:
+        from config.settings.redis import REDIS_COINS_HOST, REDIS_COINS_PORT
+
+        _async_coins_redis_connections[loop] = AsyncRedisConnection(host=REDIS_COINS_HOST, port=REDIS_COINS_PORT)
+    return _async_coins_redis_connections[loop]
+
+
+async def close_async_coins_redis_connection() -> None:
+    """Close the running event loop's connection to the coins Redis database, if it opened one"""
+    connection = _async_coins_redis_connections.pop(asyncio.get_running_loop(), None)
+    if connection is not None:
+        await connection.close()
@@ -1,3 +1,5 @@
+from typing import Any, Dict, Iterable, List, Sequence
+
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.http import Http404
@@ -57,3 +59,18 @@ def assert_settings(required_settings, error_message_prefix=""):
         raise ImproperlyConfigured(f"{error_message_prefix} Could not find: {stringified_not_present}")
 
     return values
+
+
+def to_columns(rows: Iterable[Any], fields: Sequence[str]) -> Dict[str, List]:
+    """
+    Transpose rows into parallel arrays, one per field.
+
+    Rows may be `values_list()` tuples, `values()` dicts or any sequence
+    whose items follow `fields`.
+    """
+    rows = list(rows)
+    if rows and isinstance(rows[0], dict):
+        return {field: [row[field] for row in rows] for field in fields}
+
+    columns = list(zip(*rows)) if rows else [()] * len(fields)
+    return {field: list(column) for field, column in zip(fields, columns)}
@@ -4,10 +4,22 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 
+from cryptorealtimecrawler.api.pagination import (
+    CursorPagination, TimestampCursorPagination, get_paginated_response
+)
+from cryptorealtimecrawler.api.renderers import get_price_series_renderer_classes, wants_columns
+from cryptorealtimecrawler.common.utils import to_columns
+from .versioning import (
+    CRYPTO_SCOPE, MARKET_DATA_SCOPE, bump_versions, cache_on_versions, conditional_on_versions,
+    get_historical_price_scopes, historical_price_scope
+)
+from .exports import EXPORT_FORMATS, get_available_export_formats, iter_candle_chunks
 from .models import (
     Crypto, ExchangeSymbol, CMCMarketData, CMCTag, CMCCryptoTag,
-    DailyPrice, FiveMinutePrice, FifteenMinutePrice, OneHourPrice, FourHourPrice
+    DailyPrice, FiveMinutePrice, FifteenMinutePrice, OneHourPrice, FourHourPrice,
+    PriceStatistics, TIMEFRAME_MODEL_MAP
 )
 from .serializers import (
     CryptoSerializer, ExchangeSymbolSerializer, CMCMarketDataSerializer,
@@ -20,16 +32,76 @@ from .services import (
 )
 from .selectors import (
     get_crypto, get_crypto_list, get_crypto_market_data,
-    get_crypto_tags, get_exchange_symbols, get_historical_prices,
-    get_price_statistics, get_top_cryptos_by_volume, get_crypto_price_changes
+    get_crypto_tags, get_exchange_symbols,
+    get_crypto_price_changes,
+    get_window_price_statistics, get_bulk_price_changes,
+    get_top_by_volume, get_price_change_leaderboard, parse_leaderboard_params, get_historical_prices_queryset,
+    get_realtime_tickers, get_realtime_spreads, get_realtime_order_book, parse_order_book_depth,
+    get_order_book_index, get_order_book_metrics,
+    get_latest_candles, get_batch_historical_prices, HISTORICAL_PRICE_FIELDS, parse_candles_limit, parse_time_range
 )
 
 
+def _get_leaderboard_params(request):
+    return parse_leaderboard_params(
+        request.query_params.get('timeframe', '1d'), request.query_params.get('limit', 10)
+    )
+
+
+def _export_historical_prices(request, crypto_ids: List[int], filename: str):
+    """Stream candles of `crypto_ids` in the requested export format"""
+    timeframe = request.query_params.get('timeframe', '1d')
+    output = request.query_params.get('output', 'csv')
+    
+    if output not in get_available_export_formats():
+        return Response(
+            {'error': f'output must be one of: {", ".join(get_available_export_formats())}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if timeframe not in TIMEFRAME_MODEL_MAP:
+        return Response({'error': f'Invalid timeframe: {timeframe}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        start_time, end_time = parse_time_range(
+            request.query_params.get('start_time'), request.query_params.get('end_time')
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Nothing is read until the response streams, after the request transaction
+    # has ended, so the server-side cursor is declared WITH HOLD
+    chunks = iter_candle_chunks(timeframe, crypto_ids, start_time=start_time, end_time=end_time)
+    
+    encoder, content_type = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(encoder(chunks), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}_{timeframe}.{output}"'
+    return response
+
+
+def _historical_price_scopes(request, pk=None) -> List[str]:
+    return get_historical_price_scopes(pk, request.query_params.get('timeframe', '1d'))
+
+
+def _market_data_scopes(request, *args, **kwargs) -> List[str]:
+    return [MARKET_DATA_SCOPE]
+
+
 class CryptoViewSet(viewsets.ModelViewSet):
     """API endpoint for managing cryptocurrencies"""
     queryset = Crypto.objects.all()
     serializer_class = CryptoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
+    MAX_BATCH_CRYPTOS = 100
+    MAX_BATCH_LIMIT = 1000
+    # Price series can also be negotiated as columnar JSON, MessagePack or Arrow
+    price_series_actions = ['historical_prices', 'batch_historical_prices']
+
+    def get_renderers(self):
+        if self.action in self.price_series_actions:
+            return [renderer() for renderer in get_price_series_renderer_classes()]
+        return super().get_renderers()
 
     def get_queryset(self):
         queryset = Crypto.objects.all()
@@ -49,6 +121,25 @@ class CryptoViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def perform_create(self, serializer):
+        serializer.save()
+        bump_versions(CRYPTO_SCOPE)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        bump_versions(CRYPTO_SCOPE)
+
+    def perform_destroy(self, instance):
+        crypto_id = instance.pk
+        instance.delete()
+        # Market data and historical prices cascade with the crypto
+        bump_versions(
+            CRYPTO_SCOPE, MARKET_DATA_SCOPE,
+            *(historical_price_scope(crypto_id, timeframe) for timeframe in TIMEFRAME_MODEL_MAP)
+        )
+
+    @conditional_on_versions(_market_data_scopes)
+    @cache_on_versions(_market_data_scopes)
     @action(detail=True, methods=['get'])
     def market_data(self, request, pk=None):
         """Get market data for a cryptocurrency"""
@@ -73,32 +164,136 @@ class CryptoViewSet(viewsets.ModelViewSet):
         serializer = ExchangeSymbolSerializer(symbols, many=True)
         return Response(serializer.data)
 
+    @conditional_on_versions(_historical_price_scopes)
+    @cache_on_versions(_historical_price_scopes)
     @action(detail=True, methods=['get'])
     def historical_prices(self, request, pk=None):
         """Get historical prices for a cryptocurrency"""
         crypto = self.get_object()
         timeframe = request.query_params.get('timeframe', '1d')
-        limit = int(request.query_params.get('limit', 100))
+        try:
+            start_time, end_time = parse_time_range(
+                request.query_params.get('start_time'), request.query_params.get('end_time')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        prices = get_historical_prices(crypto, timeframe, limit)
-        serializer = HistoricalPriceSerializer(prices, many=True)
-        return Response(serializer.data)
+        prices = get_historical_prices_queryset(crypto, timeframe, start_time=start_time, end_time=end_time)
+        if wants_columns(request):
+            paginator = TimestampCursorPagination()
+            page = paginator.paginate_queryset(prices, request, view=self)
+            return paginator.get_paginated_response(to_columns(page, HISTORICAL_PRICE_FIELDS))
+        return get_paginated_response(
+            pagination_class=TimestampCursorPagination,
+            serializer_class=HistoricalPriceSerializer,
+            queryset=prices,
+            request=request,
+            view=self
+        )
 
+    @action(detail=False, methods=['get'])
+    def batch_historical_prices(self, request):
+        """Get historical prices of many cryptocurrencies, by `ids` or `symbols`, in one request"""
+        timeframe = request.query_params.get('timeframe', '1d')
+        ids = request.query_params.get('ids')
+        symbols = request.query_params.get('symbols')
+        
+        try:
+            crypto_ids = [int(crypto_id) for crypto_id in ids.split(',')] if ids else []
+            limit = min(int(request.query_params.get('limit', 500)), self.MAX_BATCH_LIMIT)
+        except ValueError:
+            return Response(
+                {'error': 'ids and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            start_time, end_time = parse_time_range(
+                request.query_params.get('start_time'), request.query_params.get('end_time')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if ids:
+            cryptos = {crypto.cmc_id: crypto for crypto in Crypto.objects.filter(cmc_id__in=crypto_ids)}
+            requested = crypto_ids
+        elif symbols:
+            requested = [symbol.strip() for symbol in symbols.split(',') if symbol.strip()]
+            cryptos = {crypto.name: crypto for crypto in Crypto.objects.filter(name__in=requested)}
+        else:
+            return Response({'error': 'ids or symbols is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(requested) > self.MAX_BATCH_CRYPTOS:
+            return Response(
+                {'error': f'At most {self.MAX_BATCH_CRYPTOS} cryptocurrencies per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timeframe not in TIMEFRAME_MODEL_MAP:
+            return Response({'error': f'Invalid timeframe: {timeframe}'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Keep the requested order, unknown ids or symbols are reported instead of failing the batch
+        found = list(dict.fromkeys(cryptos[key] for key in requested if key in cryptos))
+        prices = get_batch_historical_prices(
+            found, timeframe, start_time, end_time, limit, columnar=wants_columns(request)
+        )
+        prices['not_found'] = [key for key in requested if key not in cryptos]
+        return Response(prices)
+
+    @action(detail=True, methods=['get'])
+    def export_historical_prices(self, request, pk=None):
+        """Stream the full historical prices of a cryptocurrency as CSV, NDJSON or Arrow"""
+        crypto = self.get_object()
+        return _export_historical_prices(request, [crypto.cmc_id], filename=crypto.name)
+
+    @conditional_on_versions(_historical_price_scopes)
+    @cache_on_versions(_historical_price_scopes)
     @action(detail=True, methods=['get'])
     def price_statistics(self, request, pk=None):
         """Get price statistics for a cryptocurrency"""
         crypto = self.get_object()
         timeframe = request.query_params.get('timeframe', '1d')
+        window = request.query_params.get('window', PriceStatistics.ALL_TIME)
+        
+        if window != PriceStatistics.ALL_TIME and window not in PriceStatistics.WINDOWS:
+            return Response(
+                {'error': f'window must be one of: {PriceStatistics.ALL_TIME}, {", ".join(PriceStatistics.WINDOWS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        stats = get_price_statistics(crypto, timeframe)
+        stats = get_window_price_statistics(crypto, timeframe, window)
         return Response(stats)
 
+    @cache_on_versions(_historical_price_scopes)
     @action(detail=True, methods=['get'])
     def price_changes(self, request, pk=None):
         """Get price changes for different time periods"""
         crypto = self.get_object()
+        timeframe = request.query_params.get('timeframe', '1d')
+        if timeframe not in TIMEFRAME_MODEL_MAP:
+            return Response({'error': f'Invalid timeframe: {timeframe}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        changes = get_crypto_price_changes(crypto)
+        changes = get_crypto_price_changes(crypto, timeframe)
+        return Response(changes)
+
+    @action(detail=False, methods=['get'])
+    def bulk_price_changes(self, request):
+        """Get price changes of many cryptocurrencies with a single query"""
+        timeframe = request.query_params.get('timeframe', '1d')
+        
+        try:
+            periods = [int(period) for period in request.query_params.get('periods', '1,7,30').split(',')]
+            ids = request.query_params.get('ids')
+            crypto_ids = [int(crypto_id) for crypto_id in ids.split(',')] if ids else None
+        except ValueError:
+            return Response(
+                {'error': 'periods and ids must be comma separated integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timeframe not in TIMEFRAME_MODEL_MAP:
+            return Response({'error': f'Invalid timeframe: {timeframe}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        changes = get_bulk_price_changes(timeframe, periods, crypto_ids)
         return Response(changes)
 
 
@@ -107,6 +302,7 @@ class ExchangeSymbolViewSet(viewsets.ModelViewSet):
     queryset = ExchangeSymbol.objects.all()
     serializer_class = ExchangeSymbolSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
 
     def get_queryset(self):
         queryset = ExchangeSymbol.objects.all()
@@ -185,6 +381,7 @@ class MarketDataViewSet(viewsets.ModelViewSet):
     queryset = CMCMarketData.objects.all()
     serializer_class = CMCMarketDataSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
 
     def get_queryset(self):
         queryset = CMCMarketData.objects.all()
@@ -204,6 +401,28 @@ class MarketDataViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @conditional_on_versions(_market_data_scopes)
+    @cache_on_versions(_market_data_scopes)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_on_versions(_market_data_scopes)
+    @cache_on_versions(_market_data_scopes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save()
+        bump_versions(MARKET_DATA_SCOPE)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        bump_versions(MARKET_DATA_SCOPE)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_versions(MARKET_DATA_SCOPE)
+
 
 class HistoricalPriceViewSet(viewsets.ViewSet):
     """API endpoint for managing historical prices"""
@@ -212,11 +431,47 @@ class HistoricalPriceViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def top_by_volume(self, request):
         """Get top cryptocurrencies by volume"""
-        timeframe = request.query_params.get('timeframe', '1d')
-        limit = int(request.query_params.get('limit', 10))
+        try:
+            timeframe, limit = _get_leaderboard_params(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        top_cryptos = get_top_cryptos_by_volume(timeframe, limit)
-        return Response(top_cryptos)
+        return Response(get_top_by_volume(timeframe, limit))
+
+    @action(detail=False, methods=['get'])
+    def top_gainers(self, request):
+        """Get top gaining cryptocurrencies"""
+        try:
+            timeframe, limit = _get_leaderboard_params(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        gainers = get_price_change_leaderboard(timeframe, limit, gainers=True)
+        return Response(gainers)
+
+    @action(detail=False, methods=['get'])
+    def top_losers(self, request):
+        """Get top losing cryptocurrencies"""
+        try:
+            timeframe, limit = _get_leaderboard_params(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        losers = get_price_change_leaderboard(timeframe, limit, gainers=False)
+        return Response(losers)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the historical prices of several cryptocurrencies as CSV, NDJSON or Arrow"""
+        try:
+            crypto_ids = [int(crypto_id) for crypto_id in request.query_params.get('ids', '').split(',')]
+        except ValueError:
+            return Response(
+                {'error': 'ids must be comma separated integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return _export_historical_prices(request, crypto_ids, filename='historical_prices')
 
     @action(detail=False, methods=['post'])
     def bulk_save(self, request):
@@ -244,4 +499,112 @@ class HistoricalPriceViewSet(viewsets.ViewSet):
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
-            ) 
\ No newline at end of file
+            )
+
+
+class RealTimeViewSet(viewsets.ViewSet):
+    """API endpoint for the latest crawled data, served straight from Redis"""
+    permission_classes = [IsAuthenticated]
+
+    def get_renderers(self):
+        if self.action == 'candles':
+            return [renderer() for renderer in get_price_series_renderer_classes()]
+        return super().get_renderers()
+
+    @action(detail=False, methods=['get'])
+    def tickers(self, request):
+        """Get latest tickers of all coins, or of a comma separated `coins` list"""
+        coins = request.query_params.get('coins')
+        
+        tickers = get_realtime_tickers(coins.split(',') if coins else None)
+        return Response(tickers)
+
+    @action(detail=True, methods=['get'])
+    def ticker(self, request, coin=None):
+        """Get latest ticker of a coin"""
+        ticker = get_realtime_tickers([coin]).get(coin)
+        if ticker is None:
+            return Response(
+                {'error': 'Ticker not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(ticker)
+
+    @action(detail=False, methods=['get'])
+    def spreads(self, request):
+        """Get latest cross-exchange spreads of all coins, or of a comma separated `coins` list"""
+        coins = request.query_params.get('coins')
+        
+        spreads = get_realtime_spreads(coins.split(',') if coins else None)
+        return Response(spreads)
+
+    @action(detail=True, methods=['get'])
+    def spread(self, request, coin=None):
+        """Get latest cross-exchange spread of a coin"""
+        spread = get_realtime_spreads([coin]).get(coin)
+        if spread is None:
+            return Response(
+                {'error': 'Spread not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(spread)
+
+    @action(detail=False, methods=['get'])
+    def order_books(self, request):
+        """Get the coins with a stored order book and when it was stored"""
+        return Response(get_order_book_index())
+
+    @action(detail=True, methods=['get'])
+    def order_book(self, request, coin=None):
+        """Get latest order book of a coin, `depth` levels per side"""
+        try:
+            depth = parse_order_book_depth(request.query_params.get('depth'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        order_book = get_realtime_order_book(coin, depth)
+        if order_book is None:
+            return Response(
+                {'error': 'Order book not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(order_book)
+
+    @action(detail=False, methods=['get'])
+    def order_books_metrics(self, request):
+        """Get latest order book metrics of all coins, or of a comma separated `coins` list"""
+        coins = request.query_params.get('coins')
+        
+        metrics = get_order_book_metrics(coins.split(',') if coins else None)
+        return Response(metrics)
+
+    @action(detail=True, methods=['get'])
+    def order_book_metrics(self, request, coin=None):
+        """Get latest order book metrics of a coin"""
+        metrics = get_order_book_metrics([coin]).get(coin)
+        if metrics is None:
+            return Response(
+                {'error': 'Order book metrics not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(metrics)
+
+    @action(detail=True, methods=['get'])
+    def candles(self, request, coin=None):
+        """Get latest crawled candles of a coin, `heikin_ashi=true` for Heikin-Ashi ones"""
+        timeframe = request.query_params.get('timeframe', '1h')
+        heikin_ashi = request.query_params.get('heikin_ashi', '').lower() == 'true'
+        try:
+            limit = parse_candles_limit(request.query_params.get('limit'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        candles = get_latest_candles(coin, timeframe, limit, heikin_ashi=heikin_ashi)
+        if candles is None:
+            return Response(
+                {'error': 'Candles not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if wants_columns(request):
+            return Response({'results': to_columns(candles, HISTORICAL_PRICE_FIELDS)})
+        return Response(candles)
@@ -0,0 +1,221 @@
+"""
+Async counterparts of the read-only exchange_webservice endpoints.
+
+Redis is read with redis.asyncio. The ORM has no async API in this Django
+version, so each view runs its queries in one sync_to_async call. The views
+run outside ATOMIC_REQUESTS, so an ASGI worker parks slow clients on the
+event loop instead of pinning a thread and a transaction for each of them.
+The database backed views answer conditional requests and share the
+response cache like the sync ones.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from cryptorealtimecrawler.api.pagination import TimestampCursorPagination
+from cryptorealtimecrawler.common.redis_db_connection import close_async_coins_redis_connection
+from .models import Crypto, PriceStatistics, TIMEFRAME_MODEL_MAP
+from .versioning import async_conditional_on_versions, get_historical_price_scopes
+from .selectors import (
+    get_historical_prices_queryset, get_window_price_statistics, aget_top_by_volume, parse_leaderboard_params,
+    aget_realtime_tickers, aget_realtime_spreads, aget_realtime_order_book, parse_order_book_depth,
+    aget_order_book_index, aget_order_book_metrics, aget_latest_candles, parse_candles_limit, parse_time_range
+)
+
+
+def async_api_view(view):
+    """
+    Serve `view` to authenticated GET requests, like the viewsets'
+    IsAuthenticated, and keep it out of the request-wide transaction.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+        try:
+            user_auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({'detail': e.detail}, status=401)
+        if user_auth is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user_auth[0]
+
+        try:
+            return await view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+        finally:
+            # Without an ASGI server every request gets its own event loop, its Redis client must not outlive it.
+            # Under ASGI the process' client is closed on lifespan shutdown instead, see LiveUpdatesApplication.
+            if not isinstance(request, ASGIRequest):
+                await close_async_coins_redis_connection()
+
+    return transaction.non_atomic_requests(wrapper)
+
+
+def _error(message: str, status: int = 400) -> JsonResponse:
+    return JsonResponse({'error': message}, status=status)
+
+
+def _historical_price_scopes(request, pk: int):
+    return get_historical_price_scopes(pk, request.GET.get('timeframe', '1d'))
+
+
+@sync_to_async
+def _get_historical_prices_page(request, pk: int, timeframe: str, start_time, end_time):
+    crypto = get_object_or_404(Crypto, pk=pk)
+    prices = get_historical_prices_queryset(crypto, timeframe, start_time=start_time, end_time=end_time)
+
+    paginator = TimestampCursorPagination()
+    page = paginator.paginate_queryset(prices, Request(request))
+    return paginator.get_paginated_response(page).data
+
+
+@async_api_view
+@async_conditional_on_versions(_historical_price_scopes)
+async def historical_prices(request, pk: int):
+    """Get historical prices for a cryptocurrency"""
+    timeframe = request.GET.get('timeframe', '1d')
+
+    if timeframe not in TIMEFRAME_MODEL_MAP:
+        return _error(f'Invalid timeframe: {timeframe}')
+    try:
+        start_time, end_time = parse_time_range(request.GET.get('start_time'), request.GET.get('end_time'))
+    except ValueError as e:
+        return _error(str(e))
+
+    data = await _get_historical_prices_page(request, pk, timeframe, start_time=start_time, end_time=end_time)
+    return JsonResponse(data)
+
+
+@sync_to_async
+def _get_price_statistics(pk: int, timeframe: str, window: str):
+    crypto = get_object_or_404(Crypto, pk=pk)
+    return get_window_price_statistics(crypto, timeframe, window)
+
+
+@async_api_view
+@async_conditional_on_versions(_historical_price_scopes)
+async def price_statistics(request, pk: int):
+    """Get price statistics for a cryptocurrency"""
+    timeframe = request.GET.get('timeframe', '1d')
+    window = request.GET.get('window', PriceStatistics.ALL_TIME)
+
+    if window != PriceStatistics.ALL_TIME and window not in PriceStatistics.WINDOWS:
+        return _error(f'window must be one of: {PriceStatistics.ALL_TIME}, {", ".join(PriceStatistics.WINDOWS)}')
+    if timeframe not in TIMEFRAME_MODEL_MAP:
+        return _error(f'Invalid timeframe: {timeframe}')
+
+    stats = await _get_price_statistics(pk, timeframe, window)
+    return JsonResponse(stats)
+
+
+@async_api_view
+async def top_by_volume(request):
+    """Get top cryptocurrencies by volume"""
+    try:
+        timeframe, limit = parse_leaderboard_params(
+            request.GET.get('timeframe', '1d'), request.GET.get('limit', 10)
+        )
+    except ValueError as e:
+        return _error(str(e))
+
+    return JsonResponse(await aget_top_by_volume(timeframe, limit), safe=False)
+
+
+@async_api_view
+async def realtime_tickers(request):
+    """Get latest tickers of all coins, or of a comma separated `coins` list"""
+    coins = request.GET.get('coins')
+
+    tickers = await aget_realtime_tickers(coins.split(',') if coins else None)
+    return JsonResponse(tickers)
+
+
+@async_api_view
+async def realtime_ticker(request, coin: str):
+    """Get latest ticker of a coin"""
+    ticker = (await aget_realtime_tickers([coin])).get(coin)
+    if ticker is None:
+        return _error('Ticker not found', status=404)
+    return JsonResponse(ticker)
+
+
+@async_api_view
+async def realtime_spreads(request):
+    """Get latest cross-exchange spreads of all coins, or of a comma separated `coins` list"""
+    coins = request.GET.get('coins')
+
+    spreads = await aget_realtime_spreads(coins.split(',') if coins else None)
+    return JsonResponse(spreads)
+
+
+@async_api_view
+async def realtime_spread(request, coin: str):
+    """Get latest cross-exchange spread of a coin"""
+    spread = (await aget_realtime_spreads([coin])).get(coin)
+    if spread is None:
+        return _error('Spread not found', status=404)
+    return JsonResponse(spread)
+
+
+@async_api_view
+async def realtime_order_books(request):
+    """Get the coins with a stored order book and when it was stored"""
+    return JsonResponse(await aget_order_book_index())
+
+
+@async_api_view
+async def realtime_order_book(request, coin: str):
+    """Get latest order book of a coin, `depth` levels per side"""
+    try:
+        depth = parse_order_book_depth(request.GET.get('depth'))
+    except ValueError as e:
+        return _error(str(e))
+
+    order_book = await aget_realtime_order_book(coin, depth)
+    if order_book is None:
+        return _error('Order book not found', status=404)
+    return JsonResponse(order_book)
+
+
+@async_api_view
+async def realtime_order_books_metrics(request):
+    """Get latest order book metrics of all coins, or of a comma separated `coins` list"""
+    coins = request.GET.get('coins')
+
+    metrics = await aget_order_book_metrics(coins.split(',') if coins else None)
+    return JsonResponse(metrics)
+
+
+@async_api_view
+async def realtime_order_book_metrics(request, coin: str):
+    """Get latest order book metrics of a coin"""
+    metrics = (await aget_order_book_metrics([coin])).get(coin)
+    if metrics is None:
+        return _error('Order book metrics not found', status=404)
+    return JsonResponse(metrics)
+
+
+@async_api_view
+async def realtime_candles(request, coin: str):
+    """Get latest crawled candles of a coin, `heikin_ashi=true` for Heikin-Ashi ones"""
+    timeframe = request.GET.get('timeframe', '1h')
+    heikin_ashi = request.GET.get('heikin_ashi', '').lower() == 'true'
+    try:
+        limit = parse_candles_limit(request.GET.get('limit'))
+    except ValueError as e:
+        return _error(str(e))
+
+    candles = await aget_latest_candles(coin, timeframe, limit, heikin_ashi=heikin_ashi)
+    if candles is None:
+        return _error('Candles not found', status=404)
+    return JsonResponse(candles, safe=False)
@@ -0,0 +1,243 @@
+"""
+Analytics derived from the crawler's raw market data at ingest.
+
+Tickers of every exchange are laid out in a coin × exchange matrix once per
+sweep, then best bid/ask, spreads and arbitrage gaps of all coins come out
+of a handful of NumPy reductions instead of a loop per coin. Order books are
+reduced to a few depth, imbalance and impact cost figures, so consumers
+never need to parse the full books.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Bands around the mid price, in percent, within which order book depth is summed
+DEPTH_BANDS_PCT = (0.5, 1, 2)
+# Quote currency notionals whose market order slippage is estimated
+SLIPPAGE_NOTIONALS = (1_000, 10_000, 100_000)
+
+# Fields of the ticker matrix, in order of its last axis
+TICKER_FIELDS = ('bid', 'ask', 'last', 'quoteVolume', 'baseVolume')
+BID, ASK, LAST, QUOTE_VOLUME, BASE_VOLUME = range(len(TICKER_FIELDS))
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_json(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def build_ticker_matrix(
+    tickers_json_data: Dict[str, Dict[str, Dict]],
+    exchange_symbols: pd.DataFrame
+) -> np.ndarray:
+    """
+    Lay tickers out as a (coin, exchange, TICKER_FIELDS) float matrix, NaN
+    where an exchange doesn't list a coin or doesn't report a field.
+
+    `exchange_symbols` has a row per coin and a column per exchange holding
+    the coin's symbol on it, as in `get_all_exchanges_realtime_data` keys.
+    """
+    matrix = np.full((len(exchange_symbols), len(exchange_symbols.columns), len(TICKER_FIELDS)), np.nan)
+
+    for exchange_index, exchange in enumerate(exchange_symbols.columns):
+        tickers = tickers_json_data.get(exchange) or {}
+        for coin_index, symbol in enumerate(exchange_symbols[exchange]):
+            ticker = tickers.get(symbol) if isinstance(symbol, str) else None
+            if ticker:
+                matrix[coin_index, exchange_index] = [_to_float(ticker.get(field)) for field in TICKER_FIELDS]
+
+    return matrix
+
+
+def compute_cross_exchange_spreads(
+    coins: Sequence[str],
+    exchanges: Sequence[str],
+    matrix: np.ndarray
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Consolidate each coin's quotes across exchanges.
+
+    For every coin quoted somewhere: the best bid and ask and their
+    exchanges, mid, spread, the arbitrage gap of buying at the best ask and
+    selling at the best bid (positive when venues cross), the dispersion of
+    last prices, the volume weighted last price and the per exchange quotes.
+    """
+    bid = matrix[:, :, BID]
+    ask = matrix[:, :, ASK]
+    last = matrix[:, :, LAST]
+    volume = np.where(
+        np.isnan(matrix[:, :, QUOTE_VOLUME]),
+        matrix[:, :, BASE_VOLUME] * last,
+        matrix[:, :, QUOTE_VOLUME]
+    )
+
+    # Empty sides of a book come as 0 or None, neither is a price
+    bid = np.where(bid > 0, bid, np.nan)
+    ask = np.where(ask > 0, ask, np.nan)
+
+    # fmax/fmin skip NaNs and leave all NaN rows as NaN
+    best_bid = np.fmax.reduce(bid, axis=1)
+    best_ask = np.fmin.reduce(ask, axis=1)
+    best_bid_exchange = np.argmax(np.where(np.isnan(bid), -np.inf, bid), axis=1)
+    best_ask_exchange = np.argmin(np.where(np.isnan(ask), np.inf, ask), axis=1)
+
+    max_last = np.fmax.reduce(last, axis=1)
+    min_last = np.fmin.reduce(last, axis=1)
+    weights = np.where(np.isnan(last) | np.isnan(volume), 0.0, volume)
+    total_volume = weights.sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mid = (best_bid + best_ask) / 2
+        spread = best_ask - best_bid
+        spread_pct = spread / mid * 100
+        arbitrage_pct = (best_bid - best_ask) / best_ask * 100
+        last_dispersion_pct = (max_last - min_last) / min_last * 100
+        volume_weighted_last = np.where(
+            total_volume > 0,
+            np.nansum(last * weights, axis=1) / total_volume,
+            np.nan
+        )
+
+    quoted = ~(np.isnan(bid) & np.isnan(ask) & np.isnan(last)).all(axis=1)
+
+    spreads = {}
+    for coin_index in np.flatnonzero(quoted):
+        has_bid = not np.isnan(best_bid[coin_index])
+        has_ask = not np.isnan(best_ask[coin_index])
+        spreads[coins[coin_index]] = {
+            'best_bid': _to_json(best_bid[coin_index]),
+            'best_bid_exchange': exchanges[best_bid_exchange[coin_index]] if has_bid else None,
+            'best_ask': _to_json(best_ask[coin_index]),
+            'best_ask_exchange': exchanges[best_ask_exchange[coin_index]] if has_ask else None,
+            'mid': _to_json(mid[coin_index]),
+            'spread': _to_json(spread[coin_index]),
+            'spread_pct': _to_json(spread_pct[coin_index]),
+            'arbitrage_pct': _to_json(arbitrage_pct[coin_index]),
+            'last_dispersion_pct': _to_json(last_dispersion_pct[coin_index]),
+            'volume_weighted_last': _to_json(volume_weighted_last[coin_index]),
+            'total_volume': float(total_volume[coin_index]),
+            'exchanges': {
+                exchange: {
+                    'bid': _to_json(bid[coin_index, exchange_index]),
+                    'ask': _to_json(ask[coin_index, exchange_index]),
+                    'last': _to_json(last[coin_index, exchange_index]),
+                    'volume': _to_json(volume[coin_index, exchange_index]),
+                }
+                for exchange_index, exchange in enumerate(exchanges)
+                if not np.isnan(matrix[coin_index, exchange_index]).all()
+            },
+        }
+
+    return spreads
+
+
+def get_cross_exchange_spreads(
+    tickers_json_data: Dict[str, Dict[str, Dict]],
+    coins: List[str],
+    exchange_symbols: pd.DataFrame
+) -> Dict[str, Dict[str, Any]]:
+    """Cross-exchange spreads of `coins`, `exchange_symbols` rows following them"""
+    matrix = build_ticker_matrix(tickers_json_data, exchange_symbols)
+    return compute_cross_exchange_spreads(coins, list(exchange_symbols.columns), matrix)
+
+
+def _get_levels(side: List[List]) -> np.ndarray:
+    """(price, amount) matrix of an order book side, some exchanges add a third column"""
+    levels = np.array([level[:2] for level in side or []], dtype=float).reshape(-1, 2)
+    return levels[(levels[:, 0] > 0) & (levels[:, 1] > 0)]
+
+
+def _get_average_fill_prices(levels: np.ndarray, notionals: np.ndarray) -> np.ndarray:
+    """
+    Average price of market orders of `notionals` walking `levels` from the
+    top of the book, NaN for the ones the book is too thin for.
+    """
+    prices, amounts = levels[:, 0], levels[:, 1]
+    cumulative_notional = np.cumsum(prices * amounts)
+    cumulative_amount = np.cumsum(amounts)
+
+    # Index of the level each order finishes on
+    last_level = np.searchsorted(cumulative_notional, notionals)
+    filled = last_level < len(prices)
+    last_level = np.minimum(last_level, len(prices) - 1)
+
+    previous_notional = np.where(last_level > 0, cumulative_notional[last_level - 1], 0.0)
+    previous_amount = np.where(last_level > 0, cumulative_amount[last_level - 1], 0.0)
+    amount = previous_amount + (notionals - previous_notional) / prices[last_level]
+    return np.where(filled, notionals / amount, np.nan)
+
+
+def compute_order_book_metrics(order_book: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Reduce an order book to its mid, spread, microprice, top of book
+    imbalance, bid and ask depth (quote notional) with their imbalance within
+    DEPTH_BANDS_PCT of the mid, and the slippage against the mid of buying and
+    selling SLIPPAGE_NOTIONALS at market. None for a book missing a side.
+    """
+    bids = _get_levels(order_book.get('bids'))
+    asks = _get_levels(order_book.get('asks'))
+    if not len(bids) or not len(asks):
+        return None
+
+    # Exchanges send the sides best price first, not all of them strictly
+    bids = bids[np.argsort(-bids[:, 0], kind='stable')]
+    asks = asks[np.argsort(asks[:, 0], kind='stable')]
+
+    best_bid, bid_size = bids[0]
+    best_ask, ask_size = asks[0]
+    mid = (best_bid + best_ask) / 2
+
+    bands = np.array(DEPTH_BANDS_PCT) / 100
+    bid_depth = ((bids[:, 0] >= mid * (1 - bands)[:, None]) * (bids[:, 0] * bids[:, 1])).sum(axis=1)
+    ask_depth = ((asks[:, 0] <= mid * (1 + bands)[:, None]) * (asks[:, 0] * asks[:, 1])).sum(axis=1)
+    total_depth = bid_depth + ask_depth
+    with np.errstate(divide='ignore', invalid='ignore'):
+        depth_imbalance = np.where(total_depth > 0, (bid_depth - ask_depth) / total_depth, np.nan)
+
+    notionals = np.array(SLIPPAGE_NOTIONALS, dtype=float)
+    buy_slippage = (_get_average_fill_prices(asks, notionals) - mid) / mid * 100
+    sell_slippage = (mid - _get_average_fill_prices(bids, notionals)) / mid * 100
+
+    return {
+        'timestamp': order_book.get('timestamp'),
+        'exchange': order_book.get('exchnage'),
+        'best_bid': float(best_bid),
+        'best_ask': float(best_ask),
+        'mid': float(mid),
+        'spread_pct': float((best_ask - best_bid) / mid * 100),
+        'microprice': float((best_bid * ask_size + best_ask * bid_size) / (bid_size + ask_size)),
+        'imbalance': float((bid_size - ask_size) / (bid_size + ask_size)),
+        'depth': {
+            str(band): {
+                'bid': float(bid_depth[index]),
+                'ask': float(ask_depth[index]),
+                'imbalance': _to_json(depth_imbalance[index]),
+            }
+            for index, band in enumerate(DEPTH_BANDS_PCT)
+        },
+        'slippage': {
+            str(notional): {
+                'buy': _to_json(buy_slippage[index]),
+                'sell': _to_json(sell_slippage[index]),
+            }
+            for index, notional in enumerate(SLIPPAGE_NOTIONALS)
+        },
+    }
+
+
+def get_order_books_metrics(order_books: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """compute_order_book_metrics of each coin's book, books missing a side are left out"""
+    metrics = {}
+    for coin, order_book in order_books.items():
+        coin_metrics = compute_order_book_metrics(order_book)
+        if coin_metrics is not None:
+            metrics[coin] = coin_metrics
+    return metrics
@@ -0,0 +1,77 @@
+"""
+Coins divided between crawler nodes.
+
+Nodes of a group announce themselves with heartbeats in a Redis sorted set,
+scored by the server time of their last heartbeat, and members silent for
+longer than the TTL are dropped as dead. Each coin belongs to the node
+following its hash on a consistent hash ring of the live nodes. Every node
+has many points on the ring, so a node joining or leaving only moves its own
+share of the coins and the others keep theirs.
+"""
+import bisect
+import hashlib
+import os
+import socket
+from typing import Iterable, List, Optional
+
+from cryptorealtimecrawler.exchange_webservice.crawler.redis_keys import crawler_nodes_key
+
+
+DEFAULT_HEARTBEAT_INTERVAL = 5  # seconds
+DEFAULT_NODE_TTL = 15  # seconds
+# Points of each node on the ring, more of them even out the nodes' shares
+VIRTUAL_NODES = 100
+
+
+def _hash(key: str) -> int:
+    # Stable across processes and machines, unlike hash()
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hash ring of `nodes`, mapping keys to the node following them"""
+
+    def __init__(self, nodes: Iterable[str], virtual_nodes: int = VIRTUAL_NODES):
+        self.nodes = sorted(set(nodes))
+        points = sorted(
+            (_hash(f'{node}#{index}'), node)
+            for node in self.nodes
+            for index in range(virtual_nodes)
+        )
+        self._hashes = [point_hash for point_hash, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def get_node(self, key: str) -> Optional[str]:
+        """Node owning `key`, None on an empty ring"""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class NodeMembership:
+    """
+    A node's membership of `group`, kept alive by calling heartbeat() more
+    often than every `ttl` seconds.
+    """
+
+    def __init__(self, redis_handler, group: str, node_id: Optional[str] = None, ttl: float = DEFAULT_NODE_TTL):
+        self.redis_handler = redis_handler
+        self.group = group
+        self.node_id = node_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.ttl = ttl
+        self.key = crawler_nodes_key(group)
+
+    def heartbeat(self) -> List[str]:
+        """Mark this node alive, drop the dead ones and return the live nodes"""
+        now = self.redis_handler.server_time()
+        self.redis_handler.zadd(self.key, {self.node_id: now})
+        self.redis_handler.zremrangebyscore(self.key, '-inf', now - self.ttl)
+        return self.get_live_nodes()
+
+    def get_live_nodes(self) -> List[str]:
+        return self.redis_handler.zrange(self.key, 0, -1, withscores=False)
+
+    def leave(self) -> None:
+        """Leave the group right away, instead of once the TTL has run out"""
+        self.redis_handler.zrem(self.key, self.node_id)
@@ -6,7 +6,7 @@ class ExchangeConnector:
     Exchanges = ['bingx', 'xt', 'lbank', 'coinex']
     _instance = None
 
-    def __new__(cls, api_keys: dict, api_secrets: dict):
+    def __new__(cls, api_keys: dict, api_secrets: dict, timeout: int = None):
         if cls._instance is None:
 
             cls._instance = super(ExchangeConnector, cls).__new__(cls)
@@ -15,10 +15,14 @@ class ExchangeConnector:
 
             for exchange in ExchangeConnector.Exchanges:
                 exchange_class = getattr(ccxt, exchange)
-                cls._instance.connector[exchange] = exchange_class({
-                'apiKey': api_keys[exchange],
-                'apiSecret': api_secrets[exchange],
-            })
+                config = {
+                    'apiKey': api_keys[exchange],
+                    'apiSecret': api_secrets[exchange],
+                }
+                if timeout:
+                    # Per request, in seconds, ccxt takes milliseconds
+                    config['timeout'] = timeout * 1000
+                cls._instance.connector[exchange] = exchange_class(config)
 
         return cls._instance
 
@@ -27,6 +31,10 @@ class ExchangeConnector:
                         *args, **kwargs):
         return self.connector[exchange].fetch_tickers(params = {'type': market_type})
 
+    def get_rate_limit(self, exchange: str) -> float:
+        """Requests per second allowed by the exchange, as ccxt knows it"""
+        return 1000 / self.connector[exchange].rateLimit
+
     def get_order_book_data(self, symbol: str, limit: str, exchange: str, **params):
         order_book_data = self.connector[exchange].fetch_order_book(symbol = symbol, limit = limit, **params)
         order_book_data['exchnage'] = exchange
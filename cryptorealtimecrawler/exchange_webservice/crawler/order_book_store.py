@@ -0,0 +1,64 @@
+"""
+Order books stored one Redis key per coin.
+
+Books are stored column-wise, a price and a size array per side truncated
+to ORDER_BOOK_STORE_DEPTH levels, next to a sorted set indexing the stored
+coins by when their book was written. Readers fetch only the coins they
+need and writers store each book as soon as it's fetched.
+"""
+import time
+from typing import Any, Dict, Optional
+
+from cryptorealtimecrawler.exchange_webservice.crawler.analytics import get_order_books_metrics
+from cryptorealtimecrawler.exchange_webservice.crawler.redis_keys import Coin_REDIS_KEY, order_book_key
+
+
+def get_store_depth() -> int:
+    # Imported lazily so readers load without the exchange env vars
+    from config.settings.exchange import ORDER_BOOK_STORE_DEPTH
+
+    return ORDER_BOOK_STORE_DEPTH
+
+
+def encode_order_book(order_book: Dict[str, Any], depth: Optional[int] = None) -> Dict[str, Any]:
+    """Compact form of a ccxt style order book, keeping `depth` (ORDER_BOOK_STORE_DEPTH) levels per side"""
+    depth = depth or get_store_depth()
+    bids = order_book.get('bids') or []
+    asks = order_book.get('asks') or []
+    return {
+        'symbol': order_book.get('symbol'),
+        'exchange': order_book.get('exchnage'),
+        'timestamp': order_book.get('timestamp'),
+        'nonce': order_book.get('nonce'),
+        'bid_prices': [level[0] for level in bids[:depth]],
+        'bid_sizes': [level[1] for level in bids[:depth]],
+        'ask_prices': [level[0] for level in asks[:depth]],
+        'ask_sizes': [level[1] for level in asks[:depth]],
+    }
+
+
+def decode_order_book(data: Dict[str, Any], depth: Optional[int] = None) -> Dict[str, Any]:
+    """The ccxt style order book of an encoded one, optionally cut to `depth` levels per side"""
+    return {
+        'symbol': data.get('symbol'),
+        'bids': [list(level) for level in zip(data['bid_prices'][:depth], data['bid_sizes'][:depth])],
+        'asks': [list(level) for level in zip(data['ask_prices'][:depth], data['ask_sizes'][:depth])],
+        'timestamp': data.get('timestamp'),
+        'nonce': data.get('nonce'),
+        # Same keys as the books fetched by the connector
+        'exchnage': data.get('exchange'),
+    }
+
+
+def save_order_books(redis_handler, order_books: Dict[str, Dict[str, Any]], depth: Optional[int] = None) -> None:
+    """Store ccxt style books by coin, with their index entries and metrics"""
+    if not order_books:
+        return
+
+    now = int(time.time() * 1000)
+    redis_handler.bulk_set({
+        order_book_key(coin): encode_order_book(order_book, depth)
+        for coin, order_book in order_books.items()
+    })
+    redis_handler.zadd(Coin_REDIS_KEY.ORDER_BOOK_INDEX.value, {coin: now for coin in order_books})
+    redis_handler.hset(Coin_REDIS_KEY.ORDER_BOOK_METRICS.value, get_order_books_metrics(order_books))
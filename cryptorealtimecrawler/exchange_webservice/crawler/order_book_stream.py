@@ -0,0 +1,494 @@
+"""
+Local order books kept up to date from exchange streams.
+
+Feeds deliver OrderBookUpdates: snapshots, which replace a book, and
+diffs, which change some of its levels and carry the range of exchange
+sequence numbers they cover. LocalOrderBook checks that diffs follow each
+other without gaps. On a gap the book is dropped and rebuilt from a fresh
+snapshot, with the diffs arriving meanwhile buffered and replayed on top of
+it. OrderBookDaemon runs the feeds and periodically stores the top levels
+of the books that changed to Redis, like the polled books. Daemons on
+several machines split the coins between them by consistent hashing.
+"""
+import abc
+import asyncio
+import heapq
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from cryptorealtimecrawler.exchange_webservice.crawler.cluster import (
+    DEFAULT_HEARTBEAT_INTERVAL, HashRing, NodeMembership
+)
+from cryptorealtimecrawler.exchange_webservice.crawler.order_book_store import save_order_books
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEPTH = 50
+DEFAULT_PUBLISH_INTERVAL = 1  # seconds
+# Diffs kept while a book waits for its snapshot, older ones are dropped
+MAX_BUFFERED_DIFFS = 1000
+SNAPSHOT_RETRY_DELAY = 1  # seconds
+MAX_CONCURRENT_SNAPSHOTS = 5
+
+
+@dataclass
+class OrderBookUpdate:
+    symbol: str
+    bids: List[List[float]]
+    asks: List[List[float]]
+    # Exchange sequence numbers of the first and last change in the update,
+    # both the book's sequence for a snapshot
+    first_sequence: Optional[int] = None
+    last_sequence: Optional[int] = None
+    timestamp: Optional[int] = None
+    is_snapshot: bool = False
+
+
+class OrderBookGapError(Exception):
+    """A diff doesn't follow the book's sequence, the book needs a new snapshot"""
+
+
+class LocalOrderBook:
+    """Order book of a symbol, a price -> amount map per side"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.sequence: Optional[int] = None
+        self.timestamp: Optional[int] = None
+        # False until the first snapshot, and again after a gap
+        self.is_synced = False
+        self._buffer = deque(maxlen=MAX_BUFFERED_DIFFS)
+
+    def apply(self, update: OrderBookUpdate) -> bool:
+        """
+        Apply an update, returning whether the book changed. Diffs received
+        before the book is synced are buffered. Raises OrderBookGapError, and
+        drops the book, when a diff skips sequence numbers.
+        """
+        if update.is_snapshot:
+            self._apply_snapshot(update)
+            return True
+
+        if not self.is_synced:
+            self._buffer.append(update)
+            return False
+
+        return self._apply_diff(update)
+
+    def _apply_snapshot(self, snapshot: OrderBookUpdate) -> None:
+        self.bids = {price: amount for price, amount, *_ in snapshot.bids if amount}
+        self.asks = {price: amount for price, amount, *_ in snapshot.asks if amount}
+        self.sequence = snapshot.last_sequence
+        self.timestamp = snapshot.timestamp
+        self.is_synced = True
+
+        buffered, self._buffer = self._buffer, deque(maxlen=MAX_BUFFERED_DIFFS)
+        for diff in buffered:
+            self._apply_diff(diff)
+
+    def _apply_diff(self, diff: OrderBookUpdate) -> bool:
+        if self.sequence is not None and diff.last_sequence is not None:
+            if diff.last_sequence <= self.sequence:
+                # Already part of the snapshot
+                return False
+            if diff.first_sequence > self.sequence + 1:
+                message = f"{self.symbol}: expected sequence {self.sequence + 1}, got {diff.first_sequence}"
+                self.reset()
+                self._buffer.append(diff)
+                raise OrderBookGapError(message)
+
+        for side, levels in ((self.bids, diff.bids), (self.asks, diff.asks)):
+            for price, amount, *_ in levels:
+                if amount:
+                    side[price] = amount
+                else:
+                    side.pop(price, None)
+        self.sequence = diff.last_sequence if diff.last_sequence is not None else self.sequence
+        self.timestamp = diff.timestamp or self.timestamp
+        return True
+
+    def reset(self) -> None:
+        self.bids, self.asks = {}, {}
+        self.sequence = None
+        self.is_synced = False
+        self._buffer.clear()
+
+    def top(self, depth: int) -> Dict:
+        """The best `depth` levels of each side, ccxt style"""
+        return {
+            'symbol': self.symbol,
+            'bids': [[price, self.bids[price]] for price in heapq.nlargest(depth, self.bids)],
+            'asks': [[price, self.asks[price]] for price in heapq.nsmallest(depth, self.asks)],
+            'timestamp': self.timestamp,
+            'nonce': self.sequence,
+        }
+
+
+class OrderBookFeed(abc.ABC):
+    """Source of order book updates of an exchange's symbols"""
+
+    exchange: str
+
+    @abc.abstractmethod
+    def updates(self, symbols: List[str]) -> AsyncIterator[OrderBookUpdate]:
+        """Stream the updates of `symbols`, until cancelled"""
+
+    @abc.abstractmethod
+    async def fetch_snapshot(self, symbol: str) -> OrderBookUpdate:
+        """A snapshot whose sequence the streamed diffs follow"""
+
+    async def close(self) -> None:
+        pass
+
+
+class CcxtProOrderBookFeed(OrderBookFeed):
+    """
+    Books watched through ccxt.pro, which speaks each exchange's diff
+    protocol (including its own sequence checks) and hands back the whole
+    maintained book, so every update is a snapshot of the top levels.
+    """
+
+    def __init__(self, exchange: str, depth: int = DEFAULT_DEPTH, reconnect_delay: float = 1):
+        import ccxt.pro
+
+        self.exchange = exchange
+        self.depth = depth
+        self.reconnect_delay = reconnect_delay
+        self.client = getattr(ccxt.pro, exchange)()
+
+    def _to_update(self, order_book: Dict) -> OrderBookUpdate:
+        return OrderBookUpdate(
+            symbol=order_book['symbol'],
+            bids=[level[:2] for level in order_book['bids'][:self.depth]],
+            asks=[level[:2] for level in order_book['asks'][:self.depth]],
+            first_sequence=order_book.get('nonce'),
+            last_sequence=order_book.get('nonce'),
+            timestamp=order_book.get('timestamp'),
+            is_snapshot=True
+        )
+
+    async def _watch(self, symbol: str, queue: asyncio.Queue) -> None:
+        while True:
+            try:
+                order_book = await self.client.watch_order_book(symbol, self.depth)
+                await queue.put(self._to_update(order_book))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to watch {self.exchange} {symbol} order book: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def updates(self, symbols: List[str]) -> AsyncIterator[OrderBookUpdate]:
+        queue = asyncio.Queue()
+        watchers = [asyncio.ensure_future(self._watch(symbol, queue)) for symbol in symbols]
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+
+    async def fetch_snapshot(self, symbol: str) -> OrderBookUpdate:
+        return self._to_update(await self.client.fetch_order_book(symbol, self.depth))
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class FakeOrderBookFeed(OrderBookFeed):
+    """
+    Random walk books streamed as sequenced diffs, for tests and local runs.
+    `drop_rate` of the diffs are lost on the way, to exercise resnapshots.
+    """
+
+    def __init__(
+        self,
+        exchange: str = 'fake',
+        interval: float = 0.01,
+        levels: int = 100,
+        drop_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.exchange = exchange
+        self.interval = interval
+        self.levels = levels
+        self.drop_rate = drop_rate
+        self._random = random.Random(seed)
+        self._books: Dict[str, LocalOrderBook] = {}
+
+    def _get_book(self, symbol: str) -> LocalOrderBook:
+        if symbol not in self._books:
+            book = LocalOrderBook(symbol)
+            mid = self._random.uniform(1, 1000)
+            tick = mid / 10000
+            book.bids = {round(mid - tick * i, 8): self._random.uniform(0.1, 10) for i in range(1, self.levels + 1)}
+            book.asks = {round(mid + tick * i, 8): self._random.uniform(0.1, 10) for i in range(1, self.levels + 1)}
+            book.sequence = 0
+            book.is_synced = True
+            self._books[symbol] = book
+        return self._books[symbol]
+
+    def _next_diff(self, symbol: str) -> OrderBookUpdate:
+        book = self._get_book(symbol)
+        changes = {'bids': [], 'asks': []}
+        for side_name, side, get_worst, step in (('bids', book.bids, min, -1), ('asks', book.asks, max, 1)):
+            for price in self._random.sample(sorted(side), k=min(3, len(side))):
+                amount = 0 if self._random.random() < 0.2 else self._random.uniform(0.1, 10)
+                changes[side_name].append([price, amount])
+            # Keep the fake book from thinning out
+            if side and len(side) < self.levels // 2:
+                worst = get_worst(side)
+                changes[side_name].append([round(worst + step * worst / 10000, 8), self._random.uniform(0.1, 10)])
+
+        diff = OrderBookUpdate(
+            symbol=symbol,
+            bids=changes['bids'],
+            asks=changes['asks'],
+            first_sequence=book.sequence + 1,
+            last_sequence=book.sequence + 1,
+            timestamp=int(time.time() * 1000)
+        )
+        book.apply(diff)
+        return diff
+
+    async def updates(self, symbols: List[str]) -> AsyncIterator[OrderBookUpdate]:
+        while True:
+            for symbol in symbols:
+                diff = self._next_diff(symbol)
+                if self._random.random() >= self.drop_rate:
+                    yield diff
+            await asyncio.sleep(self.interval)
+
+    async def fetch_snapshot(self, symbol: str) -> OrderBookUpdate:
+        book = self._get_book(symbol)
+        return OrderBookUpdate(
+            symbol=symbol,
+            bids=[[price, amount] for price, amount in book.bids.items()],
+            asks=[[price, amount] for price, amount in book.asks.items()],
+            first_sequence=book.sequence,
+            last_sequence=book.sequence,
+            timestamp=int(time.time() * 1000),
+            is_snapshot=True
+        )
+
+
+class OrderBookDaemon:
+    """
+    Keeps the books of `coin_symbols` ({exchange: {symbol: coin}}) from
+    their exchanges' feeds and stores the top `depth` levels of changed
+    books, with their metrics, every `publish_interval` seconds.
+
+    With a `membership`, daemons of the same group on several machines
+    divide the coins between them: every `heartbeat_interval` seconds the
+    daemon heartbeats and watches only the coins the hash ring of the live
+    nodes assigns to it, taking over coins of dead nodes and handing coins
+    over to joining ones.
+    """
+
+    def __init__(
+        self,
+        feeds: Dict[str, OrderBookFeed],
+        coin_symbols: Dict[str, Dict[str, str]],
+        redis_handler,
+        depth: int = DEFAULT_DEPTH,
+        publish_interval: float = DEFAULT_PUBLISH_INTERVAL,
+        membership: Optional[NodeMembership] = None,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL
+    ):
+        self.feeds = feeds
+        self.coin_symbols = coin_symbols
+        self.redis_handler = redis_handler
+        self.depth = depth
+        self.publish_interval = publish_interval
+        self.membership = membership
+        self.heartbeat_interval = heartbeat_interval
+
+        # Symbols watched by this node, all of them without a membership
+        self.watched_symbols: Dict[str, Dict[str, str]] = {}
+        self.books: Dict[Tuple[str, str], LocalOrderBook] = {}
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._consumers: Dict[str, asyncio.Task] = {}
+        self._resnapshots: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._snapshot_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SNAPSHOTS)
+        self._failure: Optional[asyncio.Future] = None
+        self.resnapshot_count = 0
+        self.rebalance_count = 0
+
+    def _request_snapshot(self, exchange: str, symbol: str) -> None:
+        key = (exchange, symbol)
+        task = self._resnapshots.get(key)
+        if task is None or task.done():
+            self._resnapshots[key] = asyncio.ensure_future(self._resnapshot(exchange, symbol))
+
+    async def _resnapshot(self, exchange: str, symbol: str) -> None:
+        book = self.books[(exchange, symbol)]
+        while not book.is_synced:
+            try:
+                async with self._snapshot_semaphore:
+                    snapshot = await self.feeds[exchange].fetch_snapshot(symbol)
+            except Exception as e:
+                logger.error(f"Failed to fetch {exchange} {symbol} order book snapshot: {e}")
+                await asyncio.sleep(SNAPSHOT_RETRY_DELAY)
+                continue
+
+            try:
+                book.apply(snapshot)
+            except OrderBookGapError as e:
+                # A buffered diff doesn't follow the snapshot, take another one
+                logger.warning(f"Order book gap on {exchange}: {e}")
+                continue
+            self._dirty.add((exchange, symbol))
+        self.resnapshot_count += 1
+
+    async def _consume(self, exchange: str) -> None:
+        symbols = list(self.watched_symbols[exchange])
+        async for update in self.feeds[exchange].updates(symbols):
+            key = (exchange, update.symbol)
+            book = self.books.get(key)
+            if book is None:
+                continue
+
+            try:
+                if book.apply(update):
+                    self._dirty.add(key)
+            except OrderBookGapError as e:
+                logger.warning(f"Order book gap on {exchange}: {e}")
+
+            if not book.is_synced:
+                self._request_snapshot(exchange, update.symbol)
+
+    def _on_consumer_done(self, task: asyncio.Task) -> None:
+        # Consumers come and go with rebalances, run() learns of their failures here
+        if not task.cancelled() and task.exception() is not None and not self._failure.done():
+            self._failure.set_exception(task.exception())
+
+    def watch(self, watched_symbols: Dict[str, Dict[str, str]]) -> bool:
+        """
+        Watch `watched_symbols` ({exchange: {symbol: coin}}) instead of the
+        current ones, returns whether they changed. Books kept on are left
+        alone, consumers are restarted only on the exchanges whose symbols
+        changed.
+        """
+        changed = False
+        watched_symbols = {exchange: symbols for exchange, symbols in watched_symbols.items() if symbols}
+        for exchange in set(self.watched_symbols) | set(watched_symbols):
+            previous = self.watched_symbols.get(exchange, {})
+            current = watched_symbols.get(exchange, {})
+            if previous.keys() == current.keys():
+                continue
+
+            changed = True
+            for symbol in previous.keys() - current.keys():
+                key = (exchange, symbol)
+                del self.books[key]
+                self._dirty.discard(key)
+                task = self._resnapshots.pop(key, None)
+                if task is not None:
+                    task.cancel()
+            for symbol in current.keys() - previous.keys():
+                self.books[(exchange, symbol)] = LocalOrderBook(symbol)
+
+            consumer = self._consumers.pop(exchange, None)
+            if consumer is not None:
+                consumer.cancel()
+            if current:
+                self.watched_symbols[exchange] = current
+                consumer = asyncio.ensure_future(self._consume(exchange))
+                consumer.add_done_callback(self._on_consumer_done)
+                self._consumers[exchange] = consumer
+            else:
+                self.watched_symbols.pop(exchange, None)
+        return changed
+
+    def get_assigned_symbols(self, nodes: List[str]) -> Dict[str, Dict[str, str]]:
+        """Symbols of the coins the ring of `nodes` assigns to this node"""
+        ring = HashRing(nodes)
+        return {
+            exchange: {
+                symbol: coin
+                for symbol, coin in symbols.items()
+                if ring.get_node(coin) == self.membership.node_id
+            }
+            for exchange, symbols in self.coin_symbols.items()
+        }
+
+    def rebalance(self) -> None:
+        """Heartbeat and watch the coins assigned to this node by the live nodes"""
+        if self.watch(self.get_assigned_symbols(self.membership.heartbeat())):
+            self.rebalance_count += 1
+            logger.info(
+                f"Node {self.membership.node_id} watches {sum(map(len, self.watched_symbols.values()))} order books"
+            )
+
+    async def _rebalance_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                self.rebalance()
+            except Exception as e:
+                # Keep the current coins, the other nodes still see this one until the TTL runs out
+                logger.error(f"Failed to rebalance order books: {e}")
+
+    def get_order_books(self, keys: Optional[Set[Tuple[str, str]]] = None) -> Dict[str, Dict]:
+        """Top levels of the synced books (of the given (exchange, symbol) `keys`), by coin"""
+        order_books = {}
+        for exchange, symbol in keys if keys is not None else self.books:
+            book = self.books.get((exchange, symbol))
+            if book is not None and book.is_synced:
+                order_book = book.top(self.depth)
+                # Same keys as the polled books
+                order_book['exchnage'] = exchange
+                order_books[self.coin_symbols[exchange][symbol]] = order_book
+        return order_books
+
+    def publish(self) -> int:
+        """Store the books changed since the last call, returns how many"""
+        dirty, self._dirty = self._dirty, set()
+        order_books = self.get_order_books(dirty)
+        save_order_books(self.redis_handler, order_books, depth=self.depth)
+        return len(order_books)
+
+    async def _publish_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Failed to publish order books: {e}")
+
+    async def run(self, duration: Optional[float] = None) -> None:
+        """Run until cancelled, or for `duration` seconds"""
+        self._failure = asyncio.get_event_loop().create_future()
+        tasks = [asyncio.ensure_future(self._publish_periodically())]
+        try:
+            if self.membership is None:
+                self.watch(self.coin_symbols)
+            else:
+                self.rebalance()
+                tasks.append(asyncio.ensure_future(self._rebalance_periodically()))
+
+            await asyncio.wait([*tasks, self._failure], timeout=duration, return_when=asyncio.FIRST_EXCEPTION)
+            for task in [*tasks, self._failure]:
+                if task.done() and task.exception():
+                    raise task.exception()
+        finally:
+            if self.membership is not None:
+                try:
+                    # The other nodes take over this one's coins on their next heartbeat
+                    self.membership.leave()
+                except Exception as e:
+                    logger.error(f"Failed to leave the crawler nodes: {e}")
+            self._failure.cancel()
+            pending = [*tasks, *self._consumers.values(), *self._resnapshots.values()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for feed in self.feeds.values():
+                await feed.close()
@@ -4,19 +4,35 @@ from typing import Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
 import pandas as pd
+from celery.exceptions import SoftTimeLimitExceeded
 from django.db import transaction
 
 from cryptorealtimecrawler.common.redis_db_connection import RedisConnection
 from cryptorealtimecrawler.exchange_webservice.crawler.connector import ExchangeConnector
 from cryptorealtimecrawler.exchange_webservice.crawler.cmc_crawler import CMCCrawler
 from cryptorealtimecrawler.utils.shared_utils import SharedUtils as su
-from cryptorealtimecrawler.exchange_webservice.crawler.redis_keys import Coin_REDIS_KEY
+from cryptorealtimecrawler.exchange_webservice.crawler.redis_keys import (
+    Coin_REDIS_KEY, TICKER_LEADERBOARD_TIMEFRAME, LIVE_TICKER_STREAM,
+    leaderboard_key, realtime_key, cross_exchange_key, ohlcv_key, heikin_ashi_key, live_channel,
+    published_candles_key
+)
+from cryptorealtimecrawler.exchange_webservice.crawler.analytics import get_cross_exchange_spreads
+from cryptorealtimecrawler.exchange_webservice.crawler.order_book_store import save_order_books
+from cryptorealtimecrawler.exchange_webservice.crawler.sweep import ExchangeSweep
 from cryptorealtimecrawler.exchange_webservice.models import (
     Crypto, ExchangeSymbol, CMCMarketData, CMCTag, CMCCryptoTag,
-    DailyPrice, FiveMinutePrice, FifteenMinutePrice, OneHourPrice, FourHourPrice
+    TIMEFRAME_MODEL_MAP
+)
+from cryptorealtimecrawler.exchange_webservice.services import update_price_statistics, update_indicators
+from cryptorealtimecrawler.exchange_webservice.versioning import (
+    CRYPTO_SCOPE, EXCHANGE_SYMBOL_SCOPE, MARKET_DATA_SCOPE, TAG_SCOPE, HISTORICAL_PRICE_SCOPE,
+    bump_versions, historical_price_scope
+)
+from cryptorealtimecrawler.utils.crawler.crawler import get_start_time, convert_ohlcv_batch_to_heikinashi
+from config.settings.exchange import (
+    API_KEYS, API_SECRETS, EXCHANGE_REQUEST_TIMEOUT, EXCHANGE_MAX_CONCURRENT_REQUESTS, EXCHANGE_SWEEP_TIME_BUDGET,
+    OHLCV_FETCH_TIME_BUDGET, OHLCV_SWEEP_TIME_BUDGET
 )
-from cryptorealtimecrawler.utils.crawler.crawler import get_start_time
-from config.settings.exchange import API_KEYS, API_SECRETS
 from config.settings.redis import REDIS_COINS_HOST, REDIS_COINS_PORT
 
 
@@ -27,7 +43,9 @@ class BaseCrawler(abc.ABC):
         self._log = su.initialize_log(log_file='tradefai_backend/coin_crawler/logs/events.log')
         self.redis_handler = RedisConnection(host=REDIS_COINS_HOST, port=REDIS_COINS_PORT)
         self.cmc_crawler = CMCCrawler(api_key=API_KEYS['cmc'])
-        self.exchange_connector = ExchangeConnector(api_keys=API_KEYS, api_secrets=API_SECRETS)
+        self.exchange_connector = ExchangeConnector(
+            api_keys=API_KEYS, api_secrets=API_SECRETS, timeout=EXCHANGE_REQUEST_TIMEOUT
+        )
     
     @abc.abstractmethod
     def get_since_time_frame(self) -> Tuple[Optional[int], str]:
@@ -163,6 +181,9 @@ class CoinHandler(BaseCrawler):
                         exchange=exchange,
                         symbol=row[exchange]
                     )
+        
+        # Market data, tags and historical prices cascade with the deleted cryptos
+        bump_versions(CRYPTO_SCOPE, EXCHANGE_SYMBOL_SCOPE, MARKET_DATA_SCOPE, TAG_SCOPE, HISTORICAL_PRICE_SCOPE)
     
     @transaction.atomic
     def _save_cmc_coins_to_database(self, cmc_coins_data: Dict) -> None:
@@ -191,6 +212,8 @@ class CoinHandler(BaseCrawler):
                 CMCCryptoTag.objects.create(crypto=crypto, tag=tag)
             
             self.redis_handler.set(f"{coin_data.get('symbol')}_CMCData", coin_data)
+        
+        bump_versions(MARKET_DATA_SCOPE, TAG_SCOPE)
     
     def get_save_realtime_data(self) -> int:
         """Get and save realtime data"""
@@ -203,7 +226,7 @@ class CoinHandler(BaseCrawler):
             tf_exchange_symbols = tf_coins_data.loc[:, self.Exchanges]
             
             for coin_id, exchange_symbols in tf_exchange_symbols.iterrows():
-                coin_symbol = tf_coins_data.loc[coin_id, 'symbol']
+                coin_symbol = tf_coins_data.loc[coin_id, 'name']
                 
                 for exchange, symbol in exchange_symbols.dropna().items():
                     try:
@@ -211,7 +234,7 @@ class CoinHandler(BaseCrawler):
                         if symbol_data:
                             symbol_data['exchange'] = exchange
                             real_time_data[coin_symbol] = symbol_data
-                            self.redis_handler.set(f'{coin_symbol}_RealTime', symbol_data)
+                            self.redis_handler.set(realtime_key(coin_symbol), symbol_data)
                             break
                     except Exception as e:
                         self._handle_error(f'Failed to get realtime data for {coin_symbol} from {exchange}', e)
@@ -219,12 +242,60 @@ class CoinHandler(BaseCrawler):
             
             if real_time_data:
                 self.redis_handler.set(Coin_REDIS_KEY.REAL_TIME_DATA.value, real_time_data)
+                self._update_ticker_leaderboards(real_time_data)
+                self.redis_handler.bulk_publish({
+                    live_channel(coin_symbol, LIVE_TICKER_STREAM): ticker
+                    for coin_symbol, ticker in real_time_data.items()
+                })
+            
+            self._save_cross_exchange_data(tickers_json_data, tf_coins_data)
             
             return len(error_symbols)
         except Exception as e:
             self._handle_error("Failed to save realtime data", e)
             return 0
     
+    def _save_cross_exchange_data(self, tickers_json_data: Dict[str, Dict], tf_coins_data: pd.DataFrame) -> None:
+        """Consolidate every exchange's ticker of each coin into best bid/ask, spreads and arbitrage gaps"""
+        try:
+            cross_exchange_data = get_cross_exchange_spreads(
+                tickers_json_data,
+                tf_coins_data['name'].tolist(),
+                tf_coins_data.loc[:, self.Exchanges]
+            )
+            if cross_exchange_data:
+                self.redis_handler.set(Coin_REDIS_KEY.CROSS_EXCHANGE_DATA.value, cross_exchange_data)
+                self.redis_handler.bulk_set({
+                    cross_exchange_key(coin_symbol): spreads
+                    for coin_symbol, spreads in cross_exchange_data.items()
+                })
+        except Exception as e:
+            self._handle_error("Failed to save cross exchange data", e)
+    
+    def _update_ticker_leaderboards(self, real_time_data: Dict[str, Dict]) -> None:
+        """Rebuild the 24h volume and change leaderboards from the latest tickers"""
+        volumes = {}
+        changes = {}
+        for coin_symbol, ticker in real_time_data.items():
+            volume = ticker.get('quoteVolume')
+            if volume is None and ticker.get('baseVolume') is not None and ticker.get('last') is not None:
+                volume = ticker['baseVolume'] * ticker['last']
+            if volume is not None:
+                volumes[coin_symbol] = float(volume)
+            
+            change = ticker.get('percentage')
+            if change is None and ticker.get('open') and ticker.get('last') is not None:
+                change = (ticker['last'] - ticker['open']) / ticker['open'] * 100
+            if change is not None:
+                changes[coin_symbol] = float(change)
+        
+        self.redis_handler.zadd(
+            leaderboard_key(Coin_REDIS_KEY.VOLUME_LEADERBOARD, TICKER_LEADERBOARD_TIMEFRAME), volumes, replace=True
+        )
+        self.redis_handler.zadd(
+            leaderboard_key(Coin_REDIS_KEY.CHANGE_LEADERBOARD, TICKER_LEADERBOARD_TIMEFRAME), changes, replace=True
+        )
+    
     def _load_coins_data_from_database(self) -> pd.DataFrame:
         """Load coins data from database"""
         query_set = Crypto.objects.all()
@@ -240,77 +311,137 @@ class CoinHandler(BaseCrawler):
         return tf_coins_data.replace("nan", np.nan)
     
     def get_save_orderbook_data(self, limit: int = 500) -> int:
-        """Get and save orderbook data"""
+        """
+        Get and save orderbook data, coins are fetched concurrently within
+        each exchange's limits and fall back to their next exchange on errors
+        """
         try:
-            tf_coins_data = self._load_coins_data_from_database()
-            order_book_data = {}
-            error_symbols = set()
+            coin_symbols = self.get_coin_symbols()
             
-            tf_exchange_symbols = tf_coins_data.loc[:, self.Exchanges]
+            def fetch(exchange: str, symbol: str) -> Dict:
+                return self.exchange_connector.get_order_book_data(
+                    symbol=symbol,
+                    limit=limit if exchange != 'coinex' else None,
+                    exchange=exchange
+                )
             
-            for coin_id, exchange_symbols in tf_exchange_symbols.iloc[:self.Coins_Limit].iterrows():
-                coin_symbol = tf_coins_data.loc[coin_id, 'name']
-                
-                for exchange, symbol in exchange_symbols.dropna().items():
-                    try:
-                        symbol_order_book_data = su.retry(
-                            self.exchange_connector.get_order_book_data,
-                            symbol=symbol,
-                            limit=limit if exchange != 'coinex' else None,
-                            exchange=exchange
-                        )
-                        
-                        if symbol_order_book_data is not None:
-                            order_book_data[coin_symbol] = symbol_order_book_data
-                            break
-                    except Exception as e:
-                        self._handle_error(f'Failed to get orderbook data for {coin_symbol}', e)
-                        error_symbols.add(coin_symbol)
-                        time.sleep(5)
-                time.sleep(0.1)
+            def save(coin_symbol: str, exchange: str, order_book: Dict) -> None:
+                # Stored right away, books fetched so far survive a failed sweep
+                save_order_books(self.redis_handler, {coin_symbol: order_book})
+            
+            def handle_error(coin_symbol: str, exchange: str, error: Exception) -> None:
+                self._handle_error(f'Failed to get orderbook data for {coin_symbol} from {exchange}', error)
             
-            self.redis_handler.set(Coin_REDIS_KEY.ORDER_BOOK_DATA.value, order_book_data)
+            error_symbols = self._get_exchange_sweep().run(coin_symbols, fetch, save, handle_error)
             return len(error_symbols)
         except Exception as e:
             self._handle_error("Failed to save orderbook data", e)
             return 0
     
-    def get_all_coins_ohlcv_data(self, timeframe: str, limit: int) -> Tuple[Dict, Set]:
-        """Get OHLCV data for all coins"""
+    def _get_exchange_sweep(self, time_budget: float = EXCHANGE_SWEEP_TIME_BUDGET) -> ExchangeSweep:
+        return ExchangeSweep(
+            self.Exchanges,
+            {exchange: self.exchange_connector.get_rate_limit(exchange) for exchange in self.Exchanges},
+            max_concurrent_requests=EXCHANGE_MAX_CONCURRENT_REQUESTS,
+            time_budget=time_budget
+        )
+    
+    def get_coin_symbols(self) -> List[Tuple[str, List[Tuple[str, str]]]]:
+        """[(coin, [(exchange, symbol), ...])] of the first Coins_Limit coins, exchanges in order of preference"""
+        tf_coins_data = self._load_coins_data_from_database()
+        tf_exchange_symbols = tf_coins_data.loc[:, self.Exchanges]
+        return [
+            (tf_coins_data.loc[coin_id, 'name'], list(exchange_symbols.dropna().items()))
+            for coin_id, exchange_symbols in tf_exchange_symbols.iloc[:self.Coins_Limit].iterrows()
+        ]
+    
+    def get_coin_shards(
+        self,
+        shard_size: int,
+        coins: Optional[List[str]] = None
+    ) -> List[List[Tuple[str, List[Tuple[str, str]]]]]:
+        """
+        get_coin_symbols (of `coins` only if given) split in shards of up to
+        `shard_size` coins, each holding coins of a single preferred exchange
+        so shards of different exchanges don't compete for the same rate
+        limits.
+        """
+        coins = set(coins) if coins is not None else None
+        coins_by_exchange = {}
+        for coin_symbol, listings in self.get_coin_symbols():
+            if listings and (coins is None or coin_symbol in coins):
+                coins_by_exchange.setdefault(listings[0][0], []).append((coin_symbol, listings))
+        
+        return [
+            coin_symbols[index:index + shard_size]
+            for coin_symbols in coins_by_exchange.values()
+            for index in range(0, len(coin_symbols), shard_size)
+        ]
+    
+    def get_all_coins_ohlcv_data(
+        self,
+        timeframe: str,
+        limit: int,
+        coin_symbols: Optional[List[Tuple[str, List[Tuple[str, str]]]]] = None
+    ) -> Tuple[Dict, Set]:
+        """
+        Get OHLCV data of `coin_symbols` (all coins by default), fetched
+        concurrently within each exchange's limits, and save it to Redis and
+        the database. Coins fetched but not saved to the database, because the
+        save failed or OHLCV_SWEEP_TIME_BUDGET ran out, are kept out of Redis
+        too and counted with the errors.
+        """
+        deadline = time.monotonic() + OHLCV_SWEEP_TIME_BUDGET
         try:
-            tf_coins_data = self._load_coins_data_from_database()
+            if coin_symbols is None:
+                coin_symbols = self.get_coin_symbols()
             ohlcv_data = {}
-            error_symbols = set()
             
-            tf_exchange_symbols = tf_coins_data.loc[:, self.Exchanges]
+            def fetch(exchange: str, symbol: str) -> List[List]:
+                symbol_ohlcv_data = self.exchange_connector.get_ohlcv_data(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    limit=limit,
+                    exchange=exchange
+                )
+                if not isinstance(symbol_ohlcv_data, list):
+                    raise ValueError(f'Unexpected OHLCV response: {symbol_ohlcv_data}')
+                return symbol_ohlcv_data
             
-            for coin_id, exchange_symbols in tf_exchange_symbols.iloc[:self.Coins_Limit].iterrows():
-                coin_symbol = tf_coins_data.loc[coin_id, 'name']
-                crypto = Crypto.objects.get(name=coin_symbol)
-                
-                for exchange, symbol in exchange_symbols.dropna().items():
-                    try:
-                        symbol_ohlcv_data = su.retry(
-                            self.exchange_connector.get_ohlcv_data,
-                            symbol=symbol,
-                            timeframe=timeframe,
-                            limit=limit,
-                            exchange=exchange
-                        )
-                        
-                        if symbol_ohlcv_data and isinstance(symbol_ohlcv_data, list):
-                            ohlcv_data[coin_symbol] = symbol_ohlcv_data
-                            self.redis_handler.set(f"{coin_symbol}_{timeframe}", symbol_ohlcv_data)
-                            self._save_ohlcv_to_database(crypto, symbol_ohlcv_data, timeframe)
-                            
-                        if self.redis_handler.get(f"{coin_symbol}_{timeframe}"):
-                            break
-                    except Exception as e:
-                        self._handle_error(f'Failed to get OHLCV {timeframe} data for {coin_symbol} from {exchange}', e)
-                        error_symbols.add(f'{exchange}_{coin_symbol}')
-                time.sleep(0.1)
+            def collect(coin_symbol: str, exchange: str, symbol_ohlcv_data: List[List]) -> None:
+                ohlcv_data[coin_symbol] = symbol_ohlcv_data
+            
+            def handle_error(coin_symbol: str, exchange: str, error: Exception) -> None:
+                self._handle_error(f'Failed to get OHLCV {timeframe} data for {coin_symbol} from {exchange}', error)
+            
+            sweep = self._get_exchange_sweep(time_budget=OHLCV_FETCH_TIME_BUDGET)
+            error_symbols = sweep.run(coin_symbols, fetch, collect, handle_error)
+            
+            # Saved from this thread, the sweep's worker threads have no database connection of their own
+            cryptos = {crypto.name: crypto for crypto in Crypto.objects.filter(name__in=list(ohlcv_data))}
+            for coin_symbol, symbol_ohlcv_data in list(ohlcv_data.items()):
+                if time.monotonic() > deadline:
+                    # Left to the next sweep, instead of running into the task's time limit
+                    del ohlcv_data[coin_symbol]
+                    error_symbols.add(coin_symbol)
+                    continue
+                try:
+                    self._save_ohlcv_to_database(cryptos[coin_symbol], symbol_ohlcv_data, timeframe)
+                except SoftTimeLimitExceeded:
+                    raise
+                except Exception as e:
+                    self._handle_error(f'Failed to save OHLCV {timeframe} data for {coin_symbol}', e)
+                    # Redis must not serve candles the database lacks, the coin is retried instead
+                    del ohlcv_data[coin_symbol]
+                    error_symbols.add(coin_symbol)
             
+            self.redis_handler.bulk_set({
+                ohlcv_key(coin_symbol, timeframe): symbol_ohlcv_data
+                for coin_symbol, symbol_ohlcv_data in ohlcv_data.items()
+            })
             return ohlcv_data, error_symbols
+        except SoftTimeLimitExceeded:
+            raise
         except Exception as e:
             self._handle_error("Failed to get OHLCV data", e)
             return {}, set()
@@ -318,42 +449,43 @@ class CoinHandler(BaseCrawler):
     @transaction.atomic
     def _save_ohlcv_to_database(self, crypto: Crypto, ohlcv_data: List[List], timeframe: str) -> None:
         """Save OHLCV data to the appropriate database table"""
-        # Map timeframe to model class
-        timeframe_model_map = {
-            '5m': FiveMinutePrice,
-            '15m': FifteenMinutePrice,
-            '1h': OneHourPrice,
-            '4h': FourHourPrice,
-            '1d': DailyPrice
-        }
-        
-        model_class = timeframe_model_map.get(timeframe)
+        model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
         if not model_class:
             self._handle_error(f"Invalid timeframe: {timeframe}", ValueError(f"Invalid timeframe: {timeframe}"))
             return
         
-        # Delete existing data for this crypto and timeframe
-        model_class.objects.filter(crypto=crypto).delete()
+        # Ensure we have all required fields
+        ohlcv_data = [data for data in ohlcv_data if len(data) >= 6]
+        if not ohlcv_data:
+            return
+        
+        # Read before the window is replaced, it keeps the indicators of
+        # candles that had already closed
+        indicators = update_indicators(crypto, timeframe, ohlcv_data)
+
+        # Replace only the window we just fetched, older candles are kept
+        first_timestamp = min(data[0] for data in ohlcv_data)
+        model_class.objects.filter(crypto=crypto, timestamp__gte=first_timestamp).delete()
         
         # Prepare data for bulk create
-        records = []
-        for data in ohlcv_data:
-            if len(data) >= 6:  # Ensure we have all required fields
-                records.append(
-                    model_class(
-                        crypto=crypto,
-                        timestamp=data[0],  # Unix timestamp
-                        open=data[1],      # Open price
-                        high=data[2],      # High price
-                        low=data[3],       # Low price
-                        close=data[4],     # Close price
-                        volume=data[5]     # Volume
-                    )
-                )
+        records = [
+            model_class(
+                crypto=crypto,
+                timestamp=data[0],  # Unix timestamp
+                open=data[1],      # Open price
+                high=data[2],      # High price
+                low=data[3],       # Low price
+                close=data[4],     # Close price
+                volume=data[5],    # Volume
+                indicators=indicators.get(data[0])
+            )
+            for data in ohlcv_data
+        ]
         
         # Bulk create records
-        if records:
-            model_class.objects.bulk_create(records, batch_size=1000)
+        model_class.objects.bulk_create(records, batch_size=1000)
+        update_price_statistics(crypto, timeframe, ohlcv_data)
+        bump_versions(historical_price_scope(crypto.pk, timeframe))
     
     def run_save_ohlcv_redis(self) -> int:
         """Run and save OHLCV data to Redis"""
@@ -364,15 +496,148 @@ class CoinHandler(BaseCrawler):
                 limit=201
             )
             
-            if ohlcv_data:
-                redis_key = self.get_redis_key()
-                self.redis_handler.set(redis_key, ohlcv_data)
+            self._save_ohlcv_snapshot(timeframe, ohlcv_data)
             
             return len(error_symbols)
+        except SoftTimeLimitExceeded:
+            raise
         except Exception as e:
             self._handle_error("Failed to run OHLCV crawler", e)
             return 0
     
+    def run_save_ohlcv_shard(self, coin_symbols: List[Tuple[str, List[Tuple[str, str]]]]) -> Dict[str, List[str]]:
+        """
+        Fetch and save the OHLCV data of one shard of coins, as given by
+        get_coin_shards. Returns the coins saved and the ones no exchange
+        served, for run_save_ohlcv_snapshot.
+        """
+        try:
+            since, timeframe = self.get_since_time_frame()
+            ohlcv_data, error_symbols = self.get_all_coins_ohlcv_data(
+                timeframe=timeframe,
+                limit=201,
+                coin_symbols=coin_symbols
+            )
+            return {'coins': list(ohlcv_data), 'error_symbols': sorted(error_symbols)}
+        except SoftTimeLimitExceeded:
+            raise
+        except Exception as e:
+            self._handle_error("Failed to run OHLCV shard", e)
+            return {'coins': [], 'error_symbols': []}
+    
+    def run_save_ohlcv_snapshot(self, shard_results: List[Dict[str, List[str]]], partial: bool = False) -> int:
+        """
+        Combine the coins saved by the shards of a sweep into the timeframe's
+        snapshot, on top of the stored one for a `partial` sweep of some coins
+        """
+        try:
+            since, timeframe = self.get_since_time_frame()
+            keys = {
+                coin_symbol: ohlcv_key(coin_symbol, timeframe)
+                for shard_result in shard_results
+                for coin_symbol in shard_result['coins']
+            }
+            stored_data = self.redis_handler.bulk_get(list(keys.values()))
+            swept_data = {coin_symbol: stored_data[key] for coin_symbol, key in keys.items() if stored_data.get(key)}
+            ohlcv_data = swept_data
+            if partial and swept_data:
+                ohlcv_data = {**(self.redis_handler.get(self.get_redis_key()) or {}), **swept_data}
+            self._save_ohlcv_snapshot(timeframe, ohlcv_data, swept_data)
+            
+            return sum(len(shard_result['error_symbols']) for shard_result in shard_results)
+        except Exception as e:
+            self._handle_error("Failed to save OHLCV snapshot", e)
+            return 0
+    
+    def _save_ohlcv_snapshot(
+        self,
+        timeframe: str,
+        ohlcv_data: Dict[str, List[List]],
+        swept_data: Optional[Dict[str, List[List]]] = None
+    ) -> None:
+        """
+        Store the data of all coins with the leaderboards derived from it, and
+        the Heikin-Ashi candles and closed candles of the coins just swept
+        (`swept_data`, all of them by default)
+        """
+        if swept_data is None:
+            swept_data = ohlcv_data
+        if ohlcv_data:
+            self.redis_handler.set(self.get_redis_key(), ohlcv_data)
+            self._update_ohlcv_leaderboards(timeframe, ohlcv_data)
+        if swept_data:
+            self._save_heikin_ashi_redis(timeframe, swept_data)
+            self._publish_closed_candles(timeframe, swept_data)
+    
+    def get_coins_missing_candle(self, coins: List[str], candle_open_time: int) -> List[str]:
+        """
+        Coins of `coins` whose stored candles don't reach the one opening at
+        `candle_open_time` (ms), their exchange hadn't closed the previous
+        candle yet when they were fetched
+        """
+        _, timeframe = self.get_since_time_frame()
+        stored_data = self.redis_handler.bulk_get([ohlcv_key(coin_symbol, timeframe) for coin_symbol in coins])
+        missing = []
+        for coin_symbol in coins:
+            candles = stored_data.get(ohlcv_key(coin_symbol, timeframe))
+            if not candles or candles[-1][0] < candle_open_time:
+                missing.append(coin_symbol)
+        return missing
+    
+    def _update_ohlcv_leaderboards(self, timeframe: str, ohlcv_data: Dict[str, List[List]]) -> None:
+        """
+        Rebuild the volume and change leaderboards of a timeframe from a sweep.
+
+        Volume is the average candle volume of the fetched window, change is
+        the latest candle's close against the previous close.
+        """
+        volumes = {}
+        changes = {}
+        for coin_symbol, candles in ohlcv_data.items():
+            candles = [candle for candle in candles if len(candle) >= 6 and candle[5] is not None]
+            if not candles:
+                continue
+            
+            volumes[coin_symbol] = float(np.mean([candle[5] for candle in candles]))
+            if len(candles) >= 2 and candles[-2][4]:
+                changes[coin_symbol] = (candles[-1][4] - candles[-2][4]) / candles[-2][4] * 100
+        
+        self.redis_handler.zadd(leaderboard_key(Coin_REDIS_KEY.VOLUME_LEADERBOARD, timeframe), volumes, replace=True)
+        self.redis_handler.zadd(leaderboard_key(Coin_REDIS_KEY.CHANGE_LEADERBOARD, timeframe), changes, replace=True)
+    
+    def _save_heikin_ashi_redis(self, timeframe: str, ohlcv_data: Dict[str, List[List]]) -> None:
+        """Store every coin's Heikin-Ashi candles next to the raw ones, converted in one batch"""
+        heikin_ashi_data = convert_ohlcv_batch_to_heikinashi(ohlcv_data)
+        self.redis_handler.bulk_set({
+            heikin_ashi_key(coin_symbol, timeframe): candles
+            for coin_symbol, candles in heikin_ashi_data.items()
+        })
+    
+    def _publish_closed_candles(self, timeframe: str, ohlcv_data: Dict[str, List[List]]) -> None:
+        """Publish each coin's latest closed candle to its live channel, once per candle"""
+        # The last candle of a sweep is still forming
+        closed_candles = {
+            coin_symbol: candles[-2]
+            for coin_symbol, candles in ohlcv_data.items()
+            if len(candles) >= 2
+        }
+        # Retries sweep the same candles again, subscribers already got them
+        key = published_candles_key(timeframe)
+        published = self.redis_handler.hmget(key, list(closed_candles))
+        new_candles = {
+            coin_symbol: candle
+            for coin_symbol, candle in closed_candles.items()
+            if coin_symbol not in published or candle[0] > published[coin_symbol]
+        }
+        if not new_candles:
+            return
+
+        self.redis_handler.bulk_publish({
+            live_channel(coin_symbol, timeframe): candle
+            for coin_symbol, candle in new_candles.items()
+        })
+        self.redis_handler.hset(key, {coin_symbol: candle[0] for coin_symbol, candle in new_candles.items()})
+    
     def get_coins_ohlcv_data(self, coins: Optional[List[str]] = None, timeframe: Optional[str] = None) -> Dict:
         """Get OHLCV data for specific coins"""
         try:
@@ -385,7 +650,7 @@ class CoinHandler(BaseCrawler):
                 if not coins:
                     return {}
             
-            redis_keys = [f"{coin}_{timeframe}" for coin in coins]
+            redis_keys = [ohlcv_key(coin, timeframe) for coin in coins]
             return self.redis_handler.bulk_get(redis_keys)
         except Exception as e:
             self._handle_error("Failed to get coins OHLCV data", e)
@@ -9,10 +9,100 @@ class Coin_REDIS_KEY(Enum):
     DAILY = "DailyData"
     WEEKLY = "WeeklyData"
     REAL_TIME_DATA = "RealTimeData"
-    ORDER_BOOK_DATA = "OrderBookData"
+    # Sorted set of the coins with a stored order book, scored by when it was stored (ms)
+    ORDER_BOOK_INDEX = "OrderBookIndex"
+    # Hash of order book metrics, one field per coin
+    ORDER_BOOK_METRICS = "OrderBookMetrics"
     CMC_COINS_DATA = "CMCCoinsData"
     CMC_CHAINS_DATA = "CMCChainsData"
     CHAINS_TVL_Percentages = "ChainsTVLPercentages"
     TOTAL_TVL_DATA = "TotalTVLData"
-    
+    VOLUME_LEADERBOARD = "VolumeLeaderboard"
+    CHANGE_LEADERBOARD = "ChangeLeaderboard"
+    CROSS_EXCHANGE_DATA = "CrossExchangeData"
+    # Hash of periodic crawler run counters, '<lock>:<outcome>' fields
+    CRAWLER_RUN_METRICS = "CrawlerRunMetrics"
+    # Hash of the last candle swept by each OHLCV crawler, with the coins still missing it
+    CANDLE_CLOSE_CRAWLS = "CandleCloseCrawls"
 
+
+# Sorted set of the live crawler nodes of a group, scored by their last heartbeat (s)
+CRAWLER_NODES_PREFIX = "CrawlerNodes"
+
+
+def crawler_nodes_key(group: str) -> str:
+    return f"{CRAWLER_NODES_PREFIX}_{group}"
+
+
+# Lease of a periodic crawler run and the last fencing token issued for it
+RUN_LOCK_PREFIX = "RunLock"
+
+
+def run_lock_key(name: str) -> str:
+    return f"{RUN_LOCK_PREFIX}_{name}"
+
+
+def run_lock_token_key(name: str) -> str:
+    return f"{RUN_LOCK_PREFIX}_{name}_Token"
+
+
+# Marks a candle close sweep as dispatched, so it is enqueued once per candle and attempt
+CANDLE_CLOSE_DISPATCH_PREFIX = "CandleCloseDispatch"
+
+
+def candle_close_dispatch_key(crawler_name: str, candle_open_time: int, attempt: int) -> str:
+    return f"{CANDLE_CLOSE_DISPATCH_PREFIX}_{crawler_name}_{candle_open_time}_{attempt}"
+
+
+# Tickers report rolling 24h volume and change, their leaderboards use this timeframe
+TICKER_LEADERBOARD_TIMEFRAME = '24h'
+
+
+def leaderboard_key(board: Coin_REDIS_KEY, timeframe: str) -> str:
+    return f"{board.value}_{timeframe}"
+
+
+def realtime_key(coin: str) -> str:
+    return f"{coin}_RealTime"
+
+
+def order_book_key(coin: str) -> str:
+    return f"{coin}_OrderBook"
+
+
+def cross_exchange_key(coin: str) -> str:
+    return f"{coin}_CrossExchange"
+
+
+def ohlcv_key(coin: str, timeframe: str) -> str:
+    return f"{coin}_{timeframe}"
+
+
+def heikin_ashi_key(coin: str, timeframe: str) -> str:
+    return f"{coin}_{timeframe}_HeikinAshi"
+
+
+# Pub/sub channels carrying live updates, one per coin and stream ('ticker' or a timeframe)
+LIVE_CHANNEL_PREFIX = "Live"
+LIVE_CHANNEL_PATTERN = f"{LIVE_CHANNEL_PREFIX}_*"
+LIVE_TICKER_STREAM = "ticker"
+
+
+# Hash of the open time (ms) of the last closed candle published per coin, one per timeframe
+PUBLISHED_CANDLES_PREFIX = "PublishedCandles"
+
+
+def published_candles_key(timeframe: str) -> str:
+    return f"{PUBLISHED_CANDLES_PREFIX}_{timeframe}"
+
+
+def live_channel(coin: str, stream: str) -> str:
+    return f"{LIVE_CHANNEL_PREFIX}_{coin}_{stream}"
+
+
+# Version stamps of the stored data, bumped whenever ingest changes it
+DATA_VERSION_PREFIX = "DataVersion"
+
+
+def data_version_key(scope: str) -> str:
+    return f"{DATA_VERSION_PREFIX}_{scope}"
@@ -0,0 +1,131 @@
+"""
+Lease locks keeping periodic crawler runs from overlapping.
+
+A run holds its lock's lease for at most `ttl` seconds, so a run that died
+can't block its task for good. Every lease granted comes with a fencing
+token, one more than the previous lease of the same lock. Runs starting
+while the lock is held are skipped, coalescing into the run in progress, so
+queued runs never pile up.
+
+A run outliving its lease may overlap a newer run. The OHLCV sweeps check
+their token with `is_current` before writing and drop their results rather
+than overwrite the newer run's. Tasks decorated with `run_exclusively` are
+not fenced, their overlapped runs are only counted.
+
+Outcomes of the runs are counted per lock in the CrawlerRunMetrics hash.
+"""
+import functools
+import logging
+from typing import Dict, Optional
+
+from cryptorealtimecrawler.common.redis_db_connection import get_coins_redis_connection
+from cryptorealtimecrawler.exchange_webservice.crawler.redis_keys import (
+    Coin_REDIS_KEY, run_lock_key, run_lock_token_key
+)
+
+
+logger = logging.getLogger(__name__)
+
+RUN_STARTED = 'started'
+RUN_COMPLETED = 'completed'
+# Started while the lock was held, left to the run in progress
+RUN_SKIPPED = 'skipped'
+# Outlived its lease, a newer run may have started meanwhile
+RUN_OVERLAPPED = 'overlapped'
+
+
+class LeaseLock:
+    """Redis lease lock `name` with fencing tokens, held for at most `ttl` seconds"""
+
+    def __init__(self, redis_handler, name: str, ttl: float):
+        self.redis_handler = redis_handler
+        self.name = name
+        self.ttl = ttl
+        self.key = run_lock_key(name)
+        self.token_key = run_lock_token_key(name)
+
+    def acquire(self) -> Optional[int]:
+        """Take the lease, returns its fencing token or None when it's held"""
+        def take(pipe) -> Optional[int]:
+            if pipe.exists(self.key):
+                return None
+            token = int(pipe.get(self.token_key) or 0) + 1
+            pipe.multi()
+            pipe.set(self.token_key, token)
+            pipe.set(self.key, token, px=int(self.ttl * 1000))
+            return token
+
+        return self.redis_handler.transaction(take, self.key, self.token_key)
+
+    def _if_held(self, token: int, command) -> bool:
+        def run(pipe) -> bool:
+            if pipe.get(self.key) != str(token):
+                return False
+            pipe.multi()
+            command(pipe)
+            return True
+
+        return self.redis_handler.transaction(run, self.key)
+
+    def extend(self, token: int) -> bool:
+        """Renew the lease of `token` for another `ttl`, False when it was lost"""
+        return self._if_held(token, lambda pipe: pipe.pexpire(self.key, int(self.ttl * 1000)))
+
+    def release(self, token: int) -> bool:
+        """Give the lease of `token` up, False when it was already lost"""
+        return self._if_held(token, lambda pipe: pipe.delete(self.key))
+
+    def is_held(self) -> bool:
+        return bool(self.redis_handler.check_redis_key_existence(self.key))
+
+    def is_current(self, token: int) -> bool:
+        """Whether no newer lease than the one of `token` was granted, its holder may still write"""
+        return self.redis_handler.get(self.token_key) == token
+
+
+def record_run(name: str, outcome: str, redis_handler=None) -> None:
+    redis_handler = redis_handler or get_coins_redis_connection()
+    try:
+        redis_handler.hincrby(Coin_REDIS_KEY.CRAWLER_RUN_METRICS.value, f'{name}:{outcome}')
+    except Exception as e:
+        logger.error(f"Failed to record {name} run {outcome}: {e}")
+
+
+def get_run_metrics(redis_handler=None) -> Dict[str, Dict[str, int]]:
+    """Run counters by lock and outcome"""
+    redis_handler = redis_handler or get_coins_redis_connection()
+    metrics = {}
+    for field, count in redis_handler.hgetall(Coin_REDIS_KEY.CRAWLER_RUN_METRICS.value).items():
+        name, outcome = field.rsplit(':', 1)
+        metrics.setdefault(name, {})[outcome] = count
+    return metrics
+
+
+def run_exclusively(name: str, ttl: float):
+    """
+    Decorate a periodic task so that only one of its runs goes at a time,
+    runs starting meanwhile are skipped and return None. A run outliving its
+    lease still writes its results, keep `ttl` above the task's time limit.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            redis_handler = get_coins_redis_connection()
+            lock = LeaseLock(redis_handler, name, ttl)
+            token = lock.acquire()
+            if token is None:
+                logger.warning(f"Skipped {name} run, the previous one is still going")
+                record_run(name, RUN_SKIPPED, redis_handler)
+                return None
+
+            record_run(name, RUN_STARTED, redis_handler)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if lock.release(token):
+                    record_run(name, RUN_COMPLETED, redis_handler)
+                else:
+                    logger.warning(f"{name} run outlived its lease of {ttl}s")
+                    record_run(name, RUN_OVERLAPPED, redis_handler)
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+"""
+Concurrent sweeps of per coin exchange requests.
+
+Each exchange gets its own thread pool, sized to the concurrent requests it
+tolerates, and a token bucket holding its request rate. A coin is tried on
+its exchanges in order of preference, a failure moves it straight to the
+next one instead of sleeping. A slow or limited exchange only holds up the
+coins waiting on it, and the sweep stops starting requests once its time
+budget is spent.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second, in bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long to wait before it's available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """
+        Wait for a token, False without taking one when it wouldn't be
+        available before `deadline` (a time.monotonic() value).
+        """
+        wait = self._reserve()
+        if deadline is not None and time.monotonic() + wait > deadline:
+            with self._lock:
+                self._tokens += 1
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+class ExchangeSweep:
+    """
+    Run `fetch(exchange, symbol)` for many coins across `exchanges`, at most
+    `max_concurrent_requests` at a time and `rate_limits[exchange]` per
+    second on each exchange.
+    """
+
+    def __init__(
+        self,
+        exchanges: List[str],
+        rate_limits: Dict[str, float],
+        max_concurrent_requests: int,
+        time_budget: Optional[float] = None
+    ):
+        self.exchanges = exchanges
+        self.max_concurrent_requests = max_concurrent_requests
+        self.time_budget = time_budget
+        self.buckets = {
+            exchange: TokenBucket(rate_limits[exchange], capacity=max_concurrent_requests)
+            for exchange in exchanges
+        }
+
+    def run(
+        self,
+        coin_symbols: List[Tuple[str, List[Tuple[str, str]]]],
+        fetch: Callable[[str, str], Any],
+        on_result: Callable[[str, str, Any], None],
+        on_error: Optional[Callable[[str, str, Exception], None]] = None
+    ) -> Set[str]:
+        """
+        Fetch each coin of `coin_symbols` ([(coin, [(exchange, symbol), ...])])
+        from the first of its exchanges that succeeds and pass the result to
+        `on_result(coin, exchange, result)`, in the worker thread. Empty
+        results count as failures. Returns the coins no exchange served.
+        """
+        deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        failed = set()
+        pending = len(coin_symbols)
+        done = threading.Condition()
+        pools = {
+            exchange: ThreadPoolExecutor(
+                max_workers=self.max_concurrent_requests,
+                thread_name_prefix=f'sweep-{exchange}'
+            )
+            for exchange in self.exchanges
+        }
+
+        def finish(coin: str, succeeded: bool) -> None:
+            nonlocal pending
+            with done:
+                if not succeeded:
+                    failed.add(coin)
+                pending -= 1
+                done.notify_all()
+
+        def attempt(coin: str, listings: List[Tuple[str, str]]) -> None:
+            exchange, symbol = listings[0]
+            succeeded = handed_over = False
+            try:
+                try:
+                    if not self.buckets[exchange].acquire(deadline):
+                        raise TimeoutError('Sweep time budget spent')
+                    result = fetch(exchange, symbol)
+                    if not result:
+                        raise ValueError('Received empty response')
+                    on_result(coin, exchange, result)
+                    succeeded = True
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(coin, exchange, e)
+                    if len(listings) > 1 and (deadline is None or time.monotonic() < deadline):
+                        submit(coin, listings[1:])
+                        handed_over = True
+            finally:
+                # Even when on_error or submit raise, or run() would wait on the coin forever
+                if not handed_over:
+                    finish(coin, succeeded)
+
+        def submit(coin: str, listings: List[Tuple[str, str]]) -> None:
+            listings = [(exchange, symbol) for exchange, symbol in listings if exchange in pools]
+            if not listings:
+                finish(coin, succeeded=False)
+                return
+            pools[listings[0][0]].submit(attempt, coin, listings)
+
+        try:
+            for coin, listings in coin_symbols:
+                submit(coin, listings)
+            with done:
+                done.wait_for(lambda: pending == 0)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        return failed
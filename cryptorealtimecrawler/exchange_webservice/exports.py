@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import logging
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .models import TIMEFRAME_MODEL_MAP
+
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+except ImportError as e:  # Arrow exports are optional
+    logger.warning("Arrow exports are disabled, pyarrow could not be imported: %s", e)
+    pa = None
+
+
+EXPORT_FIELDS = ['crypto_id', 'timestamp', 'open', 'high', 'low', 'close', 'volume']
+EXPORT_CHUNK_SIZE = 5000
+
+# Arrow IPC stream end-of-stream marker (continuation token + zero length)
+ARROW_EOS = b'\xff\xff\xff\xff\x00\x00\x00\x00'
+
+
+def iter_candle_chunks(
+    timeframe: str,
+    crypto_ids: List[int],
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[List[Tuple]]:
+    """
+    Yield candles as lists of EXPORT_FIELDS tuples, `chunk_size` at a time.
+
+    Rows are read through a server-side cursor, so memory stays flat no
+    matter how long the exported history is.
+    """
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
+    if not model_class:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+
+    queryset = model_class.objects.filter(crypto_id__in=crypto_ids)
+    if start_time:
+        queryset = queryset.filter(timestamp__gte=start_time)
+    if end_time:
+        queryset = queryset.filter(timestamp__lte=end_time)
+
+    rows = (
+        queryset
+        .order_by('crypto_id', 'timestamp')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_csv(chunks: Iterable[List[Tuple]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_ndjson(chunks: Iterable[List[Tuple]]) -> Iterator[str]:
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+            for row in chunk
+        )
+
+
+def get_arrow_schema():
+    return pa.schema([
+        ('crypto_id', pa.int64()),
+        ('timestamp', pa.int64()),
+        ('open', pa.float64()),
+        ('high', pa.float64()),
+        ('low', pa.float64()),
+        ('close', pa.float64()),
+        ('volume', pa.float64()),
+    ])
+
+
+def stream_arrow(chunks: Iterable[List[Tuple]]) -> Iterator[bytes]:
+    """Encode candles as an Arrow IPC stream, one record batch per chunk"""
+    schema = get_arrow_schema()
+    yield schema.serialize().to_pybytes()
+
+    for chunk in chunks:
+        columns = list(zip(*chunk))
+        batch = pa.record_batch(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        )
+        yield batch.serialize().to_pybytes()
+
+    yield ARROW_EOS
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'arrow': (stream_arrow, 'application/vnd.apache.arrow.stream'),
+}
+
+
+def get_available_export_formats() -> List[str]:
+    return [
+        export_format for export_format in EXPORT_FORMATS
+        if export_format != 'arrow' or pa is not None
+    ]
@@ -0,0 +1,206 @@
+"""
+Technical indicators over candle closes: EMA, RSI (Wilder), MACD and
+Bollinger bands.
+
+IndicatorEngine folds one close at a time into a fixed size, JSON
+serializable state, so ingest updates cost the same whatever the history
+length. compute_indicators is the vectorized equivalent for backfills and
+returns the state to continue streaming from.
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+EMA_PERIODS = (12, 26, 50)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2
+
+# EMAs are seeded with the first close (pandas' adjust=False), so the MACD
+# EMAs are kept even when their period isn't in EMA_PERIODS
+_EMA_STATE_PERIODS = tuple(sorted(set(EMA_PERIODS) | {MACD_FAST, MACD_SLOW}))
+
+
+def _ema_alpha(period: int) -> float:
+    return 2 / (period + 1)
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+class IndicatorEngine:
+    """
+    Streaming indicators of a single series.
+
+    Values are only reported once their warm-up is over: `period` closes for
+    an EMA and Bollinger bands, `RSI_PERIOD` changes for RSI, the slow EMA
+    for MACD and the signal period on top of it for the signal line.
+    """
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.count = state.get('count', 0)
+        self.last_close = state.get('last_close')
+        self.ema = {int(period): value for period, value in state.get('ema', {}).items()}
+        self.macd_signal = state.get('macd_signal')
+        # Sums of gains and losses during the RSI warm-up, Wilder averages after it
+        self.rsi_gain = state.get('rsi_gain', 0.0)
+        self.rsi_loss = state.get('rsi_loss', 0.0)
+        self.closes = list(state.get('closes', []))
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'last_close': self.last_close,
+            'ema': {str(period): value for period, value in self.ema.items()},
+            'macd_signal': self.macd_signal,
+            'rsi_gain': self.rsi_gain,
+            'rsi_loss': self.rsi_loss,
+            'closes': self.closes,
+        }
+
+    def update(self, close: float) -> Dict[str, float]:
+        """Fold a closed candle's close into the state and return its indicators"""
+        if self.count == 0:
+            self.ema = {period: close for period in _EMA_STATE_PERIODS}
+        else:
+            self.ema = {
+                period: (1 - _ema_alpha(period)) * value + _ema_alpha(period) * close
+                for period, value in self.ema.items()
+            }
+
+        macd = self.ema[MACD_FAST] - self.ema[MACD_SLOW]
+        if self.macd_signal is None:
+            self.macd_signal = macd
+        else:
+            alpha = _ema_alpha(MACD_SIGNAL)
+            self.macd_signal = (1 - alpha) * self.macd_signal + alpha * macd
+
+        if self.last_close is not None:
+            change = close - self.last_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if self.count <= RSI_PERIOD:
+                self.rsi_gain += gain
+                self.rsi_loss += loss
+                if self.count == RSI_PERIOD:
+                    self.rsi_gain /= RSI_PERIOD
+                    self.rsi_loss /= RSI_PERIOD
+            else:
+                self.rsi_gain = (self.rsi_gain * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+                self.rsi_loss = (self.rsi_loss * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+
+        self.closes = (self.closes + [close])[-BOLLINGER_PERIOD:]
+        self.last_close = close
+        self.count += 1
+
+        return self._get_indicators(macd)
+
+    def peek(self, close: float) -> Dict[str, float]:
+        """Indicators of a still forming candle, the state is left untouched"""
+        return IndicatorEngine(self.to_state()).update(close)
+
+    def _get_indicators(self, macd: float) -> Dict[str, float]:
+        indicators = {
+            f'ema_{period}': self.ema[period]
+            for period in EMA_PERIODS
+            if self.count >= period
+        }
+        if self.count > RSI_PERIOD:
+            indicators[f'rsi_{RSI_PERIOD}'] = _rsi(self.rsi_gain, self.rsi_loss)
+        if self.count >= MACD_SLOW:
+            indicators['macd'] = macd
+        if self.count >= MACD_SLOW + MACD_SIGNAL - 1:
+            indicators['macd_signal'] = self.macd_signal
+            indicators['macd_histogram'] = macd - self.macd_signal
+        if self.count >= BOLLINGER_PERIOD:
+            middle = sum(self.closes) / BOLLINGER_PERIOD
+            std = math.sqrt(sum((close - middle) ** 2 for close in self.closes) / BOLLINGER_PERIOD)
+            indicators['bb_middle'] = middle
+            indicators['bb_upper'] = middle + BOLLINGER_STD * std
+            indicators['bb_lower'] = middle - BOLLINGER_STD * std
+        return indicators
+
+
+def compute_indicators(
+    closes: List[float],
+    state: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, float]], Dict[str, Any]]:
+    """
+    Vectorized indicators of a whole series, same values as feeding
+    IndicatorEngine one close at a time. Returns the indicators per close and
+    the engine state after the last one.
+
+    A non empty `state` is continued with the engine instead, vectorizing
+    only pays off for a series started from scratch.
+    """
+    if state and state.get('count'):
+        engine = IndicatorEngine(state)
+        return [engine.update(close) for close in closes], engine.to_state()
+
+    n = len(closes)
+    if n == 0:
+        return [], IndicatorEngine().to_state()
+
+    series = pd.Series(closes, dtype=float)
+    columns = {}
+
+    ema = {period: series.ewm(span=period, adjust=False).mean() for period in _EMA_STATE_PERIODS}
+    for period in EMA_PERIODS:
+        columns[f'ema_{period}'] = ema[period].where(series.index >= period - 1)
+
+    macd = ema[MACD_FAST] - ema[MACD_SLOW]
+    macd_signal = macd.ewm(span=MACD_SIGNAL, adjust=False).mean()
+    columns['macd'] = macd.where(series.index >= MACD_SLOW - 1)
+    columns['macd_signal'] = macd_signal.where(series.index >= MACD_SLOW + MACD_SIGNAL - 2)
+    columns['macd_histogram'] = (macd - macd_signal).where(series.index >= MACD_SLOW + MACD_SIGNAL - 2)
+
+    change = series.diff()
+    gains, losses = change.clip(lower=0), (-change).clip(lower=0)
+    avg_gain = pd.Series(np.nan, index=series.index)
+    avg_loss = pd.Series(np.nan, index=series.index)
+    if n > RSI_PERIOD:
+        # Wilder's smoothing seeded with the simple average of the first changes
+        for averages, values in ((avg_gain, gains), (avg_loss, losses)):
+            seeded = values.iloc[RSI_PERIOD:].copy()
+            seeded.iloc[0] = values.iloc[1:RSI_PERIOD + 1].mean()
+            averages.iloc[RSI_PERIOD:] = seeded.ewm(alpha=1 / RSI_PERIOD, adjust=False).mean()
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+        rsi[avg_loss == 0] = np.where(avg_gain[avg_loss == 0] > 0, 100.0, 50.0)
+        columns[f'rsi_{RSI_PERIOD}'] = rsi.where(series.index >= RSI_PERIOD)
+
+    rolling = series.rolling(BOLLINGER_PERIOD)
+    middle = rolling.mean()
+    std = rolling.std(ddof=0)
+    columns['bb_middle'] = middle
+    columns['bb_upper'] = middle + BOLLINGER_STD * std
+    columns['bb_lower'] = middle - BOLLINGER_STD * std
+
+    frame = pd.DataFrame(columns)
+    indicators = [
+        {key: value for key, value in row.items() if not math.isnan(value)}
+        for row in frame.to_dict('records')
+    ]
+
+    if n > RSI_PERIOD:
+        rsi_gain, rsi_loss = avg_gain.iloc[-1], avg_loss.iloc[-1]
+    else:
+        # Still warming up, the engine holds the sums of the changes so far
+        rsi_gain, rsi_loss = gains.iloc[1:].sum(), losses.iloc[1:].sum()
+
+    state = {
+        'count': n,
+        'last_close': float(series.iloc[-1]),
+        'ema': {str(period): float(ema[period].iloc[-1]) for period in _EMA_STATE_PERIODS},
+        'macd_signal': float(macd_signal.iloc[-1]),
+        'rsi_gain': float(rsi_gain),
+        'rsi_loss': float(rsi_loss),
+        'closes': series.iloc[-BOLLINGER_PERIOD:].tolist(),
+    }
+    return indicators, state
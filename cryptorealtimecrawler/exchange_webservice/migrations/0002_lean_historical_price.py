@@ -0,0 +1,236 @@
+# Generated by Django 4.0.7 on 2026-10-18 22:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+PRICE_MODELS = ['dailyprice', 'fiveminuteprice', 'fifteenminuteprice', 'onehourprice', 'fourhourprice']
+
+
+def remove_duplicate_prices(apps, schema_editor):
+    """Keep the last written row of each (crypto, timestamp), so the unique constraints can be added"""
+    for model_name in PRICE_MODELS:
+        model = apps.get_model('exchange_webservice', model_name)
+        kept_ids = model.objects.values('crypto_id', 'timestamp').annotate(kept_id=models.Max('id')).values('kept_id')
+        model.objects.exclude(id__in=kept_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exchange_webservice', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dailyprice',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='dailyprice',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='fifteenminuteprice',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='fifteenminuteprice',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='fiveminuteprice',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='fiveminuteprice',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='fourhourprice',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='fourhourprice',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='onehourprice',
+            name='created_at',
+        ),
+        migrations.RemoveField(
+            model_name='onehourprice',
+            name='updated_at',
+        ),
+        migrations.AlterField(
+            model_name='dailyprice',
+            name='close',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='dailyprice',
+            name='crypto',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s', to='exchange_webservice.crypto'),
+        ),
+        migrations.AlterField(
+            model_name='dailyprice',
+            name='high',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='dailyprice',
+            name='low',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='dailyprice',
+            name='open',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='dailyprice',
+            name='volume',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fifteenminuteprice',
+            name='close',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fifteenminuteprice',
+            name='crypto',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s', to='exchange_webservice.crypto'),
+        ),
+        migrations.AlterField(
+            model_name='fifteenminuteprice',
+            name='high',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fifteenminuteprice',
+            name='low',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fifteenminuteprice',
+            name='open',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fifteenminuteprice',
+            name='volume',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fiveminuteprice',
+            name='close',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fiveminuteprice',
+            name='crypto',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s', to='exchange_webservice.crypto'),
+        ),
+        migrations.AlterField(
+            model_name='fiveminuteprice',
+            name='high',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fiveminuteprice',
+            name='low',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fiveminuteprice',
+            name='open',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fiveminuteprice',
+            name='volume',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fourhourprice',
+            name='close',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fourhourprice',
+            name='crypto',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s', to='exchange_webservice.crypto'),
+        ),
+        migrations.AlterField(
+            model_name='fourhourprice',
+            name='high',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fourhourprice',
+            name='low',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fourhourprice',
+            name='open',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='fourhourprice',
+            name='volume',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='onehourprice',
+            name='close',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='onehourprice',
+            name='crypto',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s', to='exchange_webservice.crypto'),
+        ),
+        migrations.AlterField(
+            model_name='onehourprice',
+            name='high',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='onehourprice',
+            name='low',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='onehourprice',
+            name='open',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='onehourprice',
+            name='volume',
+            field=models.FloatField(),
+        ),
+        migrations.RunPython(remove_duplicate_prices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyprice',
+            constraint=models.UniqueConstraint(fields=('crypto', 'timestamp'), name='dailyprice_crypto_timestamp_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='fifteenminuteprice',
+            constraint=models.UniqueConstraint(fields=('crypto', 'timestamp'), name='fifteenminuteprice_crypto_timestamp_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='fiveminuteprice',
+            constraint=models.UniqueConstraint(fields=('crypto', 'timestamp'), name='fiveminuteprice_crypto_timestamp_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='fourhourprice',
+            constraint=models.UniqueConstraint(fields=('crypto', 'timestamp'), name='fourhourprice_crypto_timestamp_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='onehourprice',
+            constraint=models.UniqueConstraint(fields=('crypto', 'timestamp'), name='onehourprice_crypto_timestamp_uniq'),
+        ),
+    ]
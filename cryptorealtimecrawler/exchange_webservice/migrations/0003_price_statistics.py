@@ -0,0 +1,41 @@
+# Generated by Django 4.0.7 on 2026-10-18 22:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exchange_webservice', '0002_lean_historical_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('timeframe', models.CharField(max_length=10)),
+                ('window', models.CharField(default='all', max_length=10)),
+                ('max_price', models.FloatField(null=True)),
+                ('min_price', models.FloatField(null=True)),
+                ('avg_price', models.FloatField(null=True)),
+                ('max_volume', models.FloatField(null=True)),
+                ('min_volume', models.FloatField(null=True)),
+                ('avg_volume', models.FloatField(null=True)),
+                ('close_sum', models.FloatField(default=0)),
+                ('volume_sum', models.FloatField(default=0)),
+                ('candle_count', models.BigIntegerField(default=0)),
+                ('last_timestamp', models.BigIntegerField(null=True)),
+                ('crypto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_statistics', to='exchange_webservice.crypto')),
+            ],
+            options={
+                'verbose_name_plural': 'price statistics',
+                'db_table': 'price_statistics',
+                'unique_together': {('crypto', 'timeframe', 'window')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.7 on 2026-10-18 22:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exchange_webservice', '0003_price_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('timeframe', models.CharField(max_length=10)),
+                ('state', models.JSONField(default=dict)),
+                ('last_timestamp', models.BigIntegerField(null=True)),
+                ('crypto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indicator_states', to='exchange_webservice.crypto')),
+            ],
+            options={
+                'db_table': 'indicator_state',
+                'unique_together': {('crypto', 'timeframe')},
+            },
+        ),
+    ]
@@ -71,50 +71,112 @@ class CMCCryptoTag(BaseModel):
         unique_together = [['crypto', 'tag']]
 
 
-class HistoricalPrice(BaseModel):
-    """Abstract base model for historical price data"""
-    crypto = models.ForeignKey(Crypto, on_delete=models.CASCADE, related_name='%(class)s')
+class HistoricalPrice(models.Model):
+    """
+    Abstract base model for historical price data.
+
+    Candles are append-mostly market data, so they skip the BaseModel audit
+    columns and store OHLCV as native double precision instead of Decimal.
+    The (crypto, timestamp) unique constraint doubles as the lookup index.
+    """
+    # The unique constraint below already indexes crypto as its leading column
+    crypto = models.ForeignKey(Crypto, on_delete=models.CASCADE, related_name='%(class)s', db_index=False)
     timestamp = models.BigIntegerField()
-    open = models.DecimalField(max_digits=30, decimal_places=8)
-    close = models.DecimalField(max_digits=30, decimal_places=8)
-    high = models.DecimalField(max_digits=30, decimal_places=8)
-    low = models.DecimalField(max_digits=30, decimal_places=8)
-    volume = models.DecimalField(max_digits=30, decimal_places=8)
+    open = models.FloatField()
+    close = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    volume = models.FloatField()
     indicators = models.JSONField(null=True, blank=True)
 
     class Meta:
         abstract = True
-        unique_together = [['crypto', 'timestamp']]
-        indexes = [
-            models.Index(fields=['crypto', 'timestamp']),
+        constraints = [
+            models.UniqueConstraint(
+                fields=['crypto', 'timestamp'],
+                name='%(class)s_crypto_timestamp_uniq'
+            ),
         ]
 
 
 class DailyPrice(HistoricalPrice):
     """Daily historical price data"""
-    class Meta:
+    class Meta(HistoricalPrice.Meta):
         db_table = 'daily_price'
 
 
 class FiveMinutePrice(HistoricalPrice):
     """5-minute historical price data"""
-    class Meta:
+    class Meta(HistoricalPrice.Meta):
         db_table = 'five_minute_price'
 
 
 class FifteenMinutePrice(HistoricalPrice):
     """15-minute historical price data"""
-    class Meta:
+    class Meta(HistoricalPrice.Meta):
         db_table = 'fifteen_minute_price'
 
 
 class OneHourPrice(HistoricalPrice):
     """1-hour historical price data"""
-    class Meta:
+    class Meta(HistoricalPrice.Meta):
         db_table = 'one_hour_price'
 
 
 class FourHourPrice(HistoricalPrice):
     """4-hour historical price data"""
-    class Meta:
+    class Meta(HistoricalPrice.Meta):
         db_table = 'four_hour_price'
+
+
+class PriceStatistics(BaseModel):
+    """Price and volume statistics per crypto and timeframe, maintained at ingest"""
+    ALL_TIME = 'all'
+    WINDOWS = {
+        '24h': 24 * 60 * 60 * 1000,
+        '7d': 7 * 24 * 60 * 60 * 1000,
+        '30d': 30 * 24 * 60 * 60 * 1000,
+    }
+
+    crypto = models.ForeignKey(Crypto, on_delete=models.CASCADE, related_name='price_statistics')
+    timeframe = models.CharField(max_length=10)
+    window = models.CharField(max_length=10, default=ALL_TIME)
+    max_price = models.FloatField(null=True)
+    min_price = models.FloatField(null=True)
+    avg_price = models.FloatField(null=True)
+    max_volume = models.FloatField(null=True)
+    min_volume = models.FloatField(null=True)
+    avg_volume = models.FloatField(null=True)
+    # Running sums over closed candles, used to keep the all-time averages incremental
+    close_sum = models.FloatField(default=0)
+    volume_sum = models.FloatField(default=0)
+    candle_count = models.BigIntegerField(default=0)
+    last_timestamp = models.BigIntegerField(null=True)
+
+    class Meta:
+        db_table = 'price_statistics'
+        verbose_name_plural = 'price statistics'
+        unique_together = [['crypto', 'timeframe', 'window']]
+
+
+class IndicatorState(BaseModel):
+    """Rolling indicator state per crypto and timeframe, advanced as candles close"""
+    crypto = models.ForeignKey(Crypto, on_delete=models.CASCADE, related_name='indicator_states')
+    timeframe = models.CharField(max_length=10)
+    state = models.JSONField(default=dict)
+    # Timestamp of the last closed candle folded into the state
+    last_timestamp = models.BigIntegerField(null=True)
+
+    class Meta:
+        db_table = 'indicator_state'
+        unique_together = [['crypto', 'timeframe']]
+
+
+# Map timeframe to model class
+TIMEFRAME_MODEL_MAP = {
+    '5m': FiveMinutePrice,
+    '15m': FifteenMinutePrice,
+    '1h': OneHourPrice,
+    '4h': FourHourPrice,
+    '1d': DailyPrice
+}
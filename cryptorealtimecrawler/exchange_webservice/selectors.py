@@ -1,11 +1,26 @@
-from typing import List, Optional, Dict, Any
-from django.db.models import Q, F, Max, Min, Avg
+from typing import List, Optional, Dict, Any, Tuple, Callable
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Q, F, Max, Min, Avg, Case, When, Value, BooleanField, Window
+from django.db.models.functions import FirstValue
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from cryptorealtimecrawler.common.redis_db_connection import (
+    get_coins_redis_connection, get_async_coins_redis_connection
+)
+from cryptorealtimecrawler.common.utils import to_columns
+from cryptorealtimecrawler.utils.crawler.crawler import TIMEFRAME_DURATIONS, get_timeframe_duration_ms
+from .crawler.redis_keys import (
+    Coin_REDIS_KEY, TICKER_LEADERBOARD_TIMEFRAME, leaderboard_key, realtime_key, cross_exchange_key,
+    order_book_key, ohlcv_key, heikin_ashi_key
+)
+from .crawler.order_book_store import decode_order_book
 from .models import (
     Crypto, ExchangeSymbol, CMCMarketData, CMCTag, CMCCryptoTag,
-    DailyPrice, FiveMinutePrice, FifteenMinutePrice, OneHourPrice, FourHourPrice
+    PriceStatistics, TIMEFRAME_MODEL_MAP
 )
 
 
@@ -67,24 +82,14 @@ def get_exchange_symbols(
     return list(ExchangeSymbol.objects.filter(query))
 
 
-def get_historical_prices(
+def get_historical_prices_queryset(
     crypto: Crypto,
     timeframe: str,
     start_time: Optional[int] = None,
-    end_time: Optional[int] = None,
-    limit: int = 1000
-) -> List[Dict[str, Any]]:
-    """Get historical price data for a cryptocurrency"""
-    # Map timeframe to model class
-    timeframe_model_map = {
-        '5m': FiveMinutePrice,
-        '15m': FifteenMinutePrice,
-        '1h': OneHourPrice,
-        '4h': FourHourPrice,
-        '1d': DailyPrice
-    }
-    
-    model_class = timeframe_model_map.get(timeframe)
+    end_time: Optional[int] = None
+):
+    """Get the historical price queryset of a cryptocurrency, newest first"""
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
     if not model_class:
         raise ValueError(f"Invalid timeframe: {timeframe}")
     
@@ -94,7 +99,7 @@ def get_historical_prices(
     if end_time:
         query &= Q(timestamp__lte=end_time)
     
-    return list(
+    return (
         model_class.objects
         .filter(query)
         .order_by('-timestamp')
@@ -106,10 +111,122 @@ def get_historical_prices(
             'close',
             'volume',
             'indicators'
-        )[:limit]
+        )
     )
 
 
+def get_historical_prices(
+    crypto: Crypto,
+    timeframe: str,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    limit: int = 1000
+) -> List[Dict[str, Any]]:
+    """Get historical price data for a cryptocurrency"""
+    return list(get_historical_prices_queryset(crypto, timeframe, start_time, end_time)[:limit])
+
+
+HISTORICAL_PRICE_FIELDS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _get_recent_prices_from_redis(
+    cryptos: List[Crypto],
+    timeframe: str,
+    start_time: int
+) -> Optional[Dict[int, List[tuple]]]:
+    """
+    Get the candles since `start_time` of `cryptos` from the crawler's Redis
+    series with one pipeline, None unless they cover the range of every crypto.
+    """
+    keys = [ohlcv_key(crypto.name, timeframe) for crypto in cryptos]
+    series = get_coins_redis_connection().bulk_get(keys)
+
+    prices = {}
+    for crypto, key in zip(cryptos, keys):
+        candles = series.get(key)
+        if not isinstance(candles, list) or not candles or candles[0][0] > start_time:
+            return None
+        prices[crypto.cmc_id] = [
+            tuple(candle[:6])
+            for candle in reversed(candles)
+            if candle[0] >= start_time
+        ]
+    return prices
+
+
+def get_batch_historical_prices(
+    cryptos: List[Crypto],
+    timeframe: str,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    limit: int = 500,
+    columnar: bool = False
+) -> Dict[str, Any]:
+    """
+    Get the latest `limit` candles up to `end_time` of many cryptocurrencies.
+
+    Candles are grouped per crypto, newest first. The latest candles come
+    from Redis when the crawler's series cover them, anything else is read
+    with a single query bounded to `limit` candles per crypto.
+
+    With `columnar` the results are one set of parallel arrays with a
+    `crypto_id` column, built straight from the fetched tuples.
+
+    Indicators aren't served, the Redis series don't carry them and both
+    sources must return the same candles.
+    """
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
+    if not model_class:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+
+    duration_ms = get_timeframe_duration_ms(timeframe)
+    latest = end_time is None
+    if latest:
+        end_time = int(timezone.now().timestamp() * 1000)
+    # `limit` candles per crypto bound the range, so no series can crowd out the others
+    earliest = end_time - end_time % duration_ms - (limit - 1) * duration_ms
+    start_time = max(start_time or earliest, earliest)
+
+    prices = _get_recent_prices_from_redis(cryptos, timeframe, start_time) if latest else None
+    source = 'redis'
+    if prices is None:
+        source = 'database'
+        prices = {crypto.cmc_id: [] for crypto in cryptos}
+        rows = (
+            model_class.objects
+            .filter(
+                crypto_id__in=list(prices),
+                timestamp__gte=start_time,
+                timestamp__lte=end_time
+            )
+            .order_by('crypto_id', '-timestamp')
+            .values_list('crypto_id', *HISTORICAL_PRICE_FIELDS)
+        )
+        for crypto_id, *row in rows:
+            prices[crypto_id].append(row)
+
+    if columnar:
+        results = to_columns(
+            (
+                (crypto.cmc_id, *row)
+                for crypto in cryptos
+                for row in prices[crypto.cmc_id][:limit]
+            ),
+            ['crypto_id'] + HISTORICAL_PRICE_FIELDS
+        )
+    else:
+        results = [
+            {
+                'crypto_id': crypto.cmc_id,
+                'symbol': crypto.name,
+                'prices': [dict(zip(HISTORICAL_PRICE_FIELDS, row)) for row in prices[crypto.cmc_id][:limit]]
+            }
+            for crypto in cryptos
+        ]
+
+    return {'timeframe': timeframe, 'source': source, 'results': results}
+
+
 def get_price_statistics(
     crypto: Crypto,
     timeframe: str,
@@ -117,16 +234,7 @@ def get_price_statistics(
     end_time: Optional[int] = None
 ) -> Dict[str, Any]:
     """Get price statistics for a cryptocurrency"""
-    # Map timeframe to model class
-    timeframe_model_map = {
-        '5m': FiveMinutePrice,
-        '15m': FifteenMinutePrice,
-        '1h': OneHourPrice,
-        '4h': FourHourPrice,
-        '1d': DailyPrice
-    }
-    
-    model_class = timeframe_model_map.get(timeframe)
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
     if not model_class:
         raise ValueError(f"Invalid timeframe: {timeframe}")
     
@@ -159,6 +267,156 @@ def get_price_statistics(
     }
 
 
+def get_materialized_price_statistics(
+    crypto: Crypto,
+    timeframe: str,
+    window: str = PriceStatistics.ALL_TIME
+) -> Optional[Dict[str, Any]]:
+    """Get the price statistics maintained at ingest, None if not materialized yet"""
+    statistics = PriceStatistics.objects.filter(
+        crypto=crypto,
+        timeframe=timeframe,
+        window=window
+    ).first()
+    if statistics is None:
+        return None
+
+    return {
+        'price': {
+            'max': statistics.max_price,
+            'min': statistics.min_price,
+            'average': statistics.avg_price
+        },
+        'volume': {
+            'max': statistics.max_volume,
+            'min': statistics.min_volume,
+            'average': statistics.avg_volume
+        }
+    }
+
+
+def get_window_price_statistics(
+    crypto: Crypto,
+    timeframe: str,
+    window: str = PriceStatistics.ALL_TIME
+) -> Dict[str, Any]:
+    """Get the materialized statistics of a window, aggregated on the fly if missing"""
+    stats = get_materialized_price_statistics(crypto, timeframe, window)
+    if stats is not None:
+        return stats
+    
+    # Not ingested since the statistics were introduced
+    start_time = None
+    if window != PriceStatistics.ALL_TIME:
+        start_time = int(timezone.now().timestamp() * 1000) - PriceStatistics.WINDOWS[window]
+    return get_price_statistics(crypto, timeframe, start_time=start_time)
+
+
+# Leaderboards are kept for each crawled candle timeframe and the tickers' 24h
+LEADERBOARD_TIMEFRAMES = (*TIMEFRAME_DURATIONS, TICKER_LEADERBOARD_TIMEFRAME)
+
+
+def _parse_int(value: Any, name: str, minimum: int) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value}")
+    if number < minimum:
+        raise ValueError(f"Invalid {name}: {value}")
+    return number
+
+
+def _parse_positive_int(value: Any, name: str) -> int:
+    return _parse_int(value, name, minimum=1)
+
+
+def parse_leaderboard_params(timeframe: str, limit: Any) -> Tuple[str, int]:
+    """Validate a leaderboard request's timeframe and limit, raises ValueError"""
+    if timeframe not in LEADERBOARD_TIMEFRAMES:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+    return timeframe, _parse_positive_int(limit, 'limit')
+
+
+def parse_order_book_depth(depth: Optional[str]) -> Optional[int]:
+    """Validate an order book request's depth, None for the whole book, raises ValueError"""
+    return _parse_positive_int(depth, 'depth') if depth else None
+
+
+def parse_candles_limit(limit: Optional[str]) -> Optional[int]:
+    """Validate a candles request's limit, None for every stored candle, raises ValueError"""
+    return _parse_positive_int(limit, 'limit') if limit else None
+
+
+def parse_time_range(start_time: Optional[str], end_time: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Validate a request's start_time and end_time (ms), None when not given, raises ValueError"""
+    start_time = _parse_int(start_time, 'start_time', minimum=0) if start_time else None
+    end_time = _parse_int(end_time, 'end_time', minimum=0) if end_time else None
+    if start_time is not None and end_time is not None and start_time > end_time:
+        raise ValueError("start_time must not be after end_time")
+    return start_time, end_time
+
+
+def _volume_leaderboard_rows(leaderboard: List[tuple]) -> List[Dict[str, Any]]:
+    return [
+        {'crypto__name': name, 'total_volume': volume}
+        for name, volume in leaderboard
+    ]
+
+
+def get_volume_leaderboard(timeframe: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Get top cryptocurrencies by volume from the leaderboard maintained at ingest"""
+    leaderboard = get_coins_redis_connection().zrevrange(
+        leaderboard_key(Coin_REDIS_KEY.VOLUME_LEADERBOARD, timeframe), 0, limit - 1
+    )
+    return _volume_leaderboard_rows(leaderboard)
+
+
+async def aget_volume_leaderboard(timeframe: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Async get_volume_leaderboard"""
+    leaderboard = await get_async_coins_redis_connection().zrevrange(
+        leaderboard_key(Coin_REDIS_KEY.VOLUME_LEADERBOARD, timeframe), 0, limit - 1
+    )
+    return _volume_leaderboard_rows(leaderboard)
+
+
+def _get_top_by_volume_from_database(timeframe: str, limit: int) -> List[Dict[str, Any]]:
+    # Only the candle timeframes stored in the database can be computed there
+    if timeframe not in TIMEFRAME_MODEL_MAP:
+        return []
+    return [
+        {'crypto__name': row['crypto__name'], 'total_volume': row['total_volume']}
+        for row in get_top_cryptos_by_volume(timeframe, limit)
+    ]
+
+
+def get_top_by_volume(timeframe: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Get top cryptocurrencies by volume, from the database while the leaderboard isn't built yet"""
+    return get_volume_leaderboard(timeframe, limit) or _get_top_by_volume_from_database(timeframe, limit)
+
+
+async def aget_top_by_volume(timeframe: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Async get_top_by_volume"""
+    return (
+        await aget_volume_leaderboard(timeframe, limit)
+        or await sync_to_async(_get_top_by_volume_from_database)(timeframe, limit)
+    )
+
+
+def get_price_change_leaderboard(timeframe: str, limit: int = 10, gainers: bool = True) -> List[Dict[str, Any]]:
+    """Get top gainers (or losers) from the leaderboard maintained at ingest"""
+    redis_handler = get_coins_redis_connection()
+    key = leaderboard_key(Coin_REDIS_KEY.CHANGE_LEADERBOARD, timeframe)
+    if gainers:
+        leaderboard = redis_handler.zrevrange(key, 0, limit - 1)
+    else:
+        leaderboard = redis_handler.zrange(key, 0, limit - 1)
+    
+    return [
+        {'crypto__name': name, 'change': change}
+        for name, change in leaderboard
+    ]
+
+
 def get_top_cryptos_by_volume(
     timeframe: str,
     limit: int = 10,
@@ -166,16 +424,7 @@ def get_top_cryptos_by_volume(
     end_time: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """Get top cryptocurrencies by trading volume"""
-    # Map timeframe to model class
-    timeframe_model_map = {
-        '5m': FiveMinutePrice,
-        '15m': FifteenMinutePrice,
-        '1h': OneHourPrice,
-        '4h': FourHourPrice,
-        '1d': DailyPrice
-    }
-    
-    model_class = timeframe_model_map.get(timeframe)
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
     if not model_class:
         raise ValueError(f"Invalid timeframe: {timeframe}")
     
@@ -194,40 +443,282 @@ def get_top_cryptos_by_volume(
     )
 
 
+def _price_change(first_close: Optional[float], last_close: float) -> Optional[float]:
+    if not first_close:
+        return None
+    return ((last_close - first_close) / first_close) * 100
+
+
+def _get_bulk_price_changes_window(
+    queryset,
+    period_starts: Dict[int, int]
+) -> List[Dict[str, Any]]:
+    """
+    Compute price changes with one window function query.
+
+    Each crypto is partitioned by whether a candle falls inside the period,
+    so FIRST_VALUE over the in-period partition is the period's first close.
+    DISTINCT ON then keeps only the latest candle of every crypto, which sits
+    in all of its in-period partitions.
+    """
+    annotations = {
+        f'first_close_{period}': Window(
+            expression=FirstValue('close'),
+            partition_by=[
+                F('crypto_id'),
+                Case(
+                    When(timestamp__gte=start, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField()
+                )
+            ],
+            order_by=F('timestamp').asc()
+        )
+        for period, start in period_starts.items()
+    }
+
+    rows = (
+        queryset
+        .annotate(**annotations)
+        .order_by('crypto_id', '-timestamp')
+        .distinct('crypto_id')
+        .values('crypto_id', 'crypto__name', 'timestamp', 'close', *annotations)
+    )
+
+    results = []
+    for row in rows:
+        changes = {}
+        for period, start in period_starts.items():
+            if row['timestamp'] >= start:
+                change = _price_change(row[f'first_close_{period}'], row['close'])
+                if change is not None:
+                    changes[f'{period}d'] = change
+        results.append({'cmc_id': row['crypto_id'], 'name': row['crypto__name'], 'changes': changes})
+
+    return results
+
+
+def _get_bulk_price_changes_in_memory(
+    queryset,
+    period_starts: Dict[int, int]
+) -> List[Dict[str, Any]]:
+    """
+    Compute price changes from the close arrays of all cryptos at once, for
+    databases without DISTINCT ON.
+    """
+    rows = list(
+        queryset
+        .order_by('crypto_id', 'timestamp')
+        .values_list('crypto_id', 'crypto__name', 'timestamp', 'close')
+    )
+    if not rows:
+        return []
+
+    crypto_ids, names, timestamps, closes = zip(*rows)
+    crypto_ids = np.asarray(crypto_ids, dtype=np.int64)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    closes = np.asarray(closes, dtype=np.float64)
+
+    group_starts = np.flatnonzero(np.r_[True, crypto_ids[1:] != crypto_ids[:-1]])
+    group_ends = np.r_[group_starts[1:], len(crypto_ids)] - 1
+    last_closes = closes[group_ends]
+
+    # (crypto, timestamp) packed into one sorted key, so the first in-period
+    # candle of every crypto is a single searchsorted call
+    key_scale = np.int64(10 ** 13)
+    keys = crypto_ids * key_scale + timestamps
+
+    period_changes = {}
+    for period, start in period_starts.items():
+        first_index = np.searchsorted(keys, crypto_ids[group_starts] * key_scale + start)
+        has_candles = first_index <= group_ends
+        first_closes = closes[np.minimum(first_index, group_ends)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            changes = (last_closes - first_closes) / first_closes * 100
+        period_changes[period] = np.where(has_candles & (first_closes != 0), changes, np.nan)
+
+    results = []
+    for group, row_index in enumerate(group_starts):
+        changes = {
+            f'{period}d': float(values[group])
+            for period, values in period_changes.items()
+            if not np.isnan(values[group])
+        }
+        results.append({'cmc_id': int(crypto_ids[row_index]), 'name': names[row_index], 'changes': changes})
+
+    return results
+
+
+def get_bulk_price_changes(
+    timeframe: str,
+    periods: List[int] = [1, 7, 30],
+    crypto_ids: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    """Get price changes of many (or all) cryptocurrencies in a single query"""
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
+    if not model_class:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+    
+    end_time = int(timezone.now().timestamp() * 1000)
+    # Convert days to milliseconds
+    period_starts = {period: end_time - (period * 24 * 60 * 60 * 1000) for period in periods}
+    if not period_starts:
+        return []
+    
+    queryset = model_class.objects.filter(
+        timestamp__gte=min(period_starts.values()),
+        timestamp__lte=end_time
+    )
+    if crypto_ids is not None:
+        queryset = queryset.filter(crypto_id__in=crypto_ids)
+    
+    if connection.features.can_distinct_on_fields:
+        return _get_bulk_price_changes_window(queryset, period_starts)
+    return _get_bulk_price_changes_in_memory(queryset, period_starts)
+
+
 def get_crypto_price_changes(
     crypto: Crypto,
     timeframe: str,
     periods: List[int] = [1, 7, 30]
 ) -> Dict[str, float]:
     """Get price changes for different time periods"""
-    # Map timeframe to model class
-    timeframe_model_map = {
-        '5m': FiveMinutePrice,
-        '15m': FifteenMinutePrice,
-        '1h': OneHourPrice,
-        '4h': FourHourPrice,
-        '1d': DailyPrice
-    }
+    results = get_bulk_price_changes(timeframe, periods, crypto_ids=[crypto.cmc_id])
+    if not results:
+        return {}
     
-    model_class = timeframe_model_map.get(timeframe)
-    if not model_class:
-        raise ValueError(f"Invalid timeframe: {timeframe}")
-    
-    changes = {}
-    for period in periods:
-        end_time = int(timezone.now().timestamp() * 1000)
-        start_time = end_time - (period * 24 * 60 * 60 * 1000)  # Convert days to milliseconds
-        
-        prices = model_class.objects.filter(
-            crypto=crypto,
-            timestamp__gte=start_time,
-            timestamp__lte=end_time
-        ).order_by('timestamp')
-        
-        if prices.exists():
-            first_price = prices.first().close
-            last_price = prices.last().close
-            change = ((last_price - first_price) / first_price) * 100
-            changes[f'{period}d'] = change
-    
-    return changes 
\ No newline at end of file
+    return results[0]['changes']
+
+
+# The Redis reads below come in sync and async flavours, sharing everything but the I/O:
+# the keys to read and how the read values are shaped
+_TICKERS = (Coin_REDIS_KEY.REAL_TIME_DATA.value, realtime_key)
+_SPREADS = (Coin_REDIS_KEY.CROSS_EXCHANGE_DATA.value, cross_exchange_key)
+
+
+def _per_coin_keys(source: Tuple[str, Callable[[str], str]], coins: Optional[List[str]]) -> List[str]:
+    """Keys holding `source` of `coins`: its all coins snapshot, or each coin's own key"""
+    all_coins_key, coin_key = source
+    return [all_coins_key] if coins is None else [coin_key(coin) for coin in coins]
+
+
+def _per_coin_values(
+    source: Tuple[str, Callable[[str], str]],
+    coins: Optional[List[str]],
+    values: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    all_coins_key, coin_key = source
+    if coins is None:
+        return values.get(all_coins_key, {})
+    return {
+        coin: values[coin_key(coin)]
+        for coin in coins
+        if coin_key(coin) in values
+    }
+
+
+def _decode_stored_order_book(values: Dict[str, Any], coin: str, depth: Optional[int]) -> Optional[Dict[str, Any]]:
+    order_book = values.get(order_book_key(coin))
+    if order_book is None:
+        return None
+    return decode_order_book(order_book, depth)
+
+
+def _order_book_index(index: List[tuple]) -> Dict[str, int]:
+    return {coin: int(stored_at) for coin, stored_at in index}
+
+
+def _candles_key(coin: str, timeframe: str, heikin_ashi: bool) -> str:
+    return heikin_ashi_key(coin, timeframe) if heikin_ashi else ohlcv_key(coin, timeframe)
+
+
+def _latest_candles(candles: Optional[List[List]], limit: Optional[int]) -> Optional[List[List]]:
+    if candles is None:
+        return None
+    return candles[-limit:] if limit else candles
+
+
+def get_realtime_tickers(coins: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Get the latest tickers of the given coins (or all coins) from Redis"""
+    keys = _per_coin_keys(_TICKERS, coins)
+    return _per_coin_values(_TICKERS, coins, get_coins_redis_connection().bulk_get(keys))
+
+
+def get_realtime_spreads(coins: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Get the latest cross-exchange spreads of the given coins (or all coins) from Redis"""
+    keys = _per_coin_keys(_SPREADS, coins)
+    return _per_coin_values(_SPREADS, coins, get_coins_redis_connection().bulk_get(keys))
+
+
+def get_realtime_order_book(coin: str, depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Get the latest order book of a coin from Redis, optionally cut to `depth` levels per side"""
+    values = get_coins_redis_connection().bulk_get([order_book_key(coin)])
+    return _decode_stored_order_book(values, coin, depth)
+
+
+def get_order_book_index() -> Dict[str, int]:
+    """Get the coins with a stored order book and when it was stored (ms), freshest first"""
+    return _order_book_index(get_coins_redis_connection().zrevrange(Coin_REDIS_KEY.ORDER_BOOK_INDEX.value, 0, -1))
+
+
+def get_order_book_metrics(coins: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Get the latest order book metrics of the given coins (or all coins) from Redis"""
+    key = Coin_REDIS_KEY.ORDER_BOOK_METRICS.value
+    if coins is None:
+        return get_coins_redis_connection().hgetall(key)
+    return get_coins_redis_connection().hmget(key, coins)
+
+
+def get_latest_candles(
+    coin: str,
+    timeframe: str,
+    limit: Optional[int] = None,
+    heikin_ashi: bool = False
+) -> Optional[List[List]]:
+    """Get the latest crawled (or Heikin-Ashi) candles of a coin from Redis, oldest first"""
+    key = _candles_key(coin, timeframe, heikin_ashi)
+    return _latest_candles(get_coins_redis_connection().bulk_get([key]).get(key), limit)
+
+
+async def aget_realtime_tickers(coins: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Async get_realtime_tickers"""
+    keys = _per_coin_keys(_TICKERS, coins)
+    return _per_coin_values(_TICKERS, coins, await get_async_coins_redis_connection().bulk_get(keys))
+
+
+async def aget_realtime_spreads(coins: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Async get_realtime_spreads"""
+    keys = _per_coin_keys(_SPREADS, coins)
+    return _per_coin_values(_SPREADS, coins, await get_async_coins_redis_connection().bulk_get(keys))
+
+
+async def aget_realtime_order_book(coin: str, depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Async get_realtime_order_book"""
+    values = await get_async_coins_redis_connection().bulk_get([order_book_key(coin)])
+    return _decode_stored_order_book(values, coin, depth)
+
+
+async def aget_order_book_index() -> Dict[str, int]:
+    """Async get_order_book_index"""
+    return _order_book_index(
+        await get_async_coins_redis_connection().zrevrange(Coin_REDIS_KEY.ORDER_BOOK_INDEX.value, 0, -1)
+    )
+
+
+async def aget_order_book_metrics(coins: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Async get_order_book_metrics"""
+    key = Coin_REDIS_KEY.ORDER_BOOK_METRICS.value
+    if coins is None:
+        return await get_async_coins_redis_connection().hgetall(key)
+    return await get_async_coins_redis_connection().hmget(key, coins)
+
+
+async def aget_latest_candles(
+    coin: str,
+    timeframe: str,
+    limit: Optional[int] = None,
+    heikin_ashi: bool = False
+) -> Optional[List[List]]:
+    """Async get_latest_candles"""
+    key = _candles_key(coin, timeframe, heikin_ashi)
+    return _latest_candles((await get_async_coins_redis_connection().bulk_get([key])).get(key), limit)
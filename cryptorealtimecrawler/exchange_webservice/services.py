@@ -1,15 +1,27 @@
+import time
 from typing import List, Optional, Dict, Any
+
+import pandas as pd
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q, Max, Min, Sum, Count
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 from .models import (
     Crypto, ExchangeSymbol, CMCMarketData, CMCTag, CMCCryptoTag,
-    DailyPrice, FiveMinutePrice, FifteenMinutePrice, OneHourPrice, FourHourPrice
+    PriceStatistics, IndicatorState, TIMEFRAME_MODEL_MAP
 )
+from .indicators import IndicatorEngine, compute_indicators
 from .selectors import (
     get_crypto, get_crypto_list, get_crypto_market_data,
     get_crypto_tags, get_exchange_symbols
 )
+from cryptorealtimecrawler.utils.crawler.crawler import get_timeframe_duration_ms
+from .versioning import (
+    CRYPTO_SCOPE, EXCHANGE_SYMBOL_SCOPE, MARKET_DATA_SCOPE, TAG_SCOPE,
+    bump_versions, historical_price_scope
+)
 
 
 @transaction.atomic
@@ -20,6 +32,7 @@ def create_crypto(
     is_main: bool = False
 ) -> Crypto:
     """Create a new cryptocurrency"""
+    bump_versions(CRYPTO_SCOPE)
     return Crypto.objects.create(
         name=name,
         full_name=full_name,
@@ -44,6 +57,7 @@ def update_crypto(
         crypto.is_main = is_main
     
     crypto.save()
+    bump_versions(CRYPTO_SCOPE)
     return crypto
 
 
@@ -59,6 +73,7 @@ def create_cmc_market_data(
     last_updated: Optional[str] = None
 ) -> CMCMarketData:
     """Create CMC market data for a cryptocurrency"""
+    bump_versions(MARKET_DATA_SCOPE)
     return CMCMarketData.objects.create(
         crypto=crypto,
         cmc_rank=cmc_rank,
@@ -99,6 +114,7 @@ def update_cmc_market_data(
         market_data.last_updated = last_updated
     
     market_data.save()
+    bump_versions(MARKET_DATA_SCOPE)
     return market_data
 
 
@@ -110,6 +126,7 @@ def create_exchange_symbol(
     is_active: bool = True
 ) -> ExchangeSymbol:
     """Create a new exchange symbol"""
+    bump_versions(EXCHANGE_SYMBOL_SCOPE)
     return ExchangeSymbol.objects.create(
         crypto=crypto,
         exchange=exchange,
@@ -131,18 +148,21 @@ def update_exchange_symbol(
         exchange_symbol.is_active = is_active
     
     exchange_symbol.save()
+    bump_versions(EXCHANGE_SYMBOL_SCOPE)
     return exchange_symbol
 
 
 @transaction.atomic
 def create_cmc_tag(name: str) -> CMCTag:
     """Create a new CMC tag"""
+    bump_versions(TAG_SCOPE)
     return CMCTag.objects.create(name=name)
 
 
 @transaction.atomic
 def add_crypto_tag(crypto: Crypto, tag: CMCTag) -> CMCCryptoTag:
     """Add a tag to a cryptocurrency"""
+    bump_versions(TAG_SCOPE)
     return CMCCryptoTag.objects.create(crypto=crypto, tag=tag)
 
 
@@ -150,6 +170,7 @@ def add_crypto_tag(crypto: Crypto, tag: CMCTag) -> CMCCryptoTag:
 def remove_crypto_tag(crypto: Crypto, tag: CMCTag) -> None:
     """Remove a tag from a cryptocurrency"""
     CMCCryptoTag.objects.filter(crypto=crypto, tag=tag).delete()
+    bump_versions(TAG_SCOPE)
 
 
 @transaction.atomic
@@ -165,16 +186,7 @@ def save_historical_price(
     indicators: Optional[Dict[str, Any]] = None
 ) -> None:
     """Save historical price data"""
-    # Map timeframe to model class
-    timeframe_model_map = {
-        '5m': FiveMinutePrice,
-        '15m': FifteenMinutePrice,
-        '1h': OneHourPrice,
-        '4h': FourHourPrice,
-        '1d': DailyPrice
-    }
-    
-    model_class = timeframe_model_map.get(timeframe)
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
     if not model_class:
         raise ValueError(f"Invalid timeframe: {timeframe}")
     
@@ -188,6 +200,7 @@ def save_historical_price(
         volume=volume,
         indicators=indicators
     )
+    bump_versions(historical_price_scope(crypto.pk, timeframe))
 
 
 @transaction.atomic
@@ -197,25 +210,29 @@ def bulk_save_historical_prices(
     price_data: List[Dict[str, Any]]
 ) -> None:
     """Bulk save historical price data"""
-    # Map timeframe to model class
-    timeframe_model_map = {
-        '5m': FiveMinutePrice,
-        '15m': FifteenMinutePrice,
-        '1h': OneHourPrice,
-        '4h': FourHourPrice,
-        '1d': DailyPrice
-    }
-    
-    model_class = timeframe_model_map.get(timeframe)
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
     if not model_class:
         raise ValueError(f"Invalid timeframe: {timeframe}")
     
     # Delete existing data for this crypto and timeframe
     model_class.objects.filter(crypto=crypto).delete()
     
+    # The whole history is replaced, so the indicators are computed over it
+    # in one pass and the streaming state restarts from its last candle
+    price_data = sorted(price_data, key=lambda data: data['timestamp'])
+    indicators, indicator_state = compute_indicators([data['close'] for data in price_data])
+    IndicatorState.objects.update_or_create(
+        crypto=crypto,
+        timeframe=timeframe,
+        defaults={
+            'state': indicator_state,
+            'last_timestamp': price_data[-1]['timestamp'] if price_data else None
+        }
+    )
+
     # Prepare data for bulk create
     records = []
-    for data in price_data:
+    for data, data_indicators in zip(price_data, indicators):
         records.append(
             model_class(
                 crypto=crypto,
@@ -225,10 +242,431 @@ def bulk_save_historical_prices(
                 low=data['low'],
                 close=data['close'],
                 volume=data['volume'],
-                indicators=data.get('indicators')
+                indicators=data.get('indicators') or data_indicators
             )
         )
     
     # Bulk create records
     if records:
-        model_class.objects.bulk_create(records, batch_size=1000) 
\ No newline at end of file
+        model_class.objects.bulk_create(records, batch_size=1000)
+    
+    # The whole history was replaced, so the statistics start over
+    PriceStatistics.objects.filter(crypto=crypto, timeframe=timeframe).delete()
+    update_price_statistics(
+        crypto,
+        timeframe,
+        [
+            [data['timestamp'], data['open'], data['high'], data['low'], data['close'], data['volume']]
+            for data in price_data
+        ],
+        has_open_candle=False
+    )
+    bump_versions(historical_price_scope(crypto.pk, timeframe))
+
+
+def _seed_all_time_statistics(statistics: PriceStatistics, model_class, before: int) -> None:
+    """Initialize all-time statistics from the candles already stored before `before`"""
+    stats = model_class.objects.filter(
+        crypto=statistics.crypto,
+        timestamp__lt=before
+    ).aggregate(
+        max_price=Max('high'),
+        min_price=Min('low'),
+        max_volume=Max('volume'),
+        min_volume=Min('volume'),
+        close_sum=Sum('close'),
+        volume_sum=Sum('volume'),
+        candle_count=Count('id'),
+        last_timestamp=Max('timestamp')
+    )
+    statistics.max_price = stats['max_price']
+    statistics.min_price = stats['min_price']
+    statistics.max_volume = stats['max_volume']
+    statistics.min_volume = stats['min_volume']
+    statistics.close_sum = stats['close_sum'] or 0
+    statistics.volume_sum = stats['volume_sum'] or 0
+    statistics.candle_count = stats['candle_count']
+    statistics.last_timestamp = stats['last_timestamp']
+
+
+def _update_all_time_statistics(
+    statistics: PriceStatistics,
+    ohlcv_data: List[List],
+    has_open_candle: bool
+) -> None:
+    """Fold freshly ingested candles into the all-time statistics"""
+    highs = [data[2] for data in ohlcv_data]
+    lows = [data[3] for data in ohlcv_data]
+
+    # A forming candle's high only rises and its low only falls, so it is
+    # safe to fold into max/min on every ingest. Sums, counts and the volume
+    # minimum only take candles once they are closed.
+    closed = ohlcv_data[:-1] if has_open_candle else ohlcv_data
+    new_closed = [
+        data for data in closed
+        if statistics.last_timestamp is None or data[0] > statistics.last_timestamp
+    ]
+    max_volume_candidates = [data[5] for data in ohlcv_data]
+
+    statistics.max_price = max([value for value in [statistics.max_price, *highs] if value is not None])
+    statistics.min_price = min([value for value in [statistics.min_price, *lows] if value is not None])
+    statistics.max_volume = max(
+        [value for value in [statistics.max_volume, *max_volume_candidates] if value is not None]
+    )
+    if new_closed:
+        volumes = [data[5] for data in new_closed]
+        statistics.min_volume = min(
+            [value for value in [statistics.min_volume, *volumes] if value is not None]
+        )
+        statistics.close_sum += sum(data[4] for data in new_closed)
+        statistics.volume_sum += sum(volumes)
+        statistics.candle_count += len(new_closed)
+        statistics.last_timestamp = new_closed[-1][0]
+
+    if statistics.candle_count:
+        statistics.avg_price = statistics.close_sum / statistics.candle_count
+        statistics.avg_volume = statistics.volume_sum / statistics.candle_count
+
+
+@transaction.atomic
+def update_price_statistics(
+    crypto: Crypto,
+    timeframe: str,
+    ohlcv_data: List[List],
+    has_open_candle: bool = True
+) -> None:
+    """
+    Update the materialized price statistics of a crypto after ingesting
+    `ohlcv_data` ([timestamp, open, high, low, close, volume] rows, oldest
+    first).
+
+    All-time statistics are folded in incrementally. The rolling windows are
+    refreshed with a single aggregate bounded by the longest window, so the
+    cost does not grow with the table.
+    """
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
+    if not model_class:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+
+    ohlcv_data = sorted((data for data in ohlcv_data if len(data) >= 6), key=lambda data: data[0])
+    if not ohlcv_data:
+        return
+
+    statistics = {
+        item.window: item
+        for item in PriceStatistics.objects.select_for_update().filter(crypto=crypto, timeframe=timeframe)
+    }
+
+    all_time = statistics.get(PriceStatistics.ALL_TIME)
+    if all_time is None:
+        all_time = PriceStatistics(crypto=crypto, timeframe=timeframe, window=PriceStatistics.ALL_TIME)
+        _seed_all_time_statistics(all_time, model_class, before=ohlcv_data[0][0])
+        statistics[PriceStatistics.ALL_TIME] = all_time
+    _update_all_time_statistics(all_time, ohlcv_data, has_open_candle)
+
+    now = int(timezone.now().timestamp() * 1000)
+    aggregates = {}
+    for window, duration in PriceStatistics.WINDOWS.items():
+        window_filter = Q(timestamp__gte=now - duration)
+        aggregates[f'{window}_max_price'] = Max('high', filter=window_filter)
+        aggregates[f'{window}_min_price'] = Min('low', filter=window_filter)
+        aggregates[f'{window}_close_sum'] = Sum('close', filter=window_filter)
+        aggregates[f'{window}_max_volume'] = Max('volume', filter=window_filter)
+        aggregates[f'{window}_min_volume'] = Min('volume', filter=window_filter)
+        aggregates[f'{window}_volume_sum'] = Sum('volume', filter=window_filter)
+        aggregates[f'{window}_candle_count'] = Count('id', filter=window_filter)
+    window_stats = model_class.objects.filter(
+        crypto=crypto,
+        timestamp__gte=now - max(PriceStatistics.WINDOWS.values())
+    ).aggregate(**aggregates)
+
+    for window in PriceStatistics.WINDOWS:
+        item = statistics.get(window)
+        if item is None:
+            item = PriceStatistics(crypto=crypto, timeframe=timeframe, window=window)
+            statistics[window] = item
+
+        item.candle_count = window_stats[f'{window}_candle_count']
+        item.close_sum = window_stats[f'{window}_close_sum'] or 0
+        item.volume_sum = window_stats[f'{window}_volume_sum'] or 0
+        item.max_price = window_stats[f'{window}_max_price']
+        item.min_price = window_stats[f'{window}_min_price']
+        item.max_volume = window_stats[f'{window}_max_volume']
+        item.min_volume = window_stats[f'{window}_min_volume']
+        item.avg_price = item.close_sum / item.candle_count if item.candle_count else None
+        item.avg_volume = item.volume_sum / item.candle_count if item.candle_count else None
+        item.last_timestamp = ohlcv_data[-1][0]
+
+    for item in statistics.values():
+        item.save()
+
+
+def _rebuild_indicator_state(crypto: Crypto, timeframe: str, model_class, before: int) -> IndicatorState:
+    """Recompute the indicator state from the candles already stored before `before`"""
+    rows = list(
+        model_class.objects
+        .filter(crypto=crypto, timestamp__lt=before)
+        .order_by('timestamp')
+        .values_list('timestamp', 'close')
+    )
+    _, state = compute_indicators([close for _, close in rows])
+    indicator_state, _ = IndicatorState.objects.update_or_create(
+        crypto=crypto,
+        timeframe=timeframe,
+        defaults={'state': state, 'last_timestamp': rows[-1][0] if rows else None}
+    )
+    return indicator_state
+
+
+@transaction.atomic
+def update_indicators(
+    crypto: Crypto,
+    timeframe: str,
+    ohlcv_data: List[List],
+    has_open_candle: bool = True
+) -> Dict[int, Dict[str, float]]:
+    """
+    Advance the streaming indicators of a crypto over freshly fetched
+    `ohlcv_data` and return the indicators of each of its candles, by
+    timestamp.
+
+    Only candles closed since the last call are folded into the stored state,
+    the forming candle gets a preview that leaves the state untouched.
+    Candles folded earlier keep the indicators already stored for them, so
+    this must run before the fetched window replaces them. The state is
+    rebuilt from the stored history when missing or when candles were
+    skipped since it was last advanced.
+    """
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
+    if not model_class:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+
+    ohlcv_data = sorted((data for data in ohlcv_data if len(data) >= 6), key=lambda data: data[0])
+    if not ohlcv_data:
+        return {}
+
+    closed = ohlcv_data[:-1] if has_open_candle else ohlcv_data
+    indicator_state = IndicatorState.objects.select_for_update().filter(crypto=crypto, timeframe=timeframe).first()
+
+    def get_new_closed(last_timestamp):
+        return [data for data in closed if last_timestamp is None or data[0] > last_timestamp]
+
+    new_closed = get_new_closed(indicator_state.last_timestamp if indicator_state else None)
+    is_gap = (
+        indicator_state is not None
+        and indicator_state.last_timestamp is not None
+        and new_closed
+        and new_closed[0][0] != indicator_state.last_timestamp + get_timeframe_duration_ms(timeframe)
+    )
+    if indicator_state is None or is_gap:
+        indicator_state = _rebuild_indicator_state(crypto, timeframe, model_class, before=ohlcv_data[0][0])
+        new_closed = get_new_closed(indicator_state.last_timestamp)
+
+    indicators = {}
+    if indicator_state.last_timestamp is not None:
+        indicators = dict(
+            model_class.objects.filter(
+                crypto=crypto,
+                timestamp__gte=ohlcv_data[0][0],
+                timestamp__lte=indicator_state.last_timestamp
+            ).values_list('timestamp', 'indicators')
+        )
+
+    engine = IndicatorEngine(indicator_state.state)
+    for data in new_closed:
+        indicators[data[0]] = engine.update(data[4])
+        indicator_state.last_timestamp = data[0]
+
+    if has_open_candle:
+        open_candle = ohlcv_data[-1]
+        if indicator_state.last_timestamp is None or open_candle[0] > indicator_state.last_timestamp:
+            indicators[open_candle[0]] = engine.peek(open_candle[4])
+
+    if new_closed:
+        indicator_state.state = engine.to_state()
+        indicator_state.save()
+    return indicators
+
+
+@transaction.atomic
+def backfill_indicators(crypto_id: int, timeframe: str) -> int:
+    """
+    Recompute the indicators of a crypto's whole stored history in one
+    vectorized pass and restart the streaming state from it. Returns the
+    number of candles updated.
+    """
+    model_class = TIMEFRAME_MODEL_MAP.get(timeframe)
+    if not model_class:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+
+    prices = list(
+        model_class.objects
+        .filter(crypto_id=crypto_id)
+        .order_by('timestamp')
+        .only('id', 'timestamp', 'close', 'indicators')
+    )
+
+    # A candle still forming only gets a preview, the state stops before it
+    now = int(time.time() * 1000)
+    duration = get_timeframe_duration_ms(timeframe)
+    closed = [price for price in prices if price.timestamp + duration <= now]
+    indicators, state = compute_indicators([price.close for price in closed])
+    for price, price_indicators in zip(closed, indicators):
+        price.indicators = price_indicators
+
+    engine = IndicatorEngine(state)
+    for price in prices[len(closed):]:
+        price.indicators = engine.peek(price.close)
+
+    model_class.objects.bulk_update(prices, ['indicators'], batch_size=1000)
+    IndicatorState.objects.update_or_create(
+        crypto_id=crypto_id,
+        timeframe=timeframe,
+        defaults={'state': state, 'last_timestamp': closed[-1].timestamp if closed else None}
+    )
+    bump_versions(historical_price_scope(crypto_id, timeframe))
+    return len(prices)
+
+
+@transaction.atomic
+def rollup_historical_prices(
+    crypto_id: int,
+    timeframe: str,
+    rollup_to: str,
+    cutoff: int,
+    batch_size: int = 20000
+) -> Dict[str, int]:
+    """
+    Roll up one batch of a crypto's candles older than `cutoff` into the
+    `rollup_to` timeframe and delete them from the source table.
+
+    Candles already present in the target table are kept as they are, the
+    rolled up buckets only fill the gaps.
+    """
+    source_model = TIMEFRAME_MODEL_MAP.get(timeframe)
+    target_model = TIMEFRAME_MODEL_MAP.get(rollup_to)
+    if not source_model or not target_model:
+        raise ValueError(f"Invalid retention policy: {timeframe} -> {rollup_to}")
+
+    fields = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+    rows = list(
+        source_model.objects
+        .filter(crypto_id=crypto_id, timestamp__lt=cutoff)
+        .order_by('timestamp')
+        .values_list(*fields)[:batch_size]
+    )
+    if not rows:
+        return {'rolled_up': 0, 'freed': 0}
+
+    bucket_ms = get_timeframe_duration_ms(rollup_to)
+
+    # A full batch may end in the middle of a bucket, its remaining candles
+    # are added so that no bucket is rolled up (and deleted) partially
+    if len(rows) == batch_size:
+        last_timestamp = rows[-1][0]
+        bucket_end = last_timestamp - last_timestamp % bucket_ms + bucket_ms
+        rows += list(
+            source_model.objects
+            .filter(crypto_id=crypto_id, timestamp__gt=last_timestamp, timestamp__lt=min(cutoff, bucket_end))
+            .order_by('timestamp')
+            .values_list(*fields)
+        )
+
+    candles = pd.DataFrame(rows, columns=list(fields))
+    candles['bucket'] = candles['timestamp'] - candles['timestamp'] % bucket_ms
+
+    buckets = candles.groupby('bucket').agg(
+        open=('open', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        close=('close', 'last'),
+        volume=('volume', 'sum')
+    )
+
+    existing = set(
+        target_model.objects
+        .filter(crypto_id=crypto_id, timestamp__in=buckets.index.tolist())
+        .values_list('timestamp', flat=True)
+    )
+    records = [
+        target_model(
+            crypto_id=crypto_id,
+            timestamp=bucket,
+            open=row.open,
+            high=row.high,
+            low=row.low,
+            close=row.close,
+            volume=row.volume
+        )
+        for bucket, row in buckets.iterrows()
+        if bucket not in existing
+    ]
+    target_model.objects.bulk_create(records, batch_size=1000)
+
+    freed, _ = source_model.objects.filter(
+        crypto_id=crypto_id,
+        timestamp__gte=int(candles['timestamp'].iloc[0]),
+        timestamp__lte=int(candles['timestamp'].iloc[-1])
+    ).delete()
+    bump_versions(
+        historical_price_scope(crypto_id, timeframe),
+        historical_price_scope(crypto_id, rollup_to)
+    )
+
+    return {'rolled_up': len(records), 'freed': freed}
+
+
+def apply_retention_policies(
+    policies: Optional[Dict[str, Dict[str, Any]]] = None,
+    batch_size: Optional[int] = None,
+    time_budget: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Apply the historical price retention policies in batches.
+
+    Stops once `time_budget` seconds are spent, whatever is left over is
+    handled by the next run. Returns per timeframe metrics.
+    """
+    policies = policies or settings.HISTORICAL_PRICE_RETENTION_POLICIES
+    batch_size = batch_size or settings.HISTORICAL_PRICE_RETENTION_BATCH_SIZE
+    time_budget = time_budget or settings.HISTORICAL_PRICE_RETENTION_TIME_BUDGET
+    deadline = time.monotonic() + time_budget
+
+    now = int(timezone.now().timestamp() * 1000)
+    summary = {}
+
+    for timeframe, policy in policies.items():
+        rollup_to = policy['rollup_to']
+        bucket_ms = get_timeframe_duration_ms(rollup_to)
+        cutoff = now - policy['keep_days'] * 24 * 60 * 60 * 1000
+        # Only roll up buckets that are entirely older than the cutoff
+        cutoff -= cutoff % bucket_ms
+
+        metrics = {'rolled_up': 0, 'freed': 0, 'complete': True}
+        summary[timeframe] = metrics
+
+        source_model = TIMEFRAME_MODEL_MAP.get(timeframe)
+        if not source_model:
+            raise ValueError(f"Invalid timeframe: {timeframe}")
+
+        crypto_ids = list(Crypto.objects.values_list('cmc_id', flat=True))
+        for crypto_id in crypto_ids:
+            while True:
+                if time.monotonic() >= deadline:
+                    metrics['complete'] = False
+                    return summary
+
+                batch_metrics = rollup_historical_prices(
+                    crypto_id=crypto_id,
+                    timeframe=timeframe,
+                    rollup_to=rollup_to,
+                    cutoff=cutoff,
+                    batch_size=batch_size
+                )
+                metrics['rolled_up'] += batch_metrics['rolled_up']
+                metrics['freed'] += batch_metrics['freed']
+
+                if batch_metrics['freed'] == 0:
+                    break
+
+    return summary
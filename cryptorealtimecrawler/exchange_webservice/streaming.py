@@ -0,0 +1,300 @@
+"""
+Live ticker and candle push over Server-Sent Events and WebSockets.
+
+The crawler publishes every ticker and closed candle to a per coin Redis
+channel (see `crawler.redis_keys.live_channel`). Each server process keeps a
+single pattern subscription to those channels and fans messages out to its
+clients, so thousands of idle subscribers cost one Redis connection and a
+parked coroutine each.
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+import redis.asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from cryptorealtimecrawler.common.redis_db_connection import close_async_coins_redis_connection
+from .crawler.redis_keys import LIVE_CHANNEL_PATTERN, LIVE_TICKER_STREAM, live_channel
+
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 15  # seconds
+RECONNECT_DELAY = 1  # seconds
+MAX_CHANNELS_PER_SUBSCRIPTION = 2000
+
+
+def get_channels(coins: Iterable[str], streams: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    """Map each live channel to the (coin, stream) it carries"""
+    channels = {
+        live_channel(coin, stream): (coin, stream)
+        for coin in coins if coin
+        for stream in streams if stream
+    }
+    check_channel_count(channels)
+    return channels
+
+
+def check_channel_count(channels: Dict[str, Tuple[str, str]]) -> None:
+    if len(channels) > MAX_CHANNELS_PER_SUBSCRIPTION:
+        raise ValueError(f"At most {MAX_CHANNELS_PER_SUBSCRIPTION} coin/stream pairs can be subscribed")
+
+
+class Subscription:
+    """
+    A client's channels and the updates waiting to be sent to it.
+
+    Only the latest message per channel is kept, so a slow client catches up
+    on the freshest state instead of an ever growing backlog.
+    """
+
+    def __init__(self, channels: Dict[str, Tuple[str, str]]):
+        self.channels = channels
+        self._pending: Dict[str, str] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, channel: str, data: str) -> None:
+        self._pending[channel] = data
+        self._ready.set()
+
+    async def drain(self, timeout: float) -> List[Tuple[str, str, str]]:
+        """Wait for updates and return them as (coin, stream, data) tuples"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return [
+            (*self.channels[channel], data)
+            for channel, data in pending.items()
+            if channel in self.channels
+        ]
+
+
+class LiveUpdateBroker:
+    """Fans the crawler's live channels out to this process' subscriptions"""
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, subscription: Subscription) -> None:
+        for channel in subscription.channels:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen())
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for channel in subscription.channels:
+            subscribers = self._subscriptions.get(channel)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[channel]
+
+    async def stop(self) -> None:
+        """Stop listening, the listener closes its Redis connection on its way out"""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    @staticmethod
+    def _get_redis():
+        # Imported lazily so the module loads without the Redis env vars
+        from config.settings.redis import REDIS_COINS_HOST, REDIS_COINS_PORT
+
+        return aioredis.Redis(host=REDIS_COINS_HOST, port=REDIS_COINS_PORT, decode_responses=True)
+
+    async def _listen(self) -> None:
+        while True:
+            client = self._get_redis()
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(LIVE_CHANNEL_PATTERN)
+                async for message in pubsub.listen():
+                    if message['type'] != 'pmessage':
+                        continue
+                    for subscription in self._subscriptions.get(message['channel'], ()):
+                        subscription.push(message['channel'], message['data'])
+            except (RedisConnectionError, OSError):
+                await asyncio.sleep(RECONNECT_DELAY)
+            except Exception:
+                # Any other failure would end the listener and silently starve every subscription
+                logger.exception("Live update listener failed, reconnecting")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                await pubsub.reset()
+                await client.close()
+
+
+broker = LiveUpdateBroker()
+
+
+def format_update(coin: str, stream: str, data: str) -> str:
+    # `data` is already JSON, it is embedded as is instead of being re-parsed
+    return f'{{"coin": {json.dumps(coin)}, "stream": {json.dumps(stream)}, "data": {data}}}'
+
+
+async def next_updates(subscription: Subscription, closed: asyncio.Future) -> Optional[List[Tuple[str, str, str]]]:
+    """Wait for the next batch of updates, None once the client is gone"""
+    drain = asyncio.ensure_future(subscription.drain(HEARTBEAT_INTERVAL))
+    await asyncio.wait({drain, closed}, return_when=asyncio.FIRST_COMPLETED)
+    if closed.done():
+        drain.cancel()
+        return None
+    return drain.result()
+
+
+class LiveUpdatesApplication:
+    """
+    ASGI application serving live updates under `path_prefix` and handing
+    every other request to the wrapped Django application.
+
+    Subscribe with `?coins=BTC,ETH&streams=ticker,1h`. Over SSE each update
+    is an event named after its stream. WebSocket clients may also send
+    `{"subscribe": {"coins": [...], "streams": [...]}}` or `{"unsubscribe": ...}`.
+    """
+
+    def __init__(self, application, path_prefix: str):
+        self.application = application
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._serve_lifespan(receive, send)
+        if scope['type'] in ('http', 'websocket') and scope['path'].startswith(self.path_prefix):
+            if scope['type'] == 'websocket':
+                return await self._serve_websocket(scope, receive, send)
+            return await self._serve_sse(scope, receive, send)
+
+        return await self.application(scope, receive, send)
+
+    @staticmethod
+    async def _serve_lifespan(receive, send):
+        # Django does not speak the lifespan protocol, the process wide Redis clients are closed here
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await broker.stop()
+                await close_async_coins_redis_connection()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def _get_query_channels(scope) -> Dict[str, Tuple[str, str]]:
+        query = parse_qs(scope.get('query_string', b'').decode())
+        coins = ','.join(query.get('coins', [])).split(',')
+        streams = ','.join(query.get('streams', [LIVE_TICKER_STREAM])).split(',')
+        return get_channels(coins, streams)
+
+    @staticmethod
+    async def _send_error(send, status: int, message: str) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': json.dumps({'error': message}).encode()})
+
+    async def _serve_sse(self, scope, receive, send):
+        if scope['method'] != 'GET':
+            return await self._send_error(send, 405, 'Method not allowed')
+
+        try:
+            subscription = Subscription(self._get_query_channels(scope))
+        except ValueError as e:
+            return await self._send_error(send, 400, str(e))
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+
+        async def wait_for_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        closed = asyncio.ensure_future(wait_for_disconnect())
+        broker.subscribe(subscription)
+        try:
+            while True:
+                updates = await next_updates(subscription, closed)
+                if updates is None:
+                    return
+
+                if updates:
+                    body = ''.join(
+                        f'event: {stream}\ndata: {format_update(coin, stream, data)}\n\n'
+                        for coin, stream, data in updates
+                    )
+                else:
+                    body = ': heartbeat\n\n'
+                # Awaiting send is the backpressure, updates coalesce meanwhile
+                await send({'type': 'http.response.body', 'body': body.encode(), 'more_body': True})
+        finally:
+            broker.unsubscribe(subscription)
+            closed.cancel()
+
+    async def _serve_websocket(self, scope, receive, send):
+        if (await receive())['type'] != 'websocket.connect':
+            return
+
+        try:
+            subscription = Subscription(self._get_query_channels(scope))
+        except ValueError:
+            return await send({'type': 'websocket.close', 'code': 1008})
+
+        await send({'type': 'websocket.accept'})
+
+        async def handle_messages():
+            while True:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    return
+                try:
+                    request = json.loads(message.get('text') or message.get('bytes') or '{}')
+                    changes = {
+                        action: get_channels(request[action].get('coins', []), request[action].get('streams', []))
+                        for action in ('subscribe', 'unsubscribe') if action in request
+                    }
+                    channels = {**subscription.channels, **changes.get('subscribe', {})}
+                    for channel in changes.get('unsubscribe', {}):
+                        channels.pop(channel, None)
+                    # The cap holds for the whole subscription, not just each message
+                    check_channel_count(channels)
+                except (ValueError, AttributeError, TypeError) as e:
+                    await send({'type': 'websocket.send', 'text': json.dumps({'error': str(e)})})
+                    continue
+
+                broker.unsubscribe(subscription)
+                subscription.channels = channels
+                broker.subscribe(subscription)
+
+        closed = asyncio.ensure_future(handle_messages())
+        broker.subscribe(subscription)
+        try:
+            while True:
+                updates = await next_updates(subscription, closed)
+                if updates is None:
+                    return
+
+                for coin, stream, data in updates:
+                    await send({'type': 'websocket.send', 'text': format_update(coin, stream, data)})
+        finally:
+            broker.unsubscribe(subscription)
+            closed.cancel()
@@ -1,10 +1,40 @@
-from celery import shared_task
+import time
+from typing import List, Optional
+
+from celery import chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from config.settings.celery import CANDLE_CLOSE_CRAWL_DELAY, CANDLE_CLOSE_MAX_RETRIES, CRAWLER_RUN_LOCK_TTL
+from config.settings.exchange import EXCHANGE_SWEEP_SHARD_SIZE
+from cryptorealtimecrawler.common.redis_db_connection import get_coins_redis_connection
 from cryptorealtimecrawler.exchange_webservice.crawler.real_time import FiveMinuteCrawler, FifteenMinutesCrawler, \
     FourHourCrawler, DailyCrawler, WeeklyCrawler,OneHourCrawler, CoinHandler
+from cryptorealtimecrawler.exchange_webservice.crawler.redis_keys import Coin_REDIS_KEY, candle_close_dispatch_key
+from cryptorealtimecrawler.exchange_webservice.crawler.run_lock import (
+    RUN_COMPLETED, RUN_OVERLAPPED, RUN_SKIPPED, RUN_STARTED, LeaseLock, record_run, run_exclusively
+)
+from cryptorealtimecrawler.exchange_webservice.models import Crypto, TIMEFRAME_MODEL_MAP
+from cryptorealtimecrawler.exchange_webservice.services import apply_retention_policies, backfill_indicators
+from cryptorealtimecrawler.utils.crawler.crawler import get_candle_open_time
+
 
+OHLCV_CRAWLERS = {
+    crawler_class.__name__: crawler_class
+    for crawler_class in (
+        FiveMinuteCrawler, FifteenMinutesCrawler, OneHourCrawler, FourHourCrawler, DailyCrawler, WeeklyCrawler
+    )
+}
+OHLCV_TIMEFRAMES = {
+    FiveMinuteCrawler.__name__: '5m',
+    FifteenMinutesCrawler.__name__: '15m',
+    OneHourCrawler.__name__: '1h',
+    FourHourCrawler.__name__: '4h',
+    DailyCrawler.__name__: '1d',
+    WeeklyCrawler.__name__: '1w',
+}
 
 
 @shared_task
+@run_exclusively('tf_coins', CRAWLER_RUN_LOCK_TTL)
 def get_tf_coins_data():
     crawler = CoinHandler()
     crawler.get_save_cmc_chains_data()
@@ -13,6 +43,7 @@ def get_tf_coins_data():
 
 
 @shared_task
+@run_exclusively('real_time', CRAWLER_RUN_LOCK_TTL)
 def get_real_time_data():
     crawler = CoinHandler()
     print("get real time data")
@@ -21,42 +52,226 @@ def get_real_time_data():
 
 
 @shared_task
-def get_five_min_data():
-    crawler = FiveMinuteCrawler()
-    summary = crawler.run_save_ohlcv_redis()
+@run_exclusively('orderbook', CRAWLER_RUN_LOCK_TTL)
+def get_orderbook_data():
+    crawler = CoinHandler()
+    summary = crawler.get_save_orderbook_data()
     return summary
 
 
+def get_ohlcv_sweep_lock(crawler_name: str, shard_index: Optional[int] = None) -> LeaseLock:
+    name = f'ohlcv_{crawler_name}' if shard_index is None else f'ohlcv_{crawler_name}_shard_{shard_index}'
+    return LeaseLock(get_coins_redis_connection(), name, CRAWLER_RUN_LOCK_TTL)
+
+
 @shared_task
-def get_fifteen_min_data():
-    crawler = FifteenMinutesCrawler()
-    summary = crawler.run_save_ohlcv_redis()
+def save_ohlcv_shard(crawler_name: str, shard_index: int, coin_symbols, token: int):
+    skipped = {'coins': [], 'error_symbols': []}
+    lock = get_ohlcv_sweep_lock(crawler_name, shard_index)
+    # Left over from a sweep that outlived its lease, the newer sweep covers its coins
+    if not get_ohlcv_sweep_lock(crawler_name).is_current(token):
+        record_run(lock.name, RUN_OVERLAPPED)
+        return skipped
+
+    shard_token = lock.acquire()
+    if shard_token is None:
+        record_run(lock.name, RUN_SKIPPED)
+        return skipped
+
+    try:
+        crawler = OHLCV_CRAWLERS[crawler_name]()
+        return crawler.run_save_ohlcv_shard(coin_symbols)
+    except SoftTimeLimitExceeded:
+        # Failing would lose the whole sweep's snapshot, the shard's coins are retried on the next one instead
+        return {'coins': [], 'error_symbols': sorted(coin_symbol for coin_symbol, _ in coin_symbols)}
+    finally:
+        lock.release(shard_token)
+
+
+def save_candle_close_crawl(crawler, crawler_name: str, shard_results, candle_open_time: int) -> None:
+    """Record the candle a sweep fetched with the coins still missing it, for dispatch_candle_close_crawls"""
+    key = Coin_REDIS_KEY.CANDLE_CLOSE_CRAWLS.value
+    previous = crawler.redis_handler.hmget(key, [crawler_name]).get(crawler_name)
+    if previous and previous['candle_open_time'] > candle_open_time:
+        return
+
+    coins = [
+        coin_symbol
+        for shard_result in shard_results
+        for coin_symbol in (*shard_result['coins'], *shard_result['error_symbols'])
+    ]
+    attempts = 1
+    if previous and previous['candle_open_time'] == candle_open_time:
+        attempts = previous['attempts'] + 1
+    crawler.redis_handler.hset(key, {
+        crawler_name: {
+            'candle_open_time': candle_open_time,
+            'missing': crawler.get_coins_missing_candle(coins, candle_open_time),
+            'attempts': attempts,
+        }
+    })
+
+
+@shared_task
+def save_ohlcv_snapshot(shard_results, crawler_name: str, token: int, candle_open_time: int, partial: bool = False):
+    lock = get_ohlcv_sweep_lock(crawler_name)
+    if not lock.is_current(token):
+        # A newer sweep started meanwhile, its snapshot must not be overwritten by this older one
+        record_run(lock.name, RUN_OVERLAPPED)
+        return 0
+
+    try:
+        crawler = OHLCV_CRAWLERS[crawler_name]()
+        summary = crawler.run_save_ohlcv_snapshot(shard_results, partial=partial)
+        save_candle_close_crawl(crawler, crawler_name, shard_results, candle_open_time)
+    finally:
+        lock.release(token)
+    record_run(lock.name, RUN_COMPLETED)
     return summary
 
 
+def dispatch_ohlcv_sweep(
+    crawler_name: str,
+    coins: Optional[List[str]] = None,
+    candle_open_time: Optional[int] = None
+) -> int:
+    """
+    Split a timeframe's sweep (of `coins` only if given) in shards of coins,
+    one subtask each so they spread over the workers, and combine their
+    results into the snapshot once they are all done. Returns the number of
+    shards.
+
+    The sweep holds its lease lock from dispatch to snapshot, a sweep
+    scheduled while the previous one is still going is skipped. It's
+    recorded as fetching the candle opening at `candle_open_time` (ms), the
+    current one by default.
+    """
+    if candle_open_time is None:
+        candle_open_time = get_candle_open_time(OHLCV_TIMEFRAMES[crawler_name], int(time.time() * 1000))
+
+    lock = get_ohlcv_sweep_lock(crawler_name)
+    token = lock.acquire()
+    if token is None:
+        record_run(lock.name, RUN_SKIPPED)
+        return 0
+    record_run(lock.name, RUN_STARTED)
+
+    try:
+        crawler = OHLCV_CRAWLERS[crawler_name]()
+        shards = crawler.get_coin_shards(EXCHANGE_SWEEP_SHARD_SIZE, coins=coins)
+        if not shards:
+            # Nothing to fetch for this candle, don't retry it
+            save_candle_close_crawl(crawler, crawler_name, [], candle_open_time)
+            lock.release(token)
+            return 0
+
+        chord(
+            save_ohlcv_shard.s(crawler_name, shard_index, coin_symbols, token)
+            for shard_index, coin_symbols in enumerate(shards)
+        )(save_ohlcv_snapshot.s(crawler_name, token, candle_open_time, partial=coins is not None))
+    except Exception:
+        lock.release(token)
+        raise
+    return len(shards)
+
+
+@shared_task
+def sweep_ohlcv(crawler_name: str, coins: Optional[List[str]] = None, candle_open_time: Optional[int] = None):
+    return dispatch_ohlcv_sweep(crawler_name, coins, candle_open_time)
+
+
+@shared_task
+def dispatch_candle_close_crawls():
+    """
+    Start each timeframe's sweep CANDLE_CLOSE_CRAWL_DELAY seconds after its
+    candles close. Timeframes already holding their last closed candle are
+    left alone, apart from sweeping again the coins whose exchange hadn't
+    closed it yet, up to CANDLE_CLOSE_MAX_RETRIES times.
+
+    Each sweep is recorded in Redis before it is enqueued, and never enqueued
+    twice for the same candle and attempt, however often this runs before
+    the sweep gets going.
+    """
+    redis_handler = get_coins_redis_connection()
+    crawls = redis_handler.hgetall(Coin_REDIS_KEY.CANDLE_CLOSE_CRAWLS.value)
+    now = int(time.time() * 1000)
+    dispatched = {}
+
+    for crawler_name, timeframe in OHLCV_TIMEFRAMES.items():
+        candle_open_time = get_candle_open_time(timeframe, now - CANDLE_CLOSE_CRAWL_DELAY * 1000)
+        crawl = crawls.get(crawler_name)
+        coins = None
+        attempt = 0
+        if crawl and crawl['candle_open_time'] >= candle_open_time:
+            if not crawl['missing'] or crawl['attempts'] > CANDLE_CLOSE_MAX_RETRIES:
+                continue
+            coins = crawl['missing']
+            candle_open_time = crawl['candle_open_time']
+            attempt = crawl['attempts']
+
+        # Its sweep is still going, the next call finds its results
+        if get_ohlcv_sweep_lock(crawler_name).is_held():
+            continue
+
+        # Already enqueued, but not started yet. Expires in case that sweep is lost before it starts.
+        dispatch_key = candle_close_dispatch_key(crawler_name, candle_open_time, attempt)
+        if not redis_handler.set_if_not_exists(dispatch_key, int(time.time() * 1000), ex=CRAWLER_RUN_LOCK_TTL):
+            continue
+
+        sweep_ohlcv.delay(crawler_name, coins, candle_open_time)
+        dispatched[crawler_name] = len(coins) if coins is not None else 'all'
+
+    return dispatched
+
+
+@shared_task
+def get_five_min_data():
+    return dispatch_ohlcv_sweep(FiveMinuteCrawler.__name__)
+
+
+@shared_task
+def get_fifteen_min_data():
+    return dispatch_ohlcv_sweep(FifteenMinutesCrawler.__name__)
+
+
 @shared_task
 def get_one_hour_data():
-    crawler = OneHourCrawler()
-    summary = crawler.run_save_ohlcv_redis()
-    return summary
+    return dispatch_ohlcv_sweep(OneHourCrawler.__name__)
 
 
 @shared_task
 def get_four_hour_data():
-    crawler = FourHourCrawler()
-    summary = crawler.run_save_ohlcv_redis()
-    return summary
+    return dispatch_ohlcv_sweep(FourHourCrawler.__name__)
 
 
 @shared_task
 def get_daily_data():
-    crawler = DailyCrawler()
-    summary = crawler.run_save_ohlcv_redis()
-    return summary
+    return dispatch_ohlcv_sweep(DailyCrawler.__name__)
 
 
 @shared_task
 def get_weekly_data():
-    crawler = WeeklyCrawler()
-    summary = crawler.run_save_ohlcv_redis()
+    return dispatch_ohlcv_sweep(WeeklyCrawler.__name__)
+
+
+@shared_task
+@run_exclusively('historical_price_retention', CRAWLER_RUN_LOCK_TTL)
+def apply_historical_price_retention():
+    summary = apply_retention_policies()
     return summary
+
+
+@shared_task(soft_time_limit=300)
+def backfill_historical_price_indicators(crypto_id: int, timeframe: str):
+    return backfill_indicators(crypto_id, timeframe)
+
+
+@shared_task
+def backfill_all_historical_price_indicators():
+    # One task per crypto and timeframe, a whole history doesn't fit the default time limit
+    count = 0
+    for crypto_id in Crypto.objects.values_list('pk', flat=True):
+        for timeframe in TIMEFRAME_MODEL_MAP:
+            backfill_historical_price_indicators.delay(crypto_id, timeframe)
+            count += 1
+    return count
@@ -1,3 +1,1074 @@
-from django.test import TestCase
+import asyncio
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from unittest import mock, skipIf
 
-# Create your tests here.
+import fakeredis
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.settings.celery import CANDLE_CLOSE_CRAWL_DELAY, CANDLE_CLOSE_MAX_RETRIES
+from cryptorealtimecrawler.api import renderers
+from cryptorealtimecrawler.api.renderers import wants_columns
+from cryptorealtimecrawler.common.redis_db_connection import RedisConnection
+from cryptorealtimecrawler.utils.crawler.crawler import (
+    convert_ohlc_to_heikinashi, convert_ohlcv_batch_to_heikinashi, get_candle_open_time, get_start_time,
+    get_timeframe_duration_ms
+)
+from . import selectors, services, tasks, versioning
+from .crawler import run_lock
+from .crawler.analytics import compute_order_book_metrics, get_cross_exchange_spreads
+from .crawler.order_book_store import decode_order_book, encode_order_book, save_order_books
+from .crawler.cluster import HashRing, NodeMembership
+from .crawler.order_book_stream import FakeOrderBookFeed, OrderBookDaemon
+from .crawler.redis_keys import Coin_REDIS_KEY, ohlcv_key, order_book_key
+from .crawler.run_lock import (
+    RUN_COMPLETED, RUN_OVERLAPPED, RUN_SKIPPED, RUN_STARTED, LeaseLock, get_run_metrics, run_exclusively
+)
+from .crawler.sweep import ExchangeSweep, TokenBucket
+from .indicators import EMA_PERIODS, RSI_PERIOD, IndicatorEngine, compute_indicators
+from .models import Crypto, DailyPrice, FiveMinutePrice, OneHourPrice, PriceStatistics
+
+
+def get_fake_redis_connection() -> RedisConnection:
+    """RedisConnection over its own in-memory Redis server"""
+    server = fakeredis.FakeServer()
+    with mock.patch('redis.Redis', lambda host, port, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)):
+        return RedisConnection(host='localhost', port=6379)
+
+
+class IndicatorTests(SimpleTestCase):
+    def assertIndicatorsEqual(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for actual_indicators, expected_indicators in zip(actual, expected):
+            self.assertEqual(actual_indicators.keys(), expected_indicators.keys())
+            for key, value in expected_indicators.items():
+                self.assertAlmostEqual(actual_indicators[key], value, places=9, msg=key)
+
+    @staticmethod
+    def _random_walk(n: int, seed: int = 1):
+        generator = random.Random(seed)
+        closes = [100.0]
+        for _ in range(n - 1):
+            closes.append(closes[-1] * (1 + generator.uniform(-0.02, 0.02)))
+        return closes
+
+    def test_flat_series(self):
+        indicators, _ = compute_indicators([100.0] * 40)
+
+        last = indicators[-1]
+        for period in EMA_PERIODS[:2]:
+            self.assertEqual(last[f'ema_{period}'], 100)
+        self.assertNotIn('ema_50', last)
+        self.assertEqual(last[f'rsi_{RSI_PERIOD}'], 50)
+        self.assertEqual(last['macd'], 0)
+        self.assertEqual(last['macd_histogram'], 0)
+        self.assertEqual((last['bb_lower'], last['bb_middle'], last['bb_upper']), (100, 100, 100))
+
+    def test_rising_series(self):
+        closes = [float(close) for close in range(1, 41)]
+        indicators, _ = compute_indicators(closes)
+
+        # An EMA seeded with the first close of 1, 2, 3... lags k by (1 - a) / a * (1 - (1 - a) ** (k - 1))
+        def ema(period: int, k: int) -> float:
+            alpha = 2 / (period + 1)
+            return k - (1 - alpha) / alpha * (1 - (1 - alpha) ** (k - 1))
+
+        self.assertNotIn('ema_12', indicators[10])
+        self.assertAlmostEqual(indicators[11]['ema_12'], ema(12, 12))
+        self.assertAlmostEqual(indicators[25]['macd'], ema(12, 26) - ema(26, 26))
+        self.assertNotIn('macd_signal', indicators[25 + 7])
+        self.assertIn('macd_signal', indicators[25 + 8])
+        self.assertNotIn(f'rsi_{RSI_PERIOD}', indicators[RSI_PERIOD - 1])
+        self.assertEqual(indicators[RSI_PERIOD][f'rsi_{RSI_PERIOD}'], 100)
+        # Closes 21 to 40, population standard deviation of 20 consecutive integers
+        std = math.sqrt((20 ** 2 - 1) / 12)
+        self.assertAlmostEqual(indicators[-1]['bb_middle'], 30.5)
+        self.assertAlmostEqual(indicators[-1]['bb_upper'], 30.5 + 2 * std)
+        self.assertAlmostEqual(indicators[-1]['bb_lower'], 30.5 - 2 * std)
+
+    def test_streaming_matches_vectorized(self):
+        closes = self._random_walk(300)
+        engine = IndicatorEngine()
+
+        streamed = [engine.update(close) for close in closes]
+        vectorized, state = compute_indicators(closes)
+
+        self.assertIndicatorsEqual(streamed, vectorized)
+        self.assertEqual(state.keys(), engine.to_state().keys())
+        self.assertEqual(state['count'], engine.count)
+        self.assertEqual(state['closes'], engine.closes)
+
+    def test_backfill_state_continues_streaming(self):
+        closes = self._random_walk(300, seed=2)
+        # Backfilled during the RSI warm-up and after it
+        for split in (10, 120):
+            _, state = compute_indicators(closes[:split])
+            engine = IndicatorEngine(state)
+
+            continued = [engine.update(close) for close in closes[split:]]
+
+            self.assertIndicatorsEqual(continued, compute_indicators(closes)[0][split:])
+
+    def test_peek_leaves_the_state_alone(self):
+        closes = self._random_walk(60, seed=3)
+        engine = IndicatorEngine()
+        for close in closes[:-1]:
+            engine.update(close)
+        state = engine.to_state()
+
+        peeked = engine.peek(closes[-1])
+
+        self.assertEqual(engine.to_state(), state)
+        self.assertIndicatorsEqual([peeked], [engine.update(closes[-1])])
+
+
+class HeikinAshiTests(SimpleTestCase):
+    CANDLES = [
+        [1000, 10.0, 12.0, 9.0, 11.0, 5.0],
+        [2000, 11.0, 13.0, 10.0, 12.0, 6.0],
+        [3000, 12.0, 12.5, 11.0, 11.5, 7.0],
+    ]
+
+    def test_known_candles(self):
+        heikin_ashi = convert_ohlcv_batch_to_heikinashi({'BTC': self.CANDLES})
+
+        # close = (o + h + l + c) / 4, open = (previous open + previous close) / 2, the first one (o + close) / 2
+        self.assertEqual(heikin_ashi['BTC'], [
+            [1000, 10.25, 12.0, 9.0, 10.5, 5.0],
+            [2000, 10.375, 13.0, 10.0, 11.5, 6.0],
+            [3000, 10.9375, 12.5, 10.9375, 11.75, 7.0],
+        ])
+
+    def test_coins_of_different_lengths(self):
+        heikin_ashi = convert_ohlcv_batch_to_heikinashi({'BTC': self.CANDLES, 'ETH': self.CANDLES[1:], 'XRP': []})
+
+        self.assertEqual(heikin_ashi['BTC'], convert_ohlcv_batch_to_heikinashi({'BTC': self.CANDLES})['BTC'])
+        # Its series starts at its own first candle
+        self.assertEqual(heikin_ashi['ETH'], [
+            [2000, 11.25, 13.0, 10.0, 11.5, 6.0],
+            [3000, 11.375, 12.5, 11.0, 11.75, 7.0],
+        ])
+        self.assertNotIn('XRP', heikin_ashi)
+
+    def test_batch_matches_dataframe_conversion(self):
+        data = pd.DataFrame(
+            [candle[1:5] for candle in self.CANDLES], columns=['Open', 'High', 'Low', 'Close']
+        )
+
+        converted = convert_ohlc_to_heikinashi(data)
+
+        batch = np.array(convert_ohlcv_batch_to_heikinashi({'BTC': self.CANDLES})['BTC'])
+        np.testing.assert_allclose(converted[['Open', 'High', 'Low', 'Close']].to_numpy(), batch[:, 1:5])
+
+
+class CrossExchangeSpreadTests(SimpleTestCase):
+    def test_spreads(self):
+        exchange_symbols = pd.DataFrame(
+            {'a': ['BTC/USDT', 'ETH/USDT', 'XRP/USDT'], 'b': ['BTC-USDT', None, None]}
+        )
+        tickers = {
+            'a': {
+                'BTC/USDT': {'bid': 100, 'ask': 101, 'last': 100.5, 'quoteVolume': 1000},
+                # An empty bid side, and only base volume
+                'ETH/USDT': {'bid': 0, 'ask': None, 'last': 10, 'baseVolume': 5},
+            },
+            'b': {'BTC-USDT': {'bid': 102, 'ask': 103, 'last': 102.5, 'quoteVolume': 3000}},
+        }
+
+        spreads = get_cross_exchange_spreads(tickers, ['BTC', 'ETH', 'XRP'], exchange_symbols)
+
+        btc = spreads['BTC']
+        self.assertEqual((btc['best_bid'], btc['best_bid_exchange']), (102, 'b'))
+        self.assertEqual((btc['best_ask'], btc['best_ask_exchange']), (101, 'a'))
+        self.assertEqual(btc['mid'], 101.5)
+        self.assertEqual(btc['spread'], -1)
+        self.assertAlmostEqual(btc['spread_pct'], -1 / 101.5 * 100)
+        self.assertAlmostEqual(btc['arbitrage_pct'], 1 / 101 * 100)
+        self.assertAlmostEqual(btc['last_dispersion_pct'], 2 / 100.5 * 100)
+        self.assertEqual(btc['volume_weighted_last'], 102)
+        self.assertEqual(btc['total_volume'], 4000)
+        self.assertEqual(set(btc['exchanges']), {'a', 'b'})
+
+        eth = spreads['ETH']
+        self.assertIsNone(eth['best_bid'])
+        self.assertIsNone(eth['best_ask_exchange'])
+        self.assertIsNone(eth['spread'])
+        self.assertEqual(eth['exchanges']['a']['volume'], 50)
+        # Quoted nowhere
+        self.assertNotIn('XRP', spreads)
+
+
+class OrderBookMetricsTests(SimpleTestCase):
+    ORDER_BOOK = {
+        'bids': [[99, 5], [98, 20]],
+        # Not all exchanges send the sides best price first
+        'asks': [[102, 20], [101, 10]],
+        'timestamp': 1000,
+        'exchnage': 'bingx',
+    }
+
+    def test_metrics(self):
+        metrics = compute_order_book_metrics(self.ORDER_BOOK)
+
+        self.assertEqual((metrics['best_bid'], metrics['best_ask'], metrics['mid']), (99, 101, 100))
+        self.assertEqual(metrics['spread_pct'], 2)
+        # Weighted towards the ask, the heavier top of book side
+        self.assertAlmostEqual(metrics['microprice'], (99 * 10 + 101 * 5) / 15)
+        self.assertAlmostEqual(metrics['imbalance'], -1 / 3)
+        self.assertEqual(metrics['depth']['0.5'], {'bid': 0, 'ask': 0, 'imbalance': None})
+        self.assertEqual((metrics['depth']['1']['bid'], metrics['depth']['1']['ask']), (495, 1010))
+        self.assertAlmostEqual(metrics['depth']['1']['imbalance'], (495 - 1010) / 1505)
+        self.assertEqual((metrics['depth']['2']['bid'], metrics['depth']['2']['ask']), (2455, 3050))
+        self.assertAlmostEqual(metrics['depth']['2']['imbalance'], (2455 - 3050) / 5505)
+
+    def test_slippage(self):
+        slippage = compute_order_book_metrics(self.ORDER_BOOK)['slippage']
+
+        # Buying 1000 fills at 101, selling takes the 5 at 99 and 505 / 98 at 98
+        self.assertAlmostEqual(slippage['1000']['buy'], 1)
+        self.assertAlmostEqual(slippage['1000']['sell'], 100 - 1000 / (995 / 98))
+        # Deeper than the book
+        self.assertEqual(slippage['10000'], {'buy': None, 'sell': None})
+
+    def test_book_missing_a_side(self):
+        self.assertIsNone(compute_order_book_metrics({'bids': [[99, 1]], 'asks': []}))
+        self.assertIsNone(compute_order_book_metrics({'bids': [[99, 0]], 'asks': [[101, 1]]}))
+
+
+class OrderBookStoreTests(SimpleTestCase):
+    ORDER_BOOK = {
+        'symbol': 'BTC/USDT',
+        'bids': [[99, 1], [98, 2], [97, 3]],
+        'asks': [[101, 1], [102, 2], [103, 3]],
+        'timestamp': 1000,
+        'nonce': 7,
+        'exchnage': 'bingx',
+    }
+
+    def test_round_trip(self):
+        encoded = encode_order_book(self.ORDER_BOOK, depth=2)
+
+        self.assertEqual(encoded['bid_prices'], [99, 98])
+        self.assertEqual(encoded['ask_sizes'], [1, 2])
+        self.assertEqual(
+            decode_order_book(encoded),
+            {**self.ORDER_BOOK, 'bids': [[99, 1], [98, 2]], 'asks': [[101, 1], [102, 2]]}
+        )
+        self.assertEqual(decode_order_book(encoded, depth=1)['asks'], [[101, 1]])
+
+    def test_save_order_books(self):
+        redis_handler = get_fake_redis_connection()
+
+        save_order_books(redis_handler, {'BTC': self.ORDER_BOOK}, depth=2)
+
+        stored = redis_handler.get(order_book_key('BTC'))
+        self.assertEqual(decode_order_book(stored)['bids'], [[99, 1], [98, 2]])
+        self.assertEqual(redis_handler.zrange(Coin_REDIS_KEY.ORDER_BOOK_INDEX.value, 0, -1, withscores=False), ['BTC'])
+        metrics = redis_handler.hgetall(Coin_REDIS_KEY.ORDER_BOOK_METRICS.value)
+        # Metrics come from the full book, not the stored levels
+        self.assertEqual(metrics['BTC']['mid'], 100)
+        self.assertEqual(metrics['BTC']['depth']['2']['bid'], 99 + 98 * 2)
+
+
+class OrderBookDaemonTests(SimpleTestCase):
+    SYMBOLS = {f'COIN{index}/USDT': f'COIN{index}' for index in range(10)}
+
+    def _is_caught_up(self, daemon: OrderBookDaemon, snapshots) -> bool:
+        return all(
+            daemon.books[('fake', symbol)].is_synced
+            and daemon.books[('fake', symbol)].sequence == snapshot.last_sequence
+            for symbol, snapshot in snapshots.items()
+        )
+
+    async def _assert_books_converge(self, daemon: OrderBookDaemon, feed: FakeOrderBookFeed, timeout: float = 5):
+        run = asyncio.ensure_future(daemon.run())
+        try:
+            await asyncio.sleep(0.5)
+            # Lost diffs are only noticed on the next ones, stop losing them so the books settle
+            feed.drop_rate = 0
+            loop = asyncio.get_event_loop()
+            deadline = loop.time() + timeout
+            while True:
+                # Nothing runs between taking the snapshots and comparing the books
+                snapshots = {symbol: await feed.fetch_snapshot(symbol) for symbol in self.SYMBOLS}
+                if self._is_caught_up(daemon, snapshots):
+                    break
+                self.assertLess(loop.time(), deadline, 'Order books never caught up with their source')
+                await asyncio.sleep(0.01)
+
+            for symbol, snapshot in snapshots.items():
+                book = daemon.books[('fake', symbol)]
+                self.assertEqual(book.bids, {price: amount for price, amount in snapshot.bids})
+                self.assertEqual(book.asks, {price: amount for price, amount in snapshot.asks})
+        finally:
+            run.cancel()
+            await asyncio.gather(run, return_exceptions=True)
+
+    def test_books_match_the_source_after_resnapshots(self):
+        feed = FakeOrderBookFeed(interval=0.001, levels=20, drop_rate=0.05, seed=1)
+        daemon = OrderBookDaemon({'fake': feed}, {'fake': self.SYMBOLS}, mock.MagicMock(), publish_interval=60)
+
+        asyncio.run(self._assert_books_converge(daemon, feed))
+
+        # One snapshot per book to start with, the rest recovered lost diffs
+        self.assertGreater(daemon.resnapshot_count, len(self.SYMBOLS))
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_bursts_then_holds_the_rate(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        started_at = time.monotonic()
+        for _ in range(4):
+            self.assertTrue(bucket.acquire())
+
+        # Two tokens of the burst, then one every 1 / 20 s
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.09)
+
+    def test_deadline(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        self.assertTrue(bucket.acquire())
+
+        self.assertFalse(bucket.acquire(deadline=time.monotonic() + 0.1))
+        # The token it gave up on is still there for the next caller
+        self.assertTrue(bucket.acquire(deadline=time.monotonic() + 1.1))
+
+
+class ExchangeSweepTests(SimpleTestCase):
+    @staticmethod
+    def _sweep(time_budget=None, rate_limit=1000, max_concurrent_requests=4) -> ExchangeSweep:
+        return ExchangeSweep(
+            ['a', 'b'], {'a': rate_limit, 'b': rate_limit}, max_concurrent_requests, time_budget=time_budget
+        )
+
+    def test_falls_back_to_the_next_exchange(self):
+        coin_symbols = [
+            ('BTC', [('a', 'BTC/USDT'), ('b', 'BTC-USDT')]),
+            ('ETH', [('a', 'ETH/USDT'), ('b', 'ETH-USDT')]),
+            ('XRP', [('a', 'XRP/USDT')]),
+            # Not swept by this sweep's exchanges
+            ('DOGE', [('c', 'DOGE/USDT')]),
+        ]
+        results, errors = {}, []
+
+        def fetch(exchange, symbol):
+            if exchange == 'a' and symbol != 'BTC/USDT':
+                raise ConnectionError(symbol)
+            # Empty responses count as failures too
+            return [] if symbol == 'XRP/USDT' else [symbol]
+
+        failed = self._sweep().run(
+            coin_symbols,
+            fetch,
+            lambda coin, exchange, result: results.__setitem__(coin, (exchange, result)),
+            lambda coin, exchange, error: errors.append((coin, exchange))
+        )
+
+        self.assertEqual(results, {'BTC': ('a', ['BTC/USDT']), 'ETH': ('b', ['ETH-USDT'])})
+        self.assertEqual(failed, {'XRP', 'DOGE'})
+        self.assertCountEqual(errors, [('ETH', 'a'), ('XRP', 'a')])
+
+    def test_failing_callbacks_fail_the_coin(self):
+        def on_result(coin, exchange, result):
+            raise RuntimeError('save failed')
+
+        def on_error(coin, exchange, error):
+            raise RuntimeError('log failed')
+
+        coin_symbols = [('BTC', [('a', 'BTC/USDT'), ('b', 'BTC-USDT')])]
+        failed = self._sweep().run(coin_symbols, lambda *_: [1], on_result, on_error)
+
+        self.assertEqual(failed, {'BTC'})
+
+    def test_concurrent_requests_per_exchange(self):
+        running, peak = 0, 0
+        lock = threading.Lock()
+
+        def fetch(exchange, symbol):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            return [symbol]
+
+        coin_symbols = [(f'COIN{index}', [('a', f'COIN{index}/USDT')]) for index in range(20)]
+        failed = self._sweep(max_concurrent_requests=3).run(coin_symbols, fetch, lambda *_: None)
+
+        self.assertEqual(failed, set())
+        self.assertLessEqual(peak, 3)
+
+    def test_time_budget(self):
+        coin_symbols = [(f'COIN{index}', [('a', f'COIN{index}/USDT')]) for index in range(20)]
+
+        started_at = time.monotonic()
+        # 2 requests per second, a burst of 2 and then one more fits in the budget
+        failed = self._sweep(time_budget=0.6, rate_limit=2, max_concurrent_requests=2).run(
+            coin_symbols, lambda exchange, symbol: [symbol], lambda *_: None
+        )
+
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual(len(failed), 17)
+
+
+class HashRingTests(SimpleTestCase):
+    KEYS = [f'COIN{index}' for index in range(1000)]
+
+    def _assign(self, nodes):
+        ring = HashRing(nodes)
+        return {key: ring.get_node(key) for key in self.KEYS}
+
+    def test_even_and_stable(self):
+        assignment = self._assign(['n1', 'n2', 'n3'])
+
+        for node in ('n1', 'n2', 'n3'):
+            self.assertGreater(list(assignment.values()).count(node), 200)
+        # Same ring whatever the order the nodes come in
+        self.assertEqual(assignment, self._assign(['n3', 'n1', 'n2', 'n1']))
+        self.assertIsNone(HashRing([]).get_node('BTC'))
+
+    def test_joining_and_leaving_nodes_only_move_their_share(self):
+        before = self._assign(['n1', 'n2', 'n3'])
+        after = self._assign(['n1', 'n2', 'n3', 'n4'])
+
+        moved = {key for key in self.KEYS if before[key] != after[key]}
+        self.assertTrue(moved)
+        self.assertEqual({after[key] for key in moved}, {'n4'})
+        # And back when it leaves
+        self.assertEqual(self._assign(['n1', 'n2', 'n3']), before)
+
+
+class RebalanceTests(SimpleTestCase):
+    COIN_SYMBOLS = {'fake': {f'COIN{index}/USDT': f'COIN{index}' for index in range(30)}}
+
+    def _daemon(self, redis_handler, node_id: str) -> OrderBookDaemon:
+        membership = NodeMembership(redis_handler, 'orderbooks', node_id=node_id, ttl=60)
+        return OrderBookDaemon({'fake': FakeOrderBookFeed()}, self.COIN_SYMBOLS, redis_handler, membership=membership)
+
+    async def _rebalance(self):
+        redis_handler = get_fake_redis_connection()
+        first, second = self._daemon(redis_handler, 'n1'), self._daemon(redis_handler, 'n2')
+        try:
+            first.rebalance()
+            self.assertEqual(first.watched_symbols, self.COIN_SYMBOLS)
+
+            second.rebalance()
+            first.rebalance()
+            first_symbols, second_symbols = first.watched_symbols['fake'], second.watched_symbols['fake']
+            self.assertTrue(first_symbols and second_symbols)
+            self.assertFalse(first_symbols.keys() & second_symbols.keys())
+            self.assertEqual({**first_symbols, **second_symbols}, self.COIN_SYMBOLS['fake'])
+            self.assertEqual(set(first.books), {('fake', symbol) for symbol in first_symbols})
+
+            second.membership.leave()
+            first.rebalance()
+            self.assertEqual(first.watched_symbols, self.COIN_SYMBOLS)
+            self.assertEqual(first.rebalance_count, 3)
+        finally:
+            for daemon in (first, second):
+                daemon.watch({})
+            await asyncio.sleep(0)
+
+    def test_nodes_split_the_coins(self):
+        asyncio.run(self._rebalance())
+
+
+class LeaseLockTests(SimpleTestCase):
+    def setUp(self):
+        self.redis_handler = get_fake_redis_connection()
+
+    def test_fencing_tokens(self):
+        lock = LeaseLock(self.redis_handler, 'test', ttl=60)
+
+        token = lock.acquire()
+        self.assertEqual(token, 1)
+        self.assertIsNone(lock.acquire())
+        self.assertTrue(lock.is_held())
+        self.assertFalse(lock.release(token + 1))
+        self.assertTrue(lock.extend(token))
+
+        self.assertTrue(lock.release(token))
+        self.assertFalse(lock.is_held())
+        self.assertEqual(lock.acquire(), 2)
+        self.assertFalse(lock.is_current(token))
+        self.assertTrue(lock.is_current(2))
+
+    def test_expired_lease(self):
+        lock = LeaseLock(self.redis_handler, 'test', ttl=0.05)
+        token = lock.acquire()
+        time.sleep(0.1)
+
+        newer_token = lock.acquire()
+
+        self.assertEqual(newer_token, token + 1)
+        # The old holder can't renew or release the newer lease
+        self.assertFalse(lock.extend(token))
+        self.assertFalse(lock.release(token))
+        self.assertTrue(lock.is_held())
+
+    def test_run_exclusively(self):
+        calls = []
+
+        @run_exclusively('test', ttl=60)
+        def task():
+            calls.append(task_lock.acquire())
+            return 'done'
+
+        task_lock = LeaseLock(self.redis_handler, 'test', ttl=60)
+        with mock.patch.object(run_lock, 'get_coins_redis_connection', return_value=self.redis_handler):
+            # Its own lease is held while it runs
+            self.assertEqual(task(), 'done')
+            self.assertEqual(calls, [None])
+
+            token = task_lock.acquire()
+            self.assertIsNone(task())
+            task_lock.release(token)
+
+            metrics = get_run_metrics()
+
+        self.assertEqual(metrics['test'], {RUN_STARTED: 1, RUN_COMPLETED: 1, RUN_SKIPPED: 1})
+
+    def test_run_exclusively_outliving_its_lease(self):
+        @run_exclusively('test', ttl=0.05)
+        def task():
+            time.sleep(0.1)
+            # A newer run took the lease meanwhile
+            LeaseLock(self.redis_handler, 'test', ttl=60).acquire()
+
+        with mock.patch.object(run_lock, 'get_coins_redis_connection', return_value=self.redis_handler):
+            task()
+            metrics = get_run_metrics()
+
+        self.assertEqual(metrics['test'], {RUN_STARTED: 1, RUN_OVERLAPPED: 1})
+
+
+class FakeOHLCVCrawler:
+    """OHLCV crawler of a few coins, recording the shards and snapshots it's asked to save"""
+    COINS = ['BTC', 'ETH', 'XRP', 'DOGE', 'ADA']
+    # Coins no exchange serves
+    FAILING_COINS = {'XRP'}
+    redis_handler = None
+    shards = []
+    snapshots = []
+
+    def get_coin_shards(self, shard_size, coins=None):
+        coin_symbols = [(coin, [('a', f'{coin}/USDT')]) for coin in self.COINS if coins is None or coin in coins]
+        return [coin_symbols[index:index + shard_size] for index in range(0, len(coin_symbols), shard_size)]
+
+    def run_save_ohlcv_shard(self, coin_symbols):
+        coins = [coin for coin, _ in coin_symbols]
+        self.shards.append(coins)
+        return {
+            'coins': [coin for coin in coins if coin not in self.FAILING_COINS],
+            'error_symbols': [coin for coin in coins if coin in self.FAILING_COINS],
+        }
+
+    def run_save_ohlcv_snapshot(self, shard_results, partial=False):
+        self.snapshots.append((shard_results, partial))
+        return sum(len(shard_result['error_symbols']) for shard_result in shard_results)
+
+    def get_coins_missing_candle(self, coins, candle_open_time):
+        return sorted(set(coins) & self.FAILING_COINS)
+
+
+class OHLCVSweepTestCase(SimpleTestCase):
+    """Sweeps of FakeOHLCVCrawler, over fakeredis and run eagerly by the test settings"""
+    CRAWLER_NAME = 'OneHourCrawler'
+    NOW = int(datetime(2024, 1, 3, 10, 30, tzinfo=timezone.utc).timestamp() * 1000)
+
+    def setUp(self):
+        self.redis_handler = get_fake_redis_connection()
+        FakeOHLCVCrawler.redis_handler = self.redis_handler
+        FakeOHLCVCrawler.shards = []
+        FakeOHLCVCrawler.snapshots = []
+        for patcher in (
+            mock.patch.object(tasks, 'get_coins_redis_connection', return_value=self.redis_handler),
+            mock.patch.object(run_lock, 'get_coins_redis_connection', return_value=self.redis_handler),
+            mock.patch.dict(tasks.OHLCV_CRAWLERS, {self.CRAWLER_NAME: FakeOHLCVCrawler}),
+            mock.patch.object(tasks, 'EXCHANGE_SWEEP_SHARD_SIZE', 2),
+            mock.patch.object(tasks.time, 'time', return_value=self.NOW / 1000),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _get_crawl(self):
+        crawls = self.redis_handler.hgetall(Coin_REDIS_KEY.CANDLE_CLOSE_CRAWLS.value)
+        return crawls.get(self.CRAWLER_NAME)
+
+
+class OHLCVSweepTests(OHLCVSweepTestCase):
+    def test_shards_combine_into_one_snapshot(self):
+        candle_open_time = get_candle_open_time('1h', self.NOW)
+
+        self.assertEqual(tasks.dispatch_ohlcv_sweep(self.CRAWLER_NAME), 3)
+
+        self.assertEqual(FakeOHLCVCrawler.shards, [['BTC', 'ETH'], ['XRP', 'DOGE'], ['ADA']])
+        [(shard_results, partial)] = FakeOHLCVCrawler.snapshots
+        self.assertEqual(len(shard_results), 3)
+        self.assertFalse(partial)
+        self.assertEqual(
+            self._get_crawl(), {'candle_open_time': candle_open_time, 'missing': ['XRP'], 'attempts': 1}
+        )
+        # The sweep's lease ends with its snapshot
+        self.assertFalse(tasks.get_ohlcv_sweep_lock(self.CRAWLER_NAME).is_held())
+
+    def test_retried_coins(self):
+        candle_open_time = get_candle_open_time('1h', self.NOW)
+
+        tasks.dispatch_ohlcv_sweep(self.CRAWLER_NAME, ['XRP'], candle_open_time)
+
+        self.assertEqual(FakeOHLCVCrawler.shards, [['XRP']])
+        self.assertTrue(FakeOHLCVCrawler.snapshots[0][1])
+
+    def test_sweep_skipped_while_one_is_going(self):
+        lock = tasks.get_ohlcv_sweep_lock(self.CRAWLER_NAME)
+        lock.acquire()
+
+        self.assertEqual(tasks.dispatch_ohlcv_sweep(self.CRAWLER_NAME), 0)
+        self.assertEqual(FakeOHLCVCrawler.shards, [])
+
+    def test_stale_sweep_drops_its_results(self):
+        lock = tasks.get_ohlcv_sweep_lock(self.CRAWLER_NAME)
+        token = lock.acquire()
+        lock.release(token)
+        # A newer sweep started after this one's lease ran out
+        lock.acquire()
+
+        shard_result = tasks.save_ohlcv_shard(self.CRAWLER_NAME, 0, [('BTC', [('a', 'BTC/USDT')])], token)
+        self.assertEqual(tasks.save_ohlcv_snapshot([shard_result], self.CRAWLER_NAME, token, 0), 0)
+
+        self.assertEqual(FakeOHLCVCrawler.shards, [])
+        self.assertEqual(FakeOHLCVCrawler.snapshots, [])
+        self.assertEqual(get_run_metrics()[lock.name], {RUN_OVERLAPPED: 1})
+
+
+class CandleCloseDispatchTests(OHLCVSweepTestCase):
+    def test_candle_open_time(self):
+        def timestamp(*args) -> int:
+            return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+        self.assertEqual(get_candle_open_time('5m', timestamp(2024, 1, 3, 10, 34, 59)), timestamp(2024, 1, 3, 10, 30))
+        self.assertEqual(get_candle_open_time('4h', timestamp(2024, 1, 3, 10, 30)), timestamp(2024, 1, 3, 8))
+        self.assertEqual(get_candle_open_time('1d', timestamp(2024, 1, 3, 10, 30)), timestamp(2024, 1, 3))
+        # Weekly candles open on Mondays
+        self.assertEqual(get_candle_open_time('1w', timestamp(2024, 1, 3, 10, 30)), timestamp(2024, 1, 1))
+        self.assertEqual(get_candle_open_time('1w', timestamp(2024, 1, 1)), timestamp(2024, 1, 1))
+        with self.assertRaises(ValueError):
+            get_candle_open_time('2h', self.NOW)
+
+    def _dispatch(self):
+        with mock.patch.object(tasks.sweep_ohlcv, 'delay') as delay:
+            dispatched = tasks.dispatch_candle_close_crawls()
+        return dispatched, {call.args[0]: call.args[1:] for call in delay.call_args_list}
+
+    def test_every_timeframe_once_per_candle(self):
+        dispatched, sweeps = self._dispatch()
+
+        self.assertEqual(set(dispatched), set(tasks.OHLCV_TIMEFRAMES))
+        candle_open_time = get_candle_open_time('1h', self.NOW - CANDLE_CLOSE_CRAWL_DELAY * 1000)
+        self.assertEqual(sweeps[self.CRAWLER_NAME], (None, candle_open_time))
+        # Queued but not started yet
+        self.assertEqual(self._dispatch(), ({}, {}))
+
+    def test_missing_coins_are_retried(self):
+        candle_open_time = get_candle_open_time('1h', self.NOW - CANDLE_CLOSE_CRAWL_DELAY * 1000)
+        crawl = {'candle_open_time': candle_open_time, 'missing': ['XRP'], 'attempts': 1}
+        self.redis_handler.hset(Coin_REDIS_KEY.CANDLE_CLOSE_CRAWLS.value, {self.CRAWLER_NAME: crawl})
+
+        dispatched, sweeps = self._dispatch()
+        self.assertEqual(dispatched[self.CRAWLER_NAME], 1)
+        self.assertEqual(sweeps[self.CRAWLER_NAME], (['XRP'], candle_open_time))
+
+        # Once its sweep recorded the next attempt
+        crawl['attempts'] = 2
+        self.redis_handler.hset(Coin_REDIS_KEY.CANDLE_CLOSE_CRAWLS.value, {self.CRAWLER_NAME: crawl})
+        self.assertIn(self.CRAWLER_NAME, self._dispatch()[0])
+
+    def test_retries_stop(self):
+        candle_open_time = get_candle_open_time('1h', self.NOW - CANDLE_CLOSE_CRAWL_DELAY * 1000)
+        crawls = Coin_REDIS_KEY.CANDLE_CLOSE_CRAWLS.value
+
+        self.redis_handler.hset(crawls, {
+            self.CRAWLER_NAME: {'candle_open_time': candle_open_time, 'missing': [], 'attempts': 1}
+        })
+        self.assertNotIn(self.CRAWLER_NAME, self._dispatch()[0])
+
+        self.redis_handler.hset(crawls, {
+            self.CRAWLER_NAME: {
+                'candle_open_time': candle_open_time, 'missing': ['XRP'], 'attempts': CANDLE_CLOSE_MAX_RETRIES + 1
+            }
+        })
+        self.assertNotIn(self.CRAWLER_NAME, self._dispatch()[0])
+
+    def test_running_sweep_is_left_alone(self):
+        tasks.get_ohlcv_sweep_lock(self.CRAWLER_NAME).acquire()
+
+        self.assertNotIn(self.CRAWLER_NAME, self._dispatch()[0])
+
+    def test_retried_coins_recorded_after_the_sweep(self):
+        candle_open_time = get_candle_open_time('1h', self.NOW)
+        tasks.dispatch_ohlcv_sweep(self.CRAWLER_NAME)
+
+        tasks.dispatch_ohlcv_sweep(self.CRAWLER_NAME, ['XRP'], candle_open_time)
+
+        self.assertEqual(
+            self._get_crawl(), {'candle_open_time': candle_open_time, 'missing': ['XRP'], 'attempts': 2}
+        )
+
+
+
+HOUR_MS = get_timeframe_duration_ms('1h')
+DAY_MS = get_timeframe_duration_ms('1d')
+
+
+class HistoricalPriceTestCase(TestCase):
+    """Database tests with the versions and the crawler's series in an in-memory Redis"""
+    def setUp(self):
+        self.redis_handler = get_fake_redis_connection()
+        for module in (selectors, versioning):
+            patcher = mock.patch.object(module, 'get_coins_redis_connection', return_value=self.redis_handler)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cache.clear()
+
+        self.crypto = Crypto.objects.create(name='BTC', full_name='Bitcoin', cmc_id=1)
+
+    @staticmethod
+    def _save_candles(model_class, crypto, candles):
+        """Save [timestamp, open, high, low, close, volume] rows"""
+        model_class.objects.bulk_create([
+            model_class(
+                crypto=crypto, timestamp=timestamp, open=open_, high=high, low=low, close=close, volume=volume
+            )
+            for timestamp, open_, high, low, close, volume in candles
+        ])
+
+
+class RetentionTests(HistoricalPriceTestCase):
+    # Two hours of five minute candles, long before any cutoff
+    START = 1_700_002_800_000
+
+    def setUp(self):
+        super().setUp()
+        self.candles = [
+            [self.START + i * 5 * 60 * 1000, 100 + i, 110 + i, 90 - i, 101 + i, 1]
+            for i in range(24)
+        ]
+        self._save_candles(FiveMinutePrice, self.crypto, self.candles)
+
+    def _rollup(self, batch_size=20000):
+        return services.rollup_historical_prices(
+            crypto_id=self.crypto.cmc_id, timeframe='5m', rollup_to='1h',
+            cutoff=self.START + 2 * HOUR_MS, batch_size=batch_size
+        )
+
+    def test_rollup_into_buckets(self):
+        self.assertEqual(self._rollup(), {'rolled_up': 2, 'freed': 24})
+
+        self.assertFalse(FiveMinutePrice.objects.exists())
+        self.assertEqual(
+            list(OneHourPrice.objects.order_by('timestamp').values_list(
+                'timestamp', 'open', 'high', 'low', 'close', 'volume'
+            )),
+            [
+                (self.START, 100, 121, 79, 112, 12),
+                (self.START + HOUR_MS, 112, 133, 67, 124, 12),
+            ]
+        )
+
+    def test_existing_target_candles_are_kept(self):
+        self._save_candles(OneHourPrice, self.crypto, [[self.START, 1, 1, 1, 1, 1]])
+
+        self.assertEqual(self._rollup(), {'rolled_up': 1, 'freed': 24})
+        self.assertEqual(OneHourPrice.objects.get(timestamp=self.START).close, 1)
+
+    def test_batch_never_splits_a_bucket(self):
+        self.assertEqual(self._rollup(batch_size=5), {'rolled_up': 1, 'freed': 12})
+
+        self.assertEqual(FiveMinutePrice.objects.count(), 12)
+        self.assertEqual(FiveMinutePrice.objects.order_by('timestamp').first().timestamp, self.START + HOUR_MS)
+
+    def test_recent_candles_are_retained(self):
+        recent = int(time.time() * 1000) - HOUR_MS
+        self._save_candles(FiveMinutePrice, self.crypto, [[recent, 1, 1, 1, 1, 1]])
+
+        summary = services.apply_retention_policies(
+            {'5m': {'keep_days': 30, 'rollup_to': '1h'}}, batch_size=5, time_budget=60
+        )
+
+        self.assertEqual(summary, {'5m': {'rolled_up': 2, 'freed': 24, 'complete': True}})
+        self.assertEqual(list(FiveMinutePrice.objects.values_list('timestamp', flat=True)), [recent])
+
+    def test_stops_when_out_of_time(self):
+        with mock.patch.object(services.time, 'monotonic', side_effect=[0, 100]):
+            summary = services.apply_retention_policies(
+                {'5m': {'keep_days': 30, 'rollup_to': '1h'}}, batch_size=5, time_budget=60
+            )
+
+        self.assertEqual(summary, {'5m': {'rolled_up': 0, 'freed': 0, 'complete': False}})
+        self.assertEqual(FiveMinutePrice.objects.count(), 24)
+
+
+class PriceStatisticsTests(HistoricalPriceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = int(time.time() * 1000)
+        self.open_time = now - now % HOUR_MS
+        # Two days of hourly candles, the last one still forming
+        self.candles = [
+            [self.open_time - (47 - i) * HOUR_MS, 100, 100 + i, 100 - i, 100 + i, 10 + i]
+            for i in range(48)
+        ]
+
+    def _ingest(self, candles, has_open_candle=True):
+        OneHourPrice.objects.filter(timestamp__in=[candle[0] for candle in candles]).delete()
+        self._save_candles(OneHourPrice, self.crypto, candles)
+        services.update_price_statistics(self.crypto, '1h', candles, has_open_candle=has_open_candle)
+
+    def _get(self, window):
+        return PriceStatistics.objects.get(crypto=self.crypto, timeframe='1h', window=window)
+
+    def test_all_time_statistics_are_seeded_and_folded_in(self):
+        self._save_candles(OneHourPrice, self.crypto, self.candles[:40])
+
+        self._ingest(self.candles[40:])
+
+        all_time = self._get(PriceStatistics.ALL_TIME)
+        # The forming candle moves the extremes, not the sums
+        self.assertEqual(all_time.candle_count, 47)
+        self.assertEqual(all_time.max_price, 147)
+        self.assertEqual(all_time.min_price, 53)
+        self.assertEqual(all_time.avg_price, sum(100 + i for i in range(47)) / 47)
+        self.assertEqual(all_time.last_timestamp, self.candles[46][0])
+
+    def test_forming_candle_is_counted_once_closed(self):
+        self._ingest(self.candles)
+        closed = [*self.candles[-1][:4], 200, 60]
+        self._ingest([closed, [self.open_time + HOUR_MS, 200, 200, 200, 200, 1]])
+        self._ingest([closed, [self.open_time + HOUR_MS, 200, 200, 200, 200, 1]])
+
+        all_time = self._get(PriceStatistics.ALL_TIME)
+        self.assertEqual(all_time.candle_count, 48)
+        self.assertEqual(all_time.close_sum, sum(100 + i for i in range(47)) + 200)
+        self.assertEqual(all_time.last_timestamp, self.open_time)
+
+    def test_windows_are_aggregated_from_the_table(self):
+        self._ingest(self.candles)
+
+        day = self._get('24h')
+        self.assertEqual(day.candle_count, 24)
+        self.assertEqual(day.max_price, 147)
+        self.assertEqual(day.min_price, 53)
+        self.assertEqual(day.avg_volume, sum(10 + i for i in range(24, 48)) / 24)
+        self.assertEqual(self._get('7d').candle_count, 48)
+
+    def test_missing_statistics_are_aggregated_on_the_fly(self):
+        self._save_candles(OneHourPrice, self.crypto, self.candles)
+
+        stats = selectors.get_window_price_statistics(self.crypto, '1h', '24h')
+
+        self.assertFalse(PriceStatistics.objects.exists())
+        self.assertEqual(stats['price'], {'max': 147, 'min': 53, 'average': sum(100 + i for i in range(24, 48)) / 24})
+
+    def test_materialized_statistics_are_served(self):
+        self._ingest(self.candles)
+        OneHourPrice.objects.all().delete()
+
+        stats = selectors.get_window_price_statistics(self.crypto, '1h')
+
+        self.assertEqual(stats['price']['max'], 147)
+
+
+class BulkPriceChangeTests(HistoricalPriceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = int(time.time() * 1000)
+        self.eth = Crypto.objects.create(name='ETH', full_name='Ethereum', cmc_id=1027)
+        self._save_candles(OneHourPrice, self.crypto, [
+            [now - 10 * DAY_MS, 1, 1, 1, 10, 1],
+            [now - 5 * DAY_MS, 1, 1, 1, 50, 1],
+            [now - 20 * HOUR_MS, 1, 1, 1, 100, 1],
+            [now - HOUR_MS, 1, 1, 1, 110, 1],
+        ])
+        self._save_candles(OneHourPrice, self.eth, [
+            [now - 5 * DAY_MS, 1, 1, 1, 0, 1],
+            [now - 2 * HOUR_MS, 1, 1, 1, 20, 1],
+            [now - HOUR_MS, 1, 1, 1, 30, 1],
+        ])
+
+    def test_changes_of_every_crypto(self):
+        changes = selectors.get_bulk_price_changes('1h', [1, 7, 30])
+
+        self.assertEqual(changes, [
+            {'cmc_id': 1, 'name': 'BTC', 'changes': {'1d': 10.0, '7d': 120.0, '30d': 1000.0}},
+            # A zero first close has no relative change
+            {'cmc_id': 1027, 'name': 'ETH', 'changes': {'1d': 50.0}},
+        ])
+
+    def test_selected_cryptos(self):
+        changes = selectors.get_bulk_price_changes('1h', [1], crypto_ids=[1027])
+
+        self.assertEqual(changes, [{'cmc_id': 1027, 'name': 'ETH', 'changes': {'1d': 50.0}}])
+
+    def test_no_candles(self):
+        self.assertEqual(selectors.get_bulk_price_changes('1d'), [])
+
+
+class HistoricalPriceApiTests(HistoricalPriceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email='user@example.com', password='x'))
+        self.url = reverse('api:exchange_webservice:crypto-historical-prices', kwargs={'pk': self.crypto.cmc_id})
+        self.timestamps = [1_700_006_400_000 + i * DAY_MS for i in range(5)]
+        self._save_candles(DailyPrice, self.crypto, [[timestamp, 1, 2, 0, 1, 1] for timestamp in self.timestamps])
+
+    def _bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            versioning.bump_versions(*versioning.get_historical_price_scopes(self.crypto.cmc_id, '1d'))
+
+    def test_cursor_pages_newest_first(self):
+        timestamps = []
+        url = f'{self.url}?timeframe=1d&limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            timestamps += [price['timestamp'] for price in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(timestamps, self.timestamps[::-1])
+
+    def test_invalid_time_range(self):
+        response = self.client.get(self.url, {'start_time': 2, 'end_time': 1})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unversioned_data_is_served_unconditionally(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_not_modified_until_bumped(self):
+        self._bump()
+        etag = self.client.get(self.url)['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self._bump()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cached_until_bumped(self):
+        self._bump()
+        self.client.get(self.url)
+        DailyPrice.objects.update(close=5)
+
+        self.assertEqual(self.client.get(self.url).json()['results'][0]['close'], 1)
+
+        self._bump()
+        self.assertEqual(self.client.get(self.url).json()['results'][0]['close'], 5)
+
+    def test_columnar_response(self):
+        response = self.client.get(self.url, {'format': 'columnar', 'limit': 2})
+
+        self.assertEqual(response['Content-Type'], 'application/vnd.columnar+json')
+        self.assertEqual(response.json()['results']['timestamp'], self.timestamps[:2:-1])
+
+
+class BatchHistoricalPriceApiTests(HistoricalPriceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email='user@example.com', password='x'))
+        self.url = reverse('api:exchange_webservice:crypto-batch-historical-prices')
+        self.eth = Crypto.objects.create(name='ETH', full_name='Ethereum', cmc_id=1027)
+
+        now = int(time.time() * 1000)
+        self.open_time = now - now % DAY_MS
+        self.candles = [[self.open_time - i * DAY_MS, 1, 2, 0, 1, 1] for i in range(3)]
+        for crypto in (self.crypto, self.eth):
+            self._save_candles(DailyPrice, crypto, self.candles)
+
+    def test_from_the_database(self):
+        response = self.client.get(self.url, {'ids': '1027,1,5', 'limit': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['source'], 'database')
+        self.assertEqual(response.data['not_found'], [5])
+        self.assertEqual([result['crypto_id'] for result in response.data['results']], [1027, 1])
+        self.assertEqual(
+            [price['timestamp'] for price in response.data['results'][0]['prices']],
+            [self.open_time, self.open_time - DAY_MS]
+        )
+
+    def test_from_the_crawler_series(self):
+        self.redis_handler.bulk_set({
+            ohlcv_key(crypto.name, '1d'): self.candles[::-1] for crypto in (self.crypto, self.eth)
+        })
+
+        response = self.client.get(self.url, {'symbols': 'BTC,ETH', 'limit': 2, 'format': 'columnar'})
+
+        self.assertEqual(response.data['source'], 'redis')
+        self.assertEqual(response.data['results']['crypto_id'], [1, 1, 1027, 1027])
+        self.assertEqual(response.data['results']['timestamp'], [self.open_time, self.open_time - DAY_MS] * 2)
+
+    def test_too_many_cryptos(self):
+        ids = ','.join(str(crypto_id) for crypto_id in range(101))
+
+        self.assertEqual(self.client.get(self.url, {'ids': ids}).status_code, 400)
+
+    def test_ids_or_symbols_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+class RendererTests(SimpleTestCase):
+    DATA = {'next': None, 'results': {'timestamp': [2, 1], 'close': [1.5, 2.5]}}
+
+    def test_wants_columns(self):
+        self.assertTrue(wants_columns(mock.Mock(accepted_renderer=renderers.ColumnarJSONRenderer())))
+        self.assertFalse(wants_columns(mock.Mock(accepted_renderer=JSONRenderer())))
+        self.assertFalse(wants_columns(object()))
+
+    @skipIf(renderers.msgpack is None, 'msgpack is not installed')
+    def test_message_pack(self):
+        content = renderers.MessagePackRenderer().render(self.DATA)
+
+        self.assertEqual(renderers.msgpack.unpackb(content), self.DATA)
+
+    @skipIf(renderers.pa is None, 'pyarrow is not installed')
+    def test_arrow_columns_and_metadata(self):
+        content = renderers.ArrowRenderer().render(self.DATA)
+
+        table = renderers.pa.ipc.open_stream(content).read_all()
+        self.assertEqual(table.to_pydict(), self.DATA['results'])
+        self.assertEqual(table.schema.metadata, {b'next': b'null'})
+
+    @skipIf(renderers.pa is None, 'pyarrow is not installed')
+    def test_arrow_without_columns(self):
+        content = renderers.ArrowRenderer().render({'error': 'Invalid timeframe'})
+
+        table = renderers.pa.ipc.open_stream(content).read_all()
+        self.assertEqual(table.num_columns, 0)
+        self.assertEqual(table.schema.metadata, {b'error': b'"Invalid timeframe"'})
+
+
+class StartTimeTests(SimpleTestCase):
+    def test_window_of_a_thousand_candles(self):
+        with mock.patch.object(time, 'time', return_value=1_700_000_000):
+            self.assertEqual(get_start_time('1d'), 1_700_000_000_000 - 1000 * DAY_MS)
+
+    def test_invalid_timeframe(self):
+        with self.assertRaises(ValueError):
+            get_start_time('1m')
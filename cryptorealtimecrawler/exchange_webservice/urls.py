@@ -1,12 +1,24 @@
+from django.db import transaction
 from django.urls import path
+from . import async_apis
 from .apis import (
     CryptoViewSet, ExchangeSymbolViewSet, CMCTagViewSet,
-    MarketDataViewSet, HistoricalPriceViewSet
+    MarketDataViewSet, HistoricalPriceViewSet, RealTimeViewSet
 )
 
 urlpatterns = [
     # Crypto endpoints
     path('cryptos/', CryptoViewSet.as_view({'get': 'list', 'post': 'create'}), name='crypto-list'),
+    path(
+        'cryptos/historical-prices/',
+        CryptoViewSet.as_view({'get': 'batch_historical_prices'}),
+        name='crypto-batch-historical-prices'
+    ),
+    path(
+        'cryptos/price-changes/',
+        CryptoViewSet.as_view({'get': 'bulk_price_changes'}),
+        name='crypto-bulk-price-changes'
+    ),
     path('cryptos/<int:pk>/', CryptoViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -15,13 +27,38 @@ urlpatterns = [
     }), name='crypto-detail'),
     path('cryptos/<int:pk>/market-data/', CryptoViewSet.as_view({'get': 'market_data'}), name='crypto-market-data'),
     path('cryptos/<int:pk>/tags/', CryptoViewSet.as_view({'get': 'tags'}), name='crypto-tags'),
-    path('cryptos/<int:pk>/exchange-symbols/', CryptoViewSet.as_view({'get': 'exchange_symbols'}), name='crypto-exchange-symbols'),
-    path('cryptos/<int:pk>/historical-prices/', CryptoViewSet.as_view({'get': 'historical_prices'}), name='crypto-historical-prices'),
-    path('cryptos/<int:pk>/price-statistics/', CryptoViewSet.as_view({'get': 'price_statistics'}), name='crypto-price-statistics'),
-    path('cryptos/<int:pk>/price-changes/', CryptoViewSet.as_view({'get': 'price_changes'}), name='crypto-price-changes'),
+    path(
+        'cryptos/<int:pk>/exchange-symbols/',
+        CryptoViewSet.as_view({'get': 'exchange_symbols'}),
+        name='crypto-exchange-symbols'
+    ),
+    path(
+        'cryptos/<int:pk>/historical-prices/',
+        CryptoViewSet.as_view({'get': 'historical_prices'}),
+        name='crypto-historical-prices'
+    ),
+    path(
+        'cryptos/<int:pk>/historical-prices/export/',
+        CryptoViewSet.as_view({'get': 'export_historical_prices'}),
+        name='crypto-historical-prices-export'
+    ),
+    path(
+        'cryptos/<int:pk>/price-statistics/',
+        CryptoViewSet.as_view({'get': 'price_statistics'}),
+        name='crypto-price-statistics'
+    ),
+    path(
+        'cryptos/<int:pk>/price-changes/',
+        CryptoViewSet.as_view({'get': 'price_changes'}),
+        name='crypto-price-changes'
+    ),
 
     # Exchange Symbol endpoints
-    path('exchange-symbols/', ExchangeSymbolViewSet.as_view({'get': 'list', 'post': 'create'}), name='exchange-symbol-list'),
+    path(
+        'exchange-symbols/',
+        ExchangeSymbolViewSet.as_view({'get': 'list', 'post': 'create'}),
+        name='exchange-symbol-list'
+    ),
     path('exchange-symbols/<int:pk>/', ExchangeSymbolViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
@@ -37,8 +74,16 @@ urlpatterns = [
         'patch': 'partial_update',
         'delete': 'destroy'
     }), name='cmc-tag-detail'),
-    path('cmc-tags/<int:pk>/add-to-crypto/', CMCTagViewSet.as_view({'post': 'add_to_crypto'}), name='cmc-tag-add-to-crypto'),
-    path('cmc-tags/<int:pk>/remove-from-crypto/', CMCTagViewSet.as_view({'post': 'remove_from_crypto'}), name='cmc-tag-remove-from-crypto'),
+    path(
+        'cmc-tags/<int:pk>/add-to-crypto/',
+        CMCTagViewSet.as_view({'post': 'add_to_crypto'}),
+        name='cmc-tag-add-to-crypto'
+    ),
+    path(
+        'cmc-tags/<int:pk>/remove-from-crypto/',
+        CMCTagViewSet.as_view({'post': 'remove_from_crypto'}),
+        name='cmc-tag-remove-from-crypto'
+    ),
 
     # Market Data endpoints
     path('market-data/', MarketDataViewSet.as_view({'get': 'list', 'post': 'create'}), name='market-data-list'),
@@ -50,6 +95,108 @@ urlpatterns = [
     }), name='market-data-detail'),
 
     # Historical Price endpoints
-    path('historical-prices/top-by-volume/', HistoricalPriceViewSet.as_view({'get': 'top_by_volume'}), name='historical-prices-top-by-volume'),
-    path('historical-prices/bulk-save/', HistoricalPriceViewSet.as_view({'post': 'bulk_save'}), name='historical-prices-bulk-save'),
-] 
\ No newline at end of file
+    path(
+        'historical-prices/top-by-volume/',
+        HistoricalPriceViewSet.as_view({'get': 'top_by_volume'}),
+        name='historical-prices-top-by-volume'
+    ),
+    path(
+        'historical-prices/top-gainers/',
+        HistoricalPriceViewSet.as_view({'get': 'top_gainers'}),
+        name='historical-prices-top-gainers'
+    ),
+    path(
+        'historical-prices/top-losers/',
+        HistoricalPriceViewSet.as_view({'get': 'top_losers'}),
+        name='historical-prices-top-losers'
+    ),
+    path(
+        'historical-prices/export/',
+        HistoricalPriceViewSet.as_view({'get': 'export'}),
+        name='historical-prices-export'
+    ),
+    path(
+        'historical-prices/bulk-save/',
+        HistoricalPriceViewSet.as_view({'post': 'bulk_save'}),
+        name='historical-prices-bulk-save'
+    ),
+
+    # Real-time endpoints, Redis only so they skip the request transaction
+    path(
+        'realtime/tickers/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'tickers'})),
+        name='realtime-tickers'
+    ),
+    path(
+        'realtime/tickers/<str:coin>/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'ticker'})),
+        name='realtime-ticker'
+    ),
+    path(
+        'realtime/spreads/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'spreads'})),
+        name='realtime-spreads'
+    ),
+    path(
+        'realtime/spreads/<str:coin>/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'spread'})),
+        name='realtime-spread'
+    ),
+    path(
+        'realtime/order-books/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'order_books'})),
+        name='realtime-order-books'
+    ),
+    path(
+        'realtime/order-books/<str:coin>/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'order_book'})),
+        name='realtime-order-book'
+    ),
+    path(
+        'realtime/order-book-metrics/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'order_books_metrics'})),
+        name='realtime-order-books-metrics'
+    ),
+    path(
+        'realtime/order-book-metrics/<str:coin>/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'order_book_metrics'})),
+        name='realtime-order-book-metrics'
+    ),
+    path(
+        'realtime/candles/<str:coin>/',
+        transaction.non_atomic_requests(RealTimeViewSet.as_view({'get': 'candles'})),
+        name='realtime-candles'
+    ),
+]
+
+# Async variants of the read-only endpoints, meant to be served under ASGI
+urlpatterns += [
+    path(
+        'async/cryptos/<int:pk>/historical-prices/',
+        async_apis.historical_prices,
+        name='async-crypto-historical-prices'
+    ),
+    path('async/cryptos/<int:pk>/price-statistics/', async_apis.price_statistics, name='async-crypto-price-statistics'),
+    path(
+        'async/historical-prices/top-by-volume/',
+        async_apis.top_by_volume,
+        name='async-historical-prices-top-by-volume'
+    ),
+    path('async/realtime/tickers/', async_apis.realtime_tickers, name='async-realtime-tickers'),
+    path('async/realtime/tickers/<str:coin>/', async_apis.realtime_ticker, name='async-realtime-ticker'),
+    path('async/realtime/spreads/', async_apis.realtime_spreads, name='async-realtime-spreads'),
+    path('async/realtime/spreads/<str:coin>/', async_apis.realtime_spread, name='async-realtime-spread'),
+    path('async/realtime/order-books/', async_apis.realtime_order_books, name='async-realtime-order-books'),
+    path('async/realtime/order-books/<str:coin>/', async_apis.realtime_order_book, name='async-realtime-order-book'),
+    path(
+        'async/realtime/order-book-metrics/',
+        async_apis.realtime_order_books_metrics,
+        name='async-realtime-order-books-metrics'
+    ),
+    path(
+        'async/realtime/order-book-metrics/<str:coin>/',
+        async_apis.realtime_order_book_metrics,
+        name='async-realtime-order-book-metrics'
+    ),
+    path('async/realtime/candles/<str:coin>/', async_apis.realtime_candles, name='async-realtime-candles'),
+]
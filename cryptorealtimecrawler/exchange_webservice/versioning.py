@@ -0,0 +1,193 @@
+"""
+Version stamps of the served data, used for conditional GETs and caching.
+
+Every write bumps the stamp of what it changed: a (crypto, timeframe) pair
+of historical prices or a catalog table. A stamp is the time of the last
+change in microseconds, so it doubles as the Last-Modified date. Read
+endpoints compare it with the client's validators and answer 304, or serve
+the response cached for the current versions, without touching the database.
+"""
+import functools
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Callable, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+from rest_framework.response import Response
+
+from cryptorealtimecrawler.common.redis_db_connection import (
+    get_coins_redis_connection, get_async_coins_redis_connection
+)
+from .crawler.redis_keys import data_version_key
+
+
+CRYPTO_SCOPE = 'crypto'
+EXCHANGE_SYMBOL_SCOPE = 'exchange_symbol'
+MARKET_DATA_SCOPE = 'market_data'
+TAG_SCOPE = 'tag'
+# Generation of all historical prices, bumped when every crypto's candles go at once
+HISTORICAL_PRICE_SCOPE = 'historical_price'
+
+
+def historical_price_scope(crypto_id: int, timeframe: str) -> str:
+    """Scope of a crypto's candles of a timeframe and their statistics"""
+    return f'historical_price_{crypto_id}_{timeframe}'
+
+
+def get_historical_price_scopes(crypto_id: int, timeframe: str) -> List[str]:
+    """Scopes of a response built from a crypto's candles of a timeframe"""
+    return [HISTORICAL_PRICE_SCOPE, historical_price_scope(crypto_id, timeframe)]
+
+
+def bump_versions(*scopes: str) -> None:
+    """Mark `scopes` as changed once the current transaction commits"""
+    def bump():
+        version = time.time_ns() // 1000
+        get_coins_redis_connection().bulk_set({
+            data_version_key(scope): version for scope in set(scopes)
+        })
+
+    # Bumping before commit would let a client cache the old data under the new version
+    transaction.on_commit(bump)
+
+
+def _parse_versions(keys: List[str], versions: dict) -> Optional[List[int]]:
+    if len(versions) != len(keys):
+        return None
+    return [int(versions[key]) for key in keys]
+
+
+def get_versions(scopes: Iterable[str]) -> Optional[List[int]]:
+    """Versions of `scopes`, None unless all of them were ever bumped"""
+    keys = [data_version_key(scope) for scope in scopes]
+    return _parse_versions(keys, get_coins_redis_connection().bulk_get(keys))
+
+
+async def aget_versions(scopes: Iterable[str]) -> Optional[List[int]]:
+    """Async get_versions"""
+    keys = [data_version_key(scope) for scope in scopes]
+    return _parse_versions(keys, await get_async_coins_redis_connection().bulk_get(keys))
+
+
+def _get_request_versions(request, get_scopes, *args, **kwargs) -> Optional[List[int]]:
+    # Several decorators look at the versions of a request, fetch them once
+    if not hasattr(request, '_data_versions'):
+        request._data_versions = get_versions(get_scopes(request, *args, **kwargs))
+    return request._data_versions
+
+
+def _get_representation_key(request, versions: List[int]) -> str:
+    """Hash of the versions and what selects the representation: URL and Accept header"""
+    representation = f"{request.build_absolute_uri()}:{request.META.get('HTTP_ACCEPT', '')}"
+    key = f"{representation}:{':'.join(map(str, versions))}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def conditional_on_versions(get_scopes: Callable[..., List[str]]):
+    """
+    Decorate a viewset action to honour If-None-Match and If-Modified-Since.
+
+    `get_scopes` receives the request and the action's URL kwargs and
+    returns the scopes the response is built from. Responses of data that
+    was never versioned are served unconditionally.
+    """
+    def etag_func(request, *args, **kwargs):
+        versions = _get_request_versions(request, get_scopes, *args, **kwargs)
+        if versions is None:
+            return None
+        return _get_representation_key(request, versions)
+
+    def last_modified_func(request, *args, **kwargs):
+        versions = _get_request_versions(request, get_scopes, *args, **kwargs)
+        if versions is None:
+            return None
+        return datetime.fromtimestamp(max(versions) / 1_000_000, tz=dt_timezone.utc)
+
+    return method_decorator([
+        vary_on_headers('Accept'),
+        condition(etag_func=etag_func, last_modified_func=last_modified_func),
+    ])
+
+
+def cache_on_versions(get_scopes: Callable[..., List[str]]):
+    """
+    Decorate a viewset action to cache its rendered responses per version.
+
+    The versions are part of the cache key, so a write to any of the scopes
+    is an exact invalidation. CACHE_TTL only evicts entries nobody can hit
+    anymore. Only successful responses of versioned data are cached.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            versions = _get_request_versions(request, get_scopes, *args, **kwargs)
+            if versions is None:
+                return method(view, request, *args, **kwargs)
+
+            key = f'response:{_get_representation_key(request, versions)}'
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                # Render now, as DRF would after the action, to cache the bytes
+                response.accepted_renderer = request.accepted_renderer
+                response.accepted_media_type = request.accepted_media_type
+                response.renderer_context = view.get_renderer_context()
+                response.render()
+                cache.set(key, (response.content, response['Content-Type']), settings.CACHE_TTL)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def async_conditional_on_versions(get_scopes: Callable[..., List[str]]):
+    """
+    Decorate an async view with conditional_on_versions and cache_on_versions
+    in one, Django's condition() decorator only wraps sync views.
+
+    `get_scopes` receives the request and the view's URL kwargs.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            versions = await aget_versions(get_scopes(request, *args, **kwargs))
+            if versions is None:
+                return await view(request, *args, **kwargs)
+
+            representation_key = _get_representation_key(request, versions)
+            etag = quote_etag(representation_key)
+            last_modified = max(versions) // 1_000_000
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                key = f'response:{representation_key}'
+                cached = await cache.aget(key)
+                if cached is not None:
+                    content, content_type = cached
+                    response = HttpResponse(content, content_type=content_type)
+                else:
+                    response = await view(request, *args, **kwargs)
+                    if response.status_code == 200 and isinstance(response, JsonResponse):
+                        await cache.aset(key, (response.content, response['Content-Type']), settings.CACHE_TTL)
+
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+            response.headers.setdefault('ETag', etag)
+            patch_vary_headers(response, ('Accept',))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,115 @@
+import asyncio
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.settings.exchange import ORDER_BOOK_STREAMING
+
+from cryptorealtimecrawler.common.redis_db_connection import get_coins_redis_connection
+from cryptorealtimecrawler.exchange_webservice.crawler.cluster import (
+    DEFAULT_HEARTBEAT_INTERVAL, DEFAULT_NODE_TTL, NodeMembership
+)
+from cryptorealtimecrawler.exchange_webservice.crawler.connector import ExchangeConnector
+from cryptorealtimecrawler.exchange_webservice.crawler.order_book_stream import (
+    DEFAULT_DEPTH, DEFAULT_PUBLISH_INTERVAL, CcxtProOrderBookFeed, FakeOrderBookFeed, OrderBookDaemon
+)
+from cryptorealtimecrawler.exchange_webservice.crawler.real_time import CoinHandler
+from cryptorealtimecrawler.exchange_webservice.models import ExchangeSymbol
+
+
+def get_coin_symbols(exchanges: List[str], coins_limit: int) -> Dict[str, Dict[str, str]]:
+    """
+    {exchange: {symbol: coin}} of the first `coins_limit` coins, each watched
+    on the first of `exchanges` listing it, like the polled order books.
+    """
+    listings = {}
+    for crypto_id, coin, exchange, symbol in (
+        ExchangeSymbol.objects
+        .filter(exchange__in=exchanges, is_active=True)
+        .order_by('crypto_id')
+        .values_list('crypto_id', 'crypto__name', 'exchange', 'symbol')
+    ):
+        listings.setdefault((crypto_id, coin), {})[exchange] = symbol
+
+    coin_symbols = {exchange: {} for exchange in exchanges}
+    for (_, coin), symbols in list(listings.items())[:coins_limit]:
+        exchange = next(exchange for exchange in exchanges if exchange in symbols)
+        coin_symbols[exchange][symbols[exchange]] = coin
+    return {exchange: symbols for exchange, symbols in coin_symbols.items() if symbols}
+
+
+class Command(BaseCommand):
+    help = """
+    Keep order books up to date from the exchanges' WebSocket streams and
+    publish their top levels to Redis, instead of polling full snapshots.
+    Only runs with ORDER_BOOK_STREAMING set, which also makes
+    setup_periodic_tasks leave the polled get_orderbook_data task disabled,
+    so the two never write the same order books.
+
+    Daemons of the same --group, on one or several machines, split the coins
+    between them and rebalance as daemons join or die. --standalone watches
+    every coin regardless of the other daemons.
+
+    --fake streams random books from a local feed, for tests and local runs.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exchanges', nargs='+', default=ExchangeConnector.Exchanges)
+        parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help='Levels published per side')
+        parser.add_argument('--publish-interval', type=float, default=DEFAULT_PUBLISH_INTERVAL, help='Seconds')
+        parser.add_argument('--coins-limit', type=int, default=CoinHandler.Coins_Limit)
+        parser.add_argument('--duration', type=float, default=None, help='Seconds to run for, forever by default')
+        parser.add_argument('--fake', action='store_true')
+        parser.add_argument('--drop-rate', type=float, default=0.0, help='Share of fake diffs lost, with --fake')
+        parser.add_argument('--group', default='orderbooks', help='Daemons of a group split the coins between them')
+        parser.add_argument('--node-id', default=None, help='Unique within the group, host and pid by default')
+        parser.add_argument('--heartbeat-interval', type=float, default=DEFAULT_HEARTBEAT_INTERVAL, help='Seconds')
+        parser.add_argument(
+            '--node-ttl', type=float, default=DEFAULT_NODE_TTL, help='Seconds without heartbeat before a node is dead'
+        )
+        parser.add_argument('--standalone', action='store_true')
+
+    def handle(self, *args, **options):
+        if not ORDER_BOOK_STREAMING:
+            raise CommandError('ORDER_BOOK_STREAMING is not set, order books are polled by get_orderbook_data')
+
+        coin_symbols = get_coin_symbols(options['exchanges'], options['coins_limit'])
+        if not coin_symbols:
+            self.stderr.write('No exchange symbols to watch')
+            return
+
+        asyncio.run(self._run(coin_symbols, options))
+
+    async def _run(self, coin_symbols: Dict[str, Dict[str, str]], options) -> None:
+        if options['fake']:
+            feeds = {
+                exchange: FakeOrderBookFeed(exchange, drop_rate=options['drop_rate'])
+                for exchange in coin_symbols
+            }
+        else:
+            feeds = {exchange: CcxtProOrderBookFeed(exchange, depth=options['depth']) for exchange in coin_symbols}
+
+        redis_handler = get_coins_redis_connection()
+        membership = None
+        if not options['standalone']:
+            membership = NodeMembership(
+                redis_handler, options['group'], node_id=options['node_id'], ttl=options['node_ttl']
+            )
+
+        daemon = OrderBookDaemon(
+            feeds,
+            coin_symbols,
+            redis_handler,
+            depth=options['depth'],
+            publish_interval=options['publish_interval'],
+            membership=membership,
+            heartbeat_interval=options['heartbeat_interval']
+        )
+        if membership is None:
+            self.stdout.write(f'Watching {sum(map(len, coin_symbols.values()))} order books')
+        else:
+            self.stdout.write(
+                f'Sharing {sum(map(len, coin_symbols.values()))} order books as node {membership.node_id}'
+            )
+        await daemon.run(duration=options['duration'])
+        self.stdout.write(f'Stopped after {daemon.resnapshot_count} snapshots')
@@ -4,9 +4,9 @@ from django.utils.timezone import get_default_timezone_name
 from django_celery_beat.models import IntervalSchedule, CrontabSchedule, PeriodicTask
 
 
+from config.settings.exchange import ORDER_BOOK_STREAMING
 from cryptorealtimecrawler.exchange_webservice.tasks import get_tf_coins_data, get_real_time_data, \
-    get_five_min_data, get_fifteen_min_data, get_one_hour_data, \
-    get_four_hour_data, get_daily_data, get_weekly_data
+    get_orderbook_data, dispatch_candle_close_crawls, apply_historical_price_retention
 
 
 
@@ -43,6 +43,11 @@ class Command(BaseCommand):
             },
             'enabled': True
         },
+        Tasks running more often than every minute take an 'interval' instead:
+            'interval': {
+                'every': 10,
+                'period': IntervalSchedule.SECONDS,
+            },
         """
         periodic_tasks_data = [
 
@@ -71,58 +76,33 @@ class Command(BaseCommand):
                 'enabled': True
             },
             {
-                'task': get_five_min_data,
-                'name': 'Get five minutes data',
+                # Polled order books, run_order_book_daemon replaces them when ORDER_BOOK_STREAMING is set
+                'task': get_orderbook_data,
+                'name': 'Get order book data',
                 'cron': {
-                    'minute': '*/7',
-                    'hour': '*',
-                    'day_of_week': '*',
-                    'day_of_month': '*',
-                    'month_of_year': '*',
-                },
-                'enabled': True
-            },
-            {
-                'task': get_fifteen_min_data,
-                'name': 'Run every 15 minutes',
-                'cron': {
-                    'minute': '*/15',
+                    'minute': '*/1',
                     'hour': '*',
                     'day_of_week': '*',
                     'day_of_month': '*',
                     'month_of_year': '*',
                 },
-                'enabled': True
-            },
-            {
-                'task': get_one_hour_data,
-                'name': 'Run every hour',
-                'cron': {
-                    'minute': '45',
-                    'hour': '*/1',
-                    'day_of_week': '*',
-                    'day_of_month': '*',
-                    'month_of_year': '*',
-                },
-                'enabled': True
+                'enabled': not ORDER_BOOK_STREAMING
             },
             {
-                'task': get_four_hour_data,
-                'name': 'Run every 4 hours',
-                'cron': {
-                    'minute': '55',
-                    'hour': '*/1',
-                    'day_of_week': '*',
-                    'day_of_month': '*',
-                    'month_of_year': '*',
+                # Starts the OHLCV sweeps of every timeframe shortly after their candles close
+                'task': dispatch_candle_close_crawls,
+                'name': 'Dispatch candle close crawls',
+                'interval': {
+                    'every': 10,
+                    'period': IntervalSchedule.SECONDS,
                 },
                 'enabled': True
             },
             {
-                'task': get_daily_data,
-                'name': 'Run daily',
+                'task': apply_historical_price_retention,
+                'name': 'Apply historical price retention',
                 'cron': {
-                    'minute': '55',
+                    'minute': '30',
                     'hour': '*/1',
                     'day_of_week': '*',
                     'day_of_month': '*',
@@ -130,18 +110,6 @@ class Command(BaseCommand):
                 },
                 'enabled': True
             },
-            {
-                'task': get_weekly_data,
-                'name': 'Run weekly',
-                'cron': {
-                    'minute': '2',
-                    'hour': '0',
-                    'day_of_week': '0',
-                    'day_of_month': '*',
-                    'month_of_year': '*',
-                },
-                'enabled': True
-            },
             # {
             #     'task': get_tradingview_idea_task,
             #     'name': 'tradingview_idea_task',
@@ -186,14 +154,14 @@ class Command(BaseCommand):
         for periodic_task in periodic_tasks_data:
             print(f'Setting up {periodic_task["task"].name}')
 
-            cron = CrontabSchedule.objects.create(
-                timezone=timezone,
-                **periodic_task['cron']
-            )
+            if 'interval' in periodic_task:
+                schedule = {'interval': IntervalSchedule.objects.create(**periodic_task['interval'])}
+            else:
+                schedule = {'crontab': CrontabSchedule.objects.create(timezone=timezone, **periodic_task['cron'])}
 
             PeriodicTask.objects.create(
                 name=periodic_task['name'],
                 task=periodic_task['task'].name,
-                crontab=cron,
-                enabled=periodic_task['enabled']
+                enabled=periodic_task['enabled'],
+                **schedule
             )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from cryptorealtimecrawler.exchange_webservice.crawler.run_lock import (
+    RUN_COMPLETED, RUN_OVERLAPPED, RUN_SKIPPED, RUN_STARTED, get_run_metrics
+)
+
+
+RUN_OUTCOMES = [RUN_STARTED, RUN_COMPLETED, RUN_SKIPPED, RUN_OVERLAPPED]
+
+
+class Command(BaseCommand):
+    help = """
+    Show how many periodic crawler runs started, completed, were skipped
+    because the previous run was still going, or outlived their lease, per
+    run lock.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default=None, help='Only the run locks whose name contains this')
+
+    def handle(self, *args, **options):
+        metrics = get_run_metrics()
+        names = sorted(name for name in metrics if options['name'] is None or options['name'] in name)
+        if not names:
+            self.stdout.write('No crawler runs recorded')
+            return
+
+        width = max(len(name) for name in names)
+        self.stdout.write(f"{'run':<{width}}  " + '  '.join(f'{outcome:>10}' for outcome in RUN_OUTCOMES))
+        for name in names:
+            counts = metrics[name]
+            self.stdout.write(
+                f'{name:<{width}}  ' + '  '.join(f'{counts.get(outcome, 0):>10}' for outcome in RUN_OUTCOMES)
+            )
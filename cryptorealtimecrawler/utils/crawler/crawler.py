@@ -1,25 +1,43 @@
 import time
+from typing import Dict, List
 
+import numpy as np
 from pandas import DataFrame
 import pandas as pd
 
-def get_start_time(timeframe):
 
-    timeframe_durations = {
-        '5m': 5 * 60,
-        '15m': 15 * 60,
-        '1h': 60 * 60,
-        '4h': 4 * 60 * 60
-    }
+TIMEFRAME_DURATIONS = {
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '1h': 60 * 60,
+    '4h': 4 * 60 * 60,
+    '1d': 24 * 60 * 60,
+    '1w': 7 * 24 * 60 * 60
+}
+
+
+def get_timeframe_duration_ms(timeframe):
+    if timeframe not in TIMEFRAME_DURATIONS:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
 
-    if timeframe not in timeframe_durations:
-        raise ValueError("Invalid timeframe. Supported timeframes are: '5m', '15m', '1h', '4h'")
+    return TIMEFRAME_DURATIONS[timeframe] * 1000
 
+
+def get_candle_open_time(timeframe, timestamp_ms):
+    """Open time (ms) of the `timeframe` candle `timestamp_ms` falls in"""
+    duration = get_timeframe_duration_ms(timeframe)
+    # Weekly candles open on Mondays, the epoch was a Thursday
+    offset = 4 * TIMEFRAME_DURATIONS['1d'] * 1000 if timeframe == '1w' else 0
+    return (timestamp_ms - offset) // duration * duration + offset
+
+
+def get_start_time(timeframe):
+    """Open time (ms) of the window covering the last 1000 `timeframe` candles"""
     current_time = int(time.time())
 
-    duration = 1000 * timeframe_durations[timeframe]
+    duration = 1000 * get_timeframe_duration_ms(timeframe)
 
-    start_time = (current_time - duration) * 1000
+    start_time = current_time * 1000 - duration
 
     return start_time
 
@@ -32,13 +50,57 @@ def convert_ohlc_to_heikinashi(data:DataFrame):
     df_HA['Adj_Low'] = df_HA['Low']
     df_HA['Close'] = (df_HA['Open'] + df_HA['High'] + df_HA['Low'] + df_HA['Close']) / 4
 
-    for i in range(0, len(df_HA)):
-        if i == 0:
-            df_HA['Open'][i] = ((df_HA['Open'][i] + df_HA['Close'][i]) / 2)
-        else:
-            df_HA['Open'][i] = ((df_HA['Open'][i - 1] + df_HA['Close'][i - 1]) / 2)
+    if len(df_HA):
+        # open[i] = (open[i - 1] + close[i - 1]) / 2 is an EWM with alpha 0.5 over the
+        # previous closes, seeded with the first candle's (open + close) / 2
+        previous_close = df_HA['Close'].shift(1)
+        previous_close.iloc[0] = (df_HA['Open'].iloc[0] + df_HA['Close'].iloc[0]) / 2
+        df_HA['Open'] = previous_close.ewm(alpha=0.5, adjust=False).mean()
 
     df_HA['High'] = df_HA[['Open', 'Close', 'High']].max(axis=1)
     df_HA['Low'] = df_HA[['Open', 'Close', 'Low']].min(axis=1)
     return df_HA
 
+
+def convert_ohlcv_batch_to_heikinashi(ohlcv_data: Dict[str, List[List]]) -> Dict[str, List[List]]:
+    """
+    Convert the [timestamp, open, high, low, close, volume] candles of many
+    coins to Heikin-Ashi at once, same recursion as convert_ohlc_to_heikinashi.
+
+    Series are right aligned in one (candles x coins) matrix, padded with NaN
+    in front, so a single EWM pass computes every coin's opens.
+    """
+    ohlcv_data = {coin: candles for coin, candles in ohlcv_data.items() if candles}
+    if not ohlcv_data:
+        return {}
+
+    coins = list(ohlcv_data)
+    lengths = np.array([len(ohlcv_data[coin]) for coin in coins])
+    n = lengths.max()
+
+    candles = np.full((n, len(coins), 6), np.nan)
+    for column, coin in enumerate(coins):
+        candles[n - lengths[column]:, column, :] = np.array(
+            [candle[:6] for candle in ohlcv_data[coin]], dtype=float
+        )
+    timestamps, opens, highs, lows, closes, volumes = np.moveaxis(candles, 2, 0)
+
+    ha_close = (opens + highs + lows + closes) / 4
+    previous_close = np.vstack([np.full((1, len(coins)), np.nan), ha_close[:-1]])
+    first = n - lengths
+    columns = np.arange(len(coins))
+    previous_close[first, columns] = (opens[first, columns] + ha_close[first, columns]) / 2
+    # Leading NaNs are skipped, each column's EWM starts at its own first candle
+    ha_open = DataFrame(previous_close).ewm(alpha=0.5, adjust=False).mean().to_numpy()
+
+    ha_high = np.maximum(np.maximum(ha_open, ha_close), highs)
+    ha_low = np.minimum(np.minimum(ha_open, ha_close), lows)
+
+    ha_candles = np.stack([timestamps, ha_open, ha_high, ha_low, ha_close, volumes], axis=2)
+    return {
+        coin: [
+            [int(candle[0]), *candle[1:].tolist()]
+            for candle in ha_candles[n - lengths[column]:, column]
+        ]
+        for column, coin in enumerate(coins)
+    }
@@ -12,4 +12,4 @@ python manage.py collectstatic --noinput
 
 # Start server
 echo "--> Starting web process"
-gunicorn config.wsgi:application -b 0.0.0.0:8000
\ No newline at end of file
+gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000
\ No newline at end of file